@@ -2,6 +2,7 @@
 import sys
 import os
 import re
+import shutil
 import time
 from pathlib import Path
 import threading
@@ -32,9 +33,35 @@ from core.formats import (
     get_formats_for_playlist_item,
     first_index_from_playlist_items_spec,
 )
-from core.downloader import download_video, prepend_tools_dir_to_path, ensure_yt_dlp_updated, FORMAT_OPTIONS
+from core.downloader import (
+    download_outputs,
+    prepend_tools_dir_to_path,
+    ensure_yt_dlp_updated,
+    FORMAT_OPTIONS,
+    NetworkInterrupted,
+    default_pp_workers,
+    output_ext,
+)
+from core.storage import InsufficientSpace, check_free_space, estimate_format_bytes, estimate_job_bytes, format_bytes
+from core.utils import parse_clip_range
+from core import loudness, staging, verify
+from core.jobs import (
+    ITEM_FAILED,
+    ITEM_SKIPPED,
+    JobControl,
+    PlaylistControl,
+    find_resumable_jobs,
+    job_archive_path,
+    journal_add,
+    journal_get,
+    journal_remove,
+    journal_update,
+    remaining_bytes,
+)
 
 _STD_P = (144, 240, 360, 480, 720, 1080, 1440, 2160)
+# Veri tasarrufu: ses akışında kabul edilen en düşük ortalama bitrate (kbps)
+_DATA_SAVER_MIN_ABR = 64.0
 
 
 def run_in_thread(fn, *args, **kwargs):
@@ -126,6 +153,20 @@ class MainWindow(Gtk.ApplicationWindow):
         self._last_speed_mbps: float | None = None
         self._last_eta: str | None = None
         self.cancel_event: threading.Event | None = None
+        self.job_control: JobControl | None = None
+        # Playlist işinde öğe bazlı kontrol (atla / öne al / yeniden dene)
+        self.playlist_control: PlaylistControl | None = None
+        # Son taramanın format listesi (disk alanı tahmini için) ve yer bekleyen iş
+        self._scan_formats: list[dict] = []
+        self._space_wait_spec: dict | None = None
+        self._space_wait_source_id = 0
+        self._space_wait_toast = None
+        # Doğrulamada bozuk çıkan çıktılar için yeniden indirme kuyruğu (iş boşta kalınca sırayla başlar)
+        self._verify_requeue: list[dict] = []
+        self._verify_requeue_source_id = 0
+        # Sürdürme günlüğü: aktif iş ve ağ kopmasıyla yarım kalan iş
+        self._active_job_id: str | None = None
+        self._interrupted_job_id: str | None = None
         self._ignore_progress_updates: bool = False
         self.last_caps: dict | None = None
         self._format_overrides: dict[str, str] = {}
@@ -150,6 +191,11 @@ class MainWindow(Gtk.ApplicationWindow):
         self._pl_selected_total: int = 0
         self._pl_ord: int = 0
 
+        # Son işin aktarım ayarları özeti (ör. '4 parça • 5M chunk • yt-dlp')
+        self._transfer_summary: str = ""
+        # Son işin aşama özeti (ör. 'indirme: 312.4 sn, 4.1 GB · metadata: 0.0 sn, 412 B')
+        self._phase_summary: str = ""
+
         # ---- UI root ----
         root = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
         root.set_hexpand(True)
@@ -280,8 +326,47 @@ class MainWindow(Gtk.ApplicationWindow):
         self.cancel_button.set_child(self._button_content("İptal", "process-stop-symbolic"))
         self.cancel_button.set_sensitive(False)
         self.cancel_button.connect("clicked", self.on_cancel_clicked)
+
+        # Duraklat / Devam (iptalin yanında; aktarım durumu korunur)
+        self.pause_button = Gtk.Button()
+        self.pause_button.set_hexpand(True)
+        self.pause_button.set_halign(Gtk.Align.FILL)
+        self.pause_button.add_css_class("pill")
+        self.pause_button.set_child(self._button_content("Duraklat", "media-playback-pause-symbolic"))
+        self.pause_button.set_sensitive(False)
+        self.pause_button.connect("clicked", self.on_pause_clicked)
+
+        # Playlist öğe kontrolü: ana tık şu anki öğeyi atlar; menüden numarayla atla/öne al/yeniden dene.
+        self.item_spin = Gtk.SpinButton.new_with_range(1, 9999, 1)
+        self.item_spin.set_numeric(True)
+        item_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=6)
+        item_box.set_margin_top(6)
+        item_box.set_margin_bottom(6)
+        item_box.set_margin_start(6)
+        item_box.set_margin_end(6)
+        item_box.append(Gtk.Label(label="Öğe numarası", xalign=0))
+        item_box.append(self.item_spin)
+        for label, action in (("Atla", "skip"), ("Öne Al", "prioritize"), ("Yeniden Dene", "retry")):
+            b = Gtk.Button(label=label)
+            b.connect("clicked", self.on_item_action_clicked, action)
+            item_box.append(b)
+        item_popover = Gtk.Popover()
+        item_popover.set_child(item_box)
+
+        self.skip_item_button = Adw.SplitButton()
+        self.skip_item_button.set_hexpand(True)
+        self.skip_item_button.set_child(self._button_content("Öğeyi Atla", "media-skip-forward-symbolic"))
+        self.skip_item_button.set_popover(item_popover)
+        self.skip_item_button.set_tooltip_text("Şu an indirilen playlist öğesini atla")
+        self.skip_item_button.connect("clicked", self.on_skip_item_clicked)
+        self.skip_item_button.set_visible(False)
+
+        control_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=8, homogeneous=True)
+        control_box.append(self.pause_button)
+        control_box.append(self.skip_item_button)
+        control_box.append(self.cancel_button)
         cancel_row = Adw.PreferencesRow()
-        cancel_row.set_child(self.cancel_button)
+        cancel_row.set_child(control_box)
 
         # 7) Progress
         self.progress = Gtk.ProgressBar()
@@ -367,6 +452,149 @@ class MainWindow(Gtk.ApplicationWindow):
         self.playlist_info_row.set_sensitive(False)
         adv_group.add(self.playlist_info_row)
 
+        # Çok bağlantılı harici indirici (aria2c varsa)
+        self.aria2_switch = Gtk.Switch()
+        self.aria2_switch.set_valign(Gtk.Align.CENTER)
+        self.aria2_switch.set_active(False)
+        self.aria2_switch.add_css_class("ytdl-switch")
+        aria2_row = Adw.ActionRow(
+            title="Çok bağlantılı indirme",
+            subtitle="Açıksa aktarım aria2c üzerinden çoklu bağlantıyla yapılır.",
+        )
+        if shutil.which("aria2c") is None:
+            aria2_row.set_subtitle("aria2c bulunamadı.")
+            aria2_row.set_sensitive(False)
+        aria2_row.add_suffix(self.aria2_switch)
+        aria2_row.set_activatable_widget(self.aria2_switch)
+        adv_group.add(aria2_row)
+
+        # Ara dizin: ara dosyalar hızlı yerel diskte (SSD/tmpfs), yavaş hedefe yalnızca bitmiş çıktılar
+        self.staging_entry = Gtk.Entry()
+        self.staging_entry.set_valign(Gtk.Align.CENTER)
+        self.staging_entry.set_hexpand(True)
+        suggested = staging.default_root()
+        self.staging_entry.set_placeholder_text(f"Örn: {suggested} (boş: kapalı)" if suggested else "Örn: /tmp (boş: kapalı)")
+        staging_row = Adw.ActionRow(
+            title="Ara dizin",
+            subtitle="Opsiyonel: İndirme/birleştirme burada yapılır; hedefe çıktı başına tek yazma gider.",
+        )
+        staging_row.add_suffix(self.staging_entry)
+        adv_group.add(staging_row)
+
+        # Tekilleştirme: aynı medya (örn. birden çok playlist'te) diskte bir kez tutulur, klasörlere hardlink
+        self.dedup_switch = Gtk.Switch()
+        self.dedup_switch.set_valign(Gtk.Align.CENTER)
+        self.dedup_switch.set_active(False)
+        self.dedup_switch.add_css_class("ytdl-switch")
+        dedup_row = Adw.ActionRow(
+            title="Tekilleştirme",
+            subtitle="Aynı içerik hedefte zaten varsa yeni kopya yerine hardlink verilir.",
+        )
+        dedup_row.add_suffix(self.dedup_switch)
+        dedup_row.set_activatable_widget(self.dedup_switch)
+        adv_group.add(dedup_row)
+
+        # Yansı kökleri: çıktılar aynı düzenle başka köklerde de (kopya çoğaltmadan) gösterilir
+        self.mirror_entry = Gtk.Entry()
+        self.mirror_entry.set_valign(Gtk.Align.CENTER)
+        self.mirror_entry.set_hexpand(True)
+        self.mirror_entry.set_placeholder_text("Örn: /mnt/arsiv:/srv/medya (boş: kapalı)")
+        mirror_row = Adw.ActionRow(
+            title="Yansı klasörleri",
+            subtitle="Opsiyonel: ':' ile ayrılmış kökler; aynı diskte hardlink, değilse tek kopya.",
+        )
+        mirror_row.add_suffix(self.mirror_entry)
+        adv_group.add(mirror_row)
+
+        # Doğrulama: bitmiş çıktılar arka planda denetlenir, bozuklar yeniden kuyruğa alınır
+        self.verify_switch = Gtk.Switch()
+        self.verify_switch.set_valign(Gtk.Align.CENTER)
+        self.verify_switch.set_active(False)
+        self.verify_switch.add_css_class("ytdl-switch")
+        verify_row = Adw.ActionRow(
+            title="Bütünlük doğrulaması",
+            subtitle="Konteyner yapısı, akışlar ve süre denetlenir; bozuk çıktı otomatik yeniden indirilir.",
+        )
+        verify_row.add_suffix(self.verify_switch)
+        verify_row.set_activatable_widget(self.verify_switch)
+        adv_group.add(verify_row)
+
+        # Veri tasarrufu: kalite hedefini karşılayan en küçük akışları seç
+        self.data_saver_switch = Gtk.Switch()
+        self.data_saver_switch.set_valign(Gtk.Align.CENTER)
+        self.data_saver_switch.set_active(False)
+        self.data_saver_switch.add_css_class("ytdl-switch")
+        data_saver_row = Adw.ActionRow(
+            title="Veri tasarrufu",
+            subtitle="Aynı çözünürlükte en küçük video (AV1/VP9) ve yeterli bitrate'teki en küçük ses seçilir.",
+        )
+        data_saver_row.add_suffix(self.data_saver_switch)
+        data_saver_row.set_activatable_widget(self.data_saver_switch)
+        adv_group.add(data_saver_row)
+
+        # Ek çıktı: aynı indirmeden ikinci bir çıktı üret (ortak akışlar bir kez indirilir)
+        self._extra_output_keys: list[str | None] = [None]
+        self.extra_output_model = Gtk.StringList.new(["Yok"])
+        self.extra_output_row = Adw.ComboRow(
+            title="Ek çıktı",
+            subtitle="Örn: MKV ile birlikte kapaklı .opus; ortak akışlar tekrar indirilmez.",
+            model=self.extra_output_model,
+        )
+        adv_group.add(self.extra_output_row)
+
+        # Klip: uzun yayından yalnızca bir zaman aralığını indir
+        self.clip_entry = Gtk.Entry()
+        self.clip_entry.set_valign(Gtk.Align.CENTER)
+        self.clip_entry.set_hexpand(True)
+        self.clip_entry.set_placeholder_text("Örn: 1:02:03-1:02:33 (boş: tamamı)")
+        clip_row = Adw.ActionRow(
+            title="Klip",
+            subtitle="Opsiyonel: Yalnızca bu zaman aralığı indirilir (anahtar kareye hizalı).",
+        )
+        clip_row.add_suffix(self.clip_entry)
+        adv_group.add(clip_row)
+
+        # Bölümlere ayır: uzun miks/albüm videolarında bölüm başına ayrı dosya
+        self.split_chapters_switch = Gtk.Switch()
+        self.split_chapters_switch.set_valign(Gtk.Align.CENTER)
+        self.split_chapters_switch.set_active(False)
+        self.split_chapters_switch.add_css_class("ytdl-switch")
+        split_row = Adw.ActionRow(
+            title="Bölümlere ayır",
+            subtitle="Bölümlü videolar ayrıca bölüm başına dosyalara ayrılır (yeniden kodlama yok).",
+        )
+        split_row.add_suffix(self.split_chapters_switch)
+        split_row.set_activatable_widget(self.split_chapters_switch)
+        adv_group.add(split_row)
+
+        # ReplayGain: ses çıktılarına parça/albüm ses yüksekliği etiketleri (yeniden kodlama yok)
+        self.replaygain_switch = Gtk.Switch()
+        self.replaygain_switch.set_valign(Gtk.Align.CENTER)
+        self.replaygain_switch.set_active(False)
+        self.replaygain_switch.add_css_class("ytdl-switch")
+        replaygain_row = Adw.ActionRow(
+            title="ReplayGain",
+            subtitle="Ses çıktılarına parça (playlist'te albüm) ses yüksekliği etiketleri yazılır.",
+        )
+        if not loudness.available():
+            replaygain_row.set_subtitle("numpy bulunamadı.")
+            replaygain_row.set_sensitive(False)
+        replaygain_row.add_suffix(self.replaygain_switch)
+        replaygain_row.set_activatable_widget(self.replaygain_switch)
+        adv_group.add(replaygain_row)
+
+        # Paralel işlem: aynı anda finalize edilen öğe sayısı; her ffmpeg çekirdek / worker thread alır
+        self.pp_workers_spin = Gtk.SpinButton.new_with_range(0, max(1, default_pp_workers()) * 2, 1)
+        self.pp_workers_spin.set_numeric(True)
+        self.pp_workers_spin.set_value(0)
+        self.pp_workers_spin.set_valign(Gtk.Align.CENTER)
+        pp_workers_row = Adw.ActionRow(
+            title="Paralel işlem",
+            subtitle=f"Aynı anda dönüştürülen/etiketlenen öğe sayısı (0: otomatik, {default_pp_workers()} çekirdek).",
+        )
+        pp_workers_row.add_suffix(self.pp_workers_spin)
+        adv_group.add(pp_workers_row)
+
         # ---- ToastOverlay ----
         self.toast_overlay = Adw.ToastOverlay()
         self._persist_toast_timeout_s = 86400  # ~1 day; dismissed manually for persistent toasts
@@ -402,6 +630,9 @@ class MainWindow(Gtk.ApplicationWindow):
 
         self.set_status("info", "Hazır")
 
+        # Önceki oturumdan kalan yarım indirmeler (UI çizildikten sonra)
+        self._resume_offer_source_id = GLib.timeout_add_seconds(3, self._offer_resumable_jobs)
+
     # ---------- yt-dlp auto update ----------
     def _schedule_ytdlp_auto_update(self) -> None:
         """
@@ -696,6 +927,29 @@ class MainWindow(Gtk.ApplicationWindow):
         return s
 
     def _status_from_core(self, text: str):
+        # Downloader'ın seçtiği aktarım ayarları (parça/chunk/indirici) – progress tooltip'inde göster
+        if isinstance(text, str) and text.startswith("__TRANSFER__:"):
+            summary = text.split(":", 1)[1].strip()
+            self._transfer_summary = summary
+            self._phase_summary = ""
+            try:
+                self.progress.set_tooltip_text(f"Aktarım: {summary}" if summary else None)
+            except Exception:
+                pass
+            return
+
+        # İş bitince aşama başına süre / yazılan bayt – aktarım özetinin altına eklenir
+        if isinstance(text, str) and text.startswith("__PHASES__:"):
+            self._phase_summary = text.split(":", 1)[1].strip()
+            lines = [f"Aktarım: {self._transfer_summary}"] if self._transfer_summary else []
+            if self._phase_summary:
+                lines.append(f"Aşamalar: {self._phase_summary}")
+            try:
+                self.progress.set_tooltip_text("\n".join(lines) or None)
+            except Exception:
+                pass
+            return
+
         # Downloader'dan playlist öğe başlangıcı bilgisi (özel prefix)
         if isinstance(text, str) and text.startswith("__PL_ITEM__:"):
             try:
@@ -1397,6 +1651,18 @@ class MainWindow(Gtk.ApplicationWindow):
             self._net_down_toast = None
             self._net_down_toast_shown = False
 
+            # İndirme ağ kopması yüzünden durduysa: kısmi dosyalar korunuyor, işi otomatik sürdür.
+            job_id = getattr(self, "_interrupted_job_id", None)
+            if getattr(self, "_download_failed_due_to_net", False) and job_id and (not self._download_active()):
+                self._download_failed_due_to_net = False
+                self._net_was_down_during_download = False
+                self._dismiss_toast(getattr(self, "_net_cancel_toast", None))
+                self._net_cancel_toast = None
+                # Bağlantı bildirimi bazen erken gelir; kısa bir gecikmeyle yeniden başlat.
+                GLib.timeout_add_seconds(2, self._resume_job_timeout, job_id)
+                self.show_toast("info", "Bağlantı geri geldi, indirme sürdürülüyor")
+                return
+
             # Eğer indirme ağ kopması yüzünden iptal olduysa, bağlantı gelince kullanıcıya söyle
             if getattr(self, "_download_failed_due_to_net", False):
                 # Eski iptal toast'ı varsa kapatıp yenisini göster
@@ -1517,6 +1783,15 @@ class MainWindow(Gtk.ApplicationWindow):
         for s in names:
             self.format_model.append(s)
 
+        # Ek çıktı listesi taranan formatlarla aynı sırada (aynı ada sahip seçenekleri ayırt etmek için uzantı)
+        keys = list(self.available_format_keys) if len(self.available_format_keys) == len(names) else []
+        self._extra_output_keys = [None, *keys]
+        n_extra = self.extra_output_model.get_n_items()
+        self.extra_output_model.splice(
+            0, n_extra, ["Yok", *[f"{nm} ({output_ext(FORMAT_OPTIONS.get(k) or {})})" for nm, k in zip(names, keys)]]
+        )
+        self.extra_output_row.set_selected(0)
+
         if selected_index < 0 or selected_index >= len(names):
             selected_index = 0
 
@@ -1573,6 +1848,10 @@ class MainWindow(Gtk.ApplicationWindow):
             return ("OPUS", "badge-audio")
         if key == "audio_m4a":
             return ("M4A", "badge-audio")
+        if key == "audio_mp3":
+            return ("MP3", "badge-audio")
+        if key == "audio_flac":
+            return ("FLAC", "badge-audio")
 
         # Video-only container
         if key == "video_only_mkv_1080":
@@ -1983,6 +2262,108 @@ class MainWindow(Gtk.ApplicationWindow):
         chosen_audio = max(audio_only, key=lambda x: x[0])[1]
         return f"{chosen_video.get('format_id')}+{chosen_audio.get('format_id')}"
 
+    def _smallest_format(self, cands: list[dict], formats: list[dict]) -> dict:
+        """En küçük akış: tümünün bayt tahmini varsa boyuta, yoksa (birimler karışmasın) tümünde bitrate'e göre."""
+        sizes = [estimate_format_bytes(f, formats) for f in cands]
+        if all(size is not None for size in sizes):
+            return min(zip(sizes, cands), key=lambda sc: sc[0])[1]
+        return min(cands, key=lambda f: float(f.get("tbr") or f.get("abr") or f.get("vbr") or float("inf")))
+
+    def _build_data_saver_override(self, formats: list[dict], format_key: str) -> str | None:
+        """Veri tasarrufu: seçilen formatın kalite hedefini karşılayan en küçük akış(lar)ı seç.
+
+        - Video: hedef yükseklik ve kare hızında, codec fark etmeksizin (AV1/VP9/H.264) en küçük video-only.
+        - Ses: abr >= _DATA_SAVER_MIN_ABR olan en küçük Opus (M4A formatında M4A) akışı.
+        Dönen ifade '<id>[+<id>]/<varsayılan>' biçimindedir; playlist'te bu id'ler olmayan öğede
+        varsayılan politikaya düşülür. Tasarruf mümkün değilse None.
+        """
+        opt = FORMAT_OPTIONS.get(format_key) or {}
+        kind = opt.get("kind")
+        default = self._format_overrides.get(format_key) or opt.get("format") or ""
+        if not formats or not default or kind in ("video_only_mp4", "audio_transcode"):
+            return None
+
+        def audio_pick(want_m4a: bool) -> dict | None:
+            cands = []
+            for f in formats:
+                if not isinstance(f, dict):
+                    continue
+                v = (f.get("vcodec") or "none").lower()
+                a = (f.get("acodec") or "none").lower()
+                if v != "none" or a == "none":
+                    continue
+                is_m4a = (f.get("ext") or "").lower() == "m4a"
+                if (want_m4a and not is_m4a) or ((not want_m4a) and a != "opus"):
+                    continue
+                cands.append(f)
+            if not cands:
+                return None
+            ok = [f for f in cands if float(f.get("abr") or f.get("tbr") or 0.0) >= _DATA_SAVER_MIN_ABR]
+            if ok:
+                return self._smallest_format(ok, formats)
+            return max(cands, key=lambda f: float(f.get("abr") or f.get("tbr") or 0.0))
+
+        def video_pick(target_h: int) -> dict | None:
+            cands = []
+            for f in formats:
+                if not isinstance(f, dict) or self._is_sr_upscaled(f):
+                    continue
+                v = (f.get("vcodec") or "none").lower()
+                a = (f.get("acodec") or "none").lower()
+                if v == "none" or a != "none":
+                    continue
+                if self._to_std_p(self._extract_height(f)) != target_h:
+                    continue
+                cands.append(f)
+            if not cands:
+                return None
+            # Kalite hedefi: yükseklik + o yükseklikteki en yüksek kare hızı
+            max_fps = max(float(f.get("fps") or 0.0) for f in cands)
+            cands = [f for f in cands if float(f.get("fps") or 0.0) >= max_fps - 1]
+            return self._smallest_format(cands, formats)
+
+        if kind in ("audio_opus", "audio_m4a"):
+            a = audio_pick(kind == "audio_m4a")
+            return f"{a.get('format_id')}/{default}" if a else None
+
+        target_h = int(opt.get("cap_p") or 0)
+        if not target_h:
+            target_h = 1080 if kind == "video_only_remux" else int((self.last_caps or {}).get("max_height") or 0)
+        v = video_pick(target_h) if target_h else None
+        if not v:
+            return None
+        if kind == "video_only_remux":
+            return f"{v.get('format_id')}/{default}"
+        a = audio_pick(False)
+        if not a:
+            return None
+        return f"{v.get('format_id')}+{a.get('format_id')}/{default}"
+
+    def _apply_data_saver(self, spec: dict) -> None:
+        """Veri tasarrufu açıksa spec'teki format ifadelerini en küçük akışlarla değiştir ve kazancı bildir."""
+        keys = [spec["format_key"], *(spec.get("extra_format_keys") or [])]
+        default_bytes = self._estimate_job_bytes(spec)
+        overrides = dict(spec.get("format_overrides") or {})
+        changed = False
+        for key in keys:
+            sel = self._build_data_saver_override(self._scan_formats, key)
+            if sel:
+                overrides[key] = sel
+                changed = True
+        if not changed:
+            return
+        spec["format_overrides"] = overrides
+        spec["format_override"] = overrides.get(spec["format_key"])
+        saver_bytes = self._estimate_job_bytes(spec)
+        if default_bytes and saver_bytes is not None and default_bytes > saver_bytes:
+            saved = default_bytes - saver_bytes
+            pct = 100.0 * saved / default_bytes
+            self.set_status(
+                "info",
+                f"Veri tasarrufu: ~{format_bytes(saved)} daha az (%{pct:.0f}; {format_bytes(default_bytes)} yerine {format_bytes(saver_bytes)})",
+                toast=True,
+            )
+
     def _available_keys_from_caps(self, caps: dict) -> list[str]:
         avail: list[str] = []
 
@@ -2008,6 +2389,9 @@ class MainWindow(Gtk.ApplicationWindow):
             avail.append("audio_opus")
         if has_m4a and "audio_m4a" in FORMAT_OPTIONS:
             avail.append("audio_m4a")
+        # Dönüştürmeli çıktılar (MP3/FLAC) herhangi bir ses akışından üretilebilir
+        if has_opus or has_m4a:
+            avail.extend(k for k in ("audio_mp3", "audio_flac") if k in FORMAT_OPTIONS)
 
         # Sadece video (1080p)
         if vp9_1080 and "video_only_mkv_1080" in FORMAT_OPTIONS:
@@ -2298,6 +2682,7 @@ class MainWindow(Gtk.ApplicationWindow):
                     formats, title = get_formats(u)
                 caps = self._detect_capabilities(formats)
                 self.last_caps = caps
+                self._scan_formats = list(formats or [])
                 self._format_overrides = {}
 
                 avail = self._available_keys_from_caps(caps)
@@ -2352,9 +2737,69 @@ class MainWindow(Gtk.ApplicationWindow):
             self._clear_progress_text()
 
             self.cancel_event.set()
+            # Duraklatılmış süreçler iptal sinyalini ancak devam edince işler.
+            if self.job_control is not None:
+                self.job_control.resume()
             self.cancel_button.set_sensitive(False)
+            self.pause_button.set_sensitive(False)
+            self.skip_item_button.set_sensitive(False)
             self.set_status("cancel", "İptal istendi, durduruluyor...", toast=True)
 
+    def on_pause_clicked(self, button):
+        ctl = self.job_control
+        if ctl is None:
+            return
+        if ctl.is_paused():
+            ctl.resume()
+            self._ignore_progress_updates = False
+            self.pause_button.set_child(self._button_content("Duraklat", "media-playback-pause-symbolic"))
+            self.set_status("download", "İndirme sürdürülüyor..." + self._playlist_suffix())
+        else:
+            ctl.pause()
+            self.pause_button.set_child(self._button_content("Devam", "media-playback-start-symbolic"))
+            self.set_status("info", "Duraklatıldı", toast=True)
+
+    def _reset_pause_button(self):
+        self.pause_button.set_sensitive(False)
+        self.pause_button.set_child(self._button_content("Duraklat", "media-playback-pause-symbolic"))
+        self.skip_item_button.set_visible(False)
+
+    def on_skip_item_clicked(self, button):
+        ctl = self.playlist_control
+        if ctl is None:
+            return
+        current = ctl.current()
+        if ctl.skip():
+            self.set_status("info", f"Öğe {current} atlanıyor...", toast=True)
+
+    def on_item_action_clicked(self, button, action: str):
+        ctl = self.playlist_control
+        if ctl is None:
+            return
+        index = int(self.item_spin.get_value())
+        if action == "skip":
+            ok, msg = ctl.skip(index), f"Öğe {index} atlanacak"
+        elif action == "prioritize":
+            ok, msg = ctl.prioritize(index), f"Öğe {index} sıranın başına alındı"
+        else:
+            ok, msg = ctl.retry(index), f"Öğe {index} yeniden sıraya alındı"
+        if not ok:
+            msg = f"Öğe {index} için bu işlem yapılamaz"
+        self.set_status("info", msg, toast=True)
+
+    def _offer_item_retry(self, spec: dict, failed: list[int]):
+        """Playlist bitti ama bazı öğeler başarısız/atlandı: yalnızca onları yeniden indirmeyi öner."""
+        retry_spec = dict(spec)
+        retry_spec["playlist_items"] = ",".join(str(i) for i in failed)
+        retry_spec["selected_total"] = len(failed)
+        self.show_toast_action(
+            f"{len(failed)} öğe indirilmedi (atlandı/başarısız)",
+            button_label="Yeniden Dene",
+            on_click=lambda: None if self._download_active() else self._start_download(retry_spec),
+            timeout_s=0,
+        )
+        return False
+
     # ---------- Download ----------
 
     def on_download_clicked(self, button):
@@ -2397,8 +2842,84 @@ class MainWindow(Gtk.ApplicationWindow):
                     selected_total = int(getattr(self, '_playlist_meta', {}).get('count') or 0)
                 except Exception:
                     selected_total = 0
-        self._pl_active = bool(playlist_mode)
-        self._pl_selected_total = int(selected_total) if int(selected_total) > 0 else 0
+        try:
+            clip = parse_clip_range(self.clip_entry.get_text())
+        except ValueError as e:
+            self.set_status("warn", str(e), toast=True)
+            return
+        extra_keys: list[str] = []
+        try:
+            extra = self._extra_output_keys[self.extra_output_row.get_selected()]
+        except Exception:
+            extra = None
+        if extra and extra != format_key:
+            extra_keys.append(extra)
+        overrides = getattr(self, "_format_overrides", {})
+        spec = {
+            "url": url,
+            "title": (self.current_title or "").strip(),
+            "output_dir": self.output_dir,
+            "format_key": format_key,
+            "format_override": overrides.get(format_key),
+            "extra_format_keys": extra_keys,
+            "format_overrides": {k: overrides[k] for k in [format_key, *extra_keys] if overrides.get(k)},
+            "playlist": bool(playlist_mode),
+            "playlist_items": (playlist_items_spec or None) if playlist_mode else None,
+            "selected_total": int(selected_total) if int(selected_total) > 0 else 0,
+            "external_downloader": "aria2c" if self.aria2_switch.get_active() else None,
+            "clip": list(clip) if clip else None,
+            "split_chapters": self.split_chapters_switch.get_active(),
+            "replaygain": self.replaygain_switch.get_active(),
+            "staging_dir": self.staging_entry.get_text().strip() or None,
+            "dedup": self.dedup_switch.get_active(),
+            "mirror_dirs": [d.strip() for d in self.mirror_entry.get_text().split(os.pathsep) if d.strip()] or None,
+            "verify": self.verify_switch.get_active(),
+            "pp_workers": int(self.pp_workers_spin.get_value()) or None,
+        }
+        if self.data_saver_switch.get_active():
+            self._apply_data_saver(spec)
+        spec["expected_bytes"] = self._estimate_job_bytes(spec)
+        self._start_download(spec)
+
+    def _estimate_job_bytes(self, spec: dict) -> int | None:
+        """Taranan formatların boyutlarından işin disk ihtiyacını tahmin et (bilinmiyorsa None).
+        Çok çıktılı işte çıktıların tahminleri toplanır (önbellekteki ortak akışlar için pay kalır)."""
+        overrides = spec.get("format_overrides") or {}
+        total = 0
+        for key in [spec.get("format_key") or "", *(spec.get("extra_format_keys") or [])]:
+            opt = FORMAT_OPTIONS.get(key) or {}
+            primary_override = spec.get("format_override") if key == spec.get("format_key") else None
+            selector = overrides.get(key) or primary_override or opt.get("format") or ""
+            try:
+                est = estimate_job_bytes(
+                    self._scan_formats,
+                    selector,
+                    opt.get("kind") or "",
+                    items=max(1, int(spec.get("selected_total") or 1)),
+                    clip_seconds=(spec["clip"][1] - spec["clip"][0]) if spec.get("clip") else None,
+                    output_kbps=opt.get("kbps_hint"),
+                )
+            except Exception:
+                est = None
+            if est is None:
+                return None
+            total += est
+        return total or None
+
+    def _start_download(self, spec: dict, *, job_id: str | None = None):
+        """İndirme işini başlat. job_id verilirse (sürdürme) aynı günlük kaydı ve arşiv kullanılır."""
+        if job_id is None:
+            job_id = journal_add(spec)
+        else:
+            journal_update(job_id, state="running")
+            # Sürdürme: kısmi dosyalar ve tamamlanmış öğeler zaten diskte; yalnızca kalan kısım istenir.
+            spec = {**spec, "expected_bytes": remaining_bytes({**spec, "job_id": job_id})}
+        self._active_job_id = job_id
+        self._interrupted_job_id = None
+
+        playlist_mode = bool(spec.get("playlist"))
+        self._pl_active = playlist_mode
+        self._pl_selected_total = int(spec.get("selected_total") or 0)
         self._pl_ord = 0
 
         self._set_last_download_path(None)
@@ -2410,8 +2931,14 @@ class MainWindow(Gtk.ApplicationWindow):
         self.progress.set_fraction(0.0)
         self.progress.set_text("%0")
         self.cancel_event = threading.Event()
+        self.job_control = JobControl()
+        self.playlist_control = PlaylistControl() if playlist_mode else None
+        playlist_control = self.playlist_control
 
         self.cancel_button.set_sensitive(True)
+        self.pause_button.set_sensitive(True)
+        self.skip_item_button.set_visible(playlist_mode)
+        self.skip_item_button.set_sensitive(playlist_mode)
         self.download_button.set_sensitive(False)
         self.cancel_button.add_css_class("ytdl-cancel-hot")
         self.scan_button.set_sensitive(False)
@@ -2419,21 +2946,53 @@ class MainWindow(Gtk.ApplicationWindow):
         self._set_progress(0.0)
         self.set_status("download", "İndirme başlatılıyor...")
 
+        # Ön doğrulama için taranan formatlar (yalnızca aynı URL taranmışsa; sürdürmede yeniden taranır).
+        # Playlist taraması tek öğenin formatlarını içerir; tüm playlist buna göre doğrulanmaz.
+        scanned_formats = (
+            list(self._scan_formats) if spec.get("url") == self.last_scanned_url and not playlist_mode else None
+        )
+
         def worker():
+            keep_job = False
             try:
-                out_path = download_video(
-                    url,
-                    self.output_dir,
-                    format_key,
+                overrides = dict(spec.get("format_overrides") or {})
+                if spec.get("format_override"):
+                    overrides.setdefault(spec["format_key"], spec["format_override"])
+                outputs = download_outputs(
+                    spec["url"],
+                    spec["output_dir"],
+                    [spec["format_key"], *(spec.get("extra_format_keys") or [])],
                     progress_cb=lambda p, sp=None, eta=None: GLib.idle_add(self._set_progress, p, sp, eta),
                     status_cb=lambda s: GLib.idle_add(self._status_from_core, s),
                     cancel_event=self.cancel_event,
-                    format_override=getattr(self, "_format_overrides", {}).get(format_key),
+                    format_overrides=overrides,
                     playlist=playlist_mode,
-                    playlist_items=(playlist_items_spec or None) if playlist_mode else None,
+                    playlist_items=spec.get("playlist_items") if playlist_mode else None,
+                    external_downloader=spec.get("external_downloader"),
+                    control=self.job_control,
+                    download_archive=job_archive_path(job_id),
+                    playlist_control=playlist_control,
+                    expected_bytes=spec.get("expected_bytes"),
+                    scanned_formats=scanned_formats,
+                    clip=tuple(spec["clip"]) if spec.get("clip") else None,
+                    split_chapters=bool(spec.get("split_chapters")),
+                    replaygain=bool(spec.get("replaygain")),
+                    staging_dir=spec.get("staging_dir"),
+                    dedup=bool(spec.get("dedup")),
+                    mirror_dirs=spec.get("mirror_dirs"),
+                    verify_cb=(lambda e: GLib.idle_add(self._on_verify_result, e, spec)) if spec.get("verify") else None,
+                    pp_workers=spec.get("pp_workers"),
                 )
+                out_path = next((p for p in outputs if p), None)
                 if out_path:
                     GLib.idle_add(self._set_last_download_path, out_path)
+                if playlist_control is not None and not self.cancel_event.is_set():
+                    failed = sorted(playlist_control.items_in_state(ITEM_FAILED) + playlist_control.items_in_state(ITEM_SKIPPED))
+                    if failed:
+                        GLib.idle_add(self._offer_item_retry, spec, failed)
+            except InsufficientSpace as e:
+                # İş hiç başlamadı: yer açılınca otomatik başlatmak üzere beklet.
+                GLib.idle_add(self._queue_for_space, spec, e)
             except Exception as e:
                 msg = str(e)
                 if "iptal edildi" in msg.lower():
@@ -2441,7 +3000,11 @@ class MainWindow(Gtk.ApplicationWindow):
                     GLib.idle_add(self.set_status, "cancel", "İptal edildi", True)
                 else:
                     # Ağ kopması / DNS vs. durumlarında "Worker hatası" gibi panikletici metni bastır.
-                    if self._is_network_error_message(msg):
+                    if isinstance(e, NetworkInterrupted) or self._is_network_error_message(msg):
+                        # Kısmi dosyalar korunuyor: bağlantı gelince iş otomatik sürdürülecek.
+                        keep_job = True
+                        journal_update(job_id, state="interrupted")
+                        self._interrupted_job_id = job_id
                         self._download_failed_due_to_net = True
                         self._net_was_down_during_download = True
                         # NetworkMonitor her zaman anında tetiklenmeyebiliyor; bu durumda da offline kabul ediyoruz.
@@ -2452,8 +3015,11 @@ class MainWindow(Gtk.ApplicationWindow):
                     else:
                         GLib.idle_add(self.set_status, "error", f"Worker hatası: {e}", True)
             finally:
+                if not keep_job:
+                    journal_remove(job_id)
                 GLib.idle_add(self._reset_playlist_download_state)
                 GLib.idle_add(self.cancel_button.set_sensitive, False)
+                GLib.idle_add(self._reset_pause_button)
                 GLib.idle_add(self.cancel_button.remove_css_class, "ytdl-cancel-hot")
                 GLib.idle_add(self.download_button.set_sensitive, True)
                 GLib.idle_add(self.scan_button.set_sensitive, True)
@@ -2461,8 +3027,186 @@ class MainWindow(Gtk.ApplicationWindow):
                 GLib.idle_add(self._clear_cancel_event)
 
         run_in_thread(worker)
+
+    def _queue_for_space(self, spec: dict, err: InsufficientSpace):
+        """Disk alanı yetmeyen işi beklet; yer açıldığında kendiliğinden başlat."""
+        self._space_wait_spec = spec
+        self.set_status("warn", str(err))
+        self._space_wait_toast = self.show_toast_action(
+            f"Yetersiz disk alanı ({format_bytes(err.needed)} gerekli). Yer açılınca indirme başlayacak.",
+            button_label="Vazgeç",
+            on_click=self._cancel_space_wait,
+            timeout_s=0,
+        )
+        if not self._space_wait_source_id:
+            self._space_wait_source_id = GLib.timeout_add_seconds(15, self._check_space_wait)
+        return False
+
+    def _check_space_wait(self) -> bool:
+        spec = self._space_wait_spec
+        if spec is None:
+            self._space_wait_source_id = 0
+            return False
+        if self._download_active():
+            return True
+        try:
+            check_free_space(spec["output_dir"], spec.get("expected_bytes"))
+        except InsufficientSpace:
+            return True
+        except Exception:
+            pass
+        self._space_wait_source_id = 0  # one-shot: bu callback False döndürerek kaynağı kapatır
+        self._cancel_space_wait()
+        self._start_download(spec)
+        return False
+
+    def _cancel_space_wait(self):
+        self._space_wait_spec = None
+        if self._space_wait_source_id:
+            GLib.source_remove(self._space_wait_source_id)
+            self._space_wait_source_id = 0
+        toast = self._space_wait_toast
+        self._space_wait_toast = None
+        if toast is not None:
+            try:
+                toast.dismiss()
+            except Exception:
+                pass
+
+    def _resume_job(self, job_id: str) -> bool:
+        """Günlükteki yarım işi (ağ kopması / önceki oturum) kaldığı yerden sürdür."""
+        if self._download_active():
+            return False
+        spec = journal_get(job_id)
+        if not spec:
+            return False
+        self._clear_result_toasts_for_new_action()
+        try:
+            if spec.get("output_dir"):
+                self.output_dir = str(spec["output_dir"])
+                self.folder_label.set_text(self.output_dir)
+        except Exception:
+            pass
+        self._start_download(spec, job_id=job_id)
+        return True
+
+    def _resume_job_timeout(self, job_id: str) -> bool:
+        self._resume_job(job_id)
+        return False  # one-shot
+
+    def _offer_resumable_jobs(self) -> bool:
+        """Açılışta: önceki oturumdan kalan yarım indirmeleri 'Sürdür' aksiyonuyla öner."""
+        self._resume_offer_source_id = 0
+        if self._download_active():
+            return False
+
+        def scan():
+            try:
+                jobs = find_resumable_jobs()
+            except Exception:
+                jobs = []
+            if jobs:
+                GLib.idle_add(self._show_resume_offer, jobs[0], len(jobs))
+            try:
+                bad = verify.pending_requeue()
+            except Exception:
+                bad = []
+            if bad:
+                GLib.idle_add(self._restore_verify_requeue, bad)
+
+        run_in_thread(scan)
+        return False  # one-shot
+
+    def _show_resume_offer(self, job: dict, count: int):
+        title = (job.get("title") or "").strip() or job.get("url") or ""
+        if len(title) > 48:
+            title = title[:47] + "…"
+        extra = f" (+{count - 1})" if count > 1 else ""
+        job_id = str(job.get("job_id") or "")
+        self.show_toast_action(
+            f"Yarım kalan indirme: {title}{extra}",
+            button_label="Sürdür",
+            on_click=lambda: self._resume_job(job_id),
+            timeout_s=0,
+        )
+        return False
+
+    # ---------- Verification ----------
+
+    def _on_verify_result(self, entry: dict, spec: dict | None = None):
+        """Arka plan doğrulama sonucu: bozuk çıktıyı sil ve yeniden indirme kuyruğuna al."""
+        if entry.get("state") != verify.BAD:
+            return False
+        name = os.path.basename(str(entry.get("path") or ""))
+        if int(entry.get("attempts") or 0) > verify.REQUEUE_LIMIT:
+            self.show_toast("error", f"Bozuk çıktı (yeniden deneme sınırı aşıldı): {name} — {entry.get('reason')}", timeout_s=8)
+            return False
+        self.show_toast("warn", f"Bozuk çıktı yeniden indirilecek: {name} — {entry.get('reason')}", timeout_s=6)
+        self._requeue_output(entry, spec)
+        return False
+
+    def _requeue_output(self, entry: dict, spec: dict | None) -> None:
+        key = str(entry.get("format_key") or "")
+        if key not in FORMAT_OPTIONS or not entry.get("url"):
+            return
+        verify.discard(entry)
+        verify.mark_queued(str(entry.get("path")))
+        base = dict(spec or {})
+        override = (base.get("format_overrides") or {}).get(key)
+        if override is None and base.get("format_key") == key:
+            override = base.get("format_override")
+        index = entry.get("playlist_index")
+        playlist_mode = bool(base.get("playlist")) if spec is not None else bool(index)
+        base.update({
+            "url": entry["url"],
+            "output_dir": entry.get("output_dir") or base.get("output_dir") or self.output_dir,
+            "format_key": key,
+            "format_override": override,
+            "extra_format_keys": [],
+            "format_overrides": {key: override} if override else {},
+            "playlist": playlist_mode,
+            "expected_bytes": None,
+            "verify": True,
+        })
+        if playlist_mode and index:
+            # Aynı iş/biçimdeki bozuk öğeler tek yeniden indirmede toplanır.
+            for queued in self._verify_requeue:
+                if queued.get("playlist") and all(queued.get(k) == base[k] for k in ("url", "output_dir", "format_key")):
+                    items = [i for i in str(queued.get("playlist_items") or "").split(",") if i]
+                    if str(index) not in items:
+                        queued["playlist_items"] = ",".join([*items, str(index)])
+                        queued["selected_total"] = len(items) + 1
+                    return
+            base["playlist_items"] = str(index)
+            base["selected_total"] = 1
+        self._verify_requeue.append(base)
+        if not self._verify_requeue_source_id:
+            self._verify_requeue_source_id = GLib.timeout_add_seconds(5, self._run_verify_requeue)
+
+    def _run_verify_requeue(self) -> bool:
+        if not self._verify_requeue:
+            self._verify_requeue_source_id = 0
+            return False
+        if self._download_active() or self._space_wait_spec is not None:
+            return True
+        self._start_download(self._verify_requeue.pop(0))
+        return True
+
+    def _restore_verify_requeue(self, entries: list[dict]):
+        """Açılışta: önceki oturumda bozuk çıkan ya da yeniden indirmesi bitmeyen çıktılar."""
+        for entry in entries:
+            path = str(entry.get("path") or "")
+            if entry.get("state") == verify.QUEUED and os.path.isfile(path):
+                # Yeniden indirme bitmiş ama sonucu kaydedilmemiş olabilir: önce yeniden doğrula.
+                verify.submit(path, entry, lambda e: GLib.idle_add(self._on_verify_result, e))
+            else:
+                self._requeue_output(entry, None)
+        return False
+
     def _clear_cancel_event(self):
         self.cancel_event = None
+        self.job_control = None
+        self.playlist_control = None
 
 
 class App(Gtk.Application):
@@ -0,0 +1,192 @@
+import hashlib
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+from .staging import copy_file, move_file
+
+# İçerik adresli çıktı deposu:
+# - Bitmiş çıktılar '<kök>/.ytdl-objects/<ilk 2>/<sha256>' nesnesine hardlink'lenir. Aynı içerik
+#   (aynı video birden çok playlist klasöründe, ya da aynı iş birden çok kökte) diskte bir kez durur;
+#   klasörlerdeki dosyalar nesnenin hardlink'leridir.
+# - Özet, baytlar hedefe kopyalanırken aynı geçişte alınır (staging.copy_file); hedef yeniden okunmaz.
+#   Özeti bilinen içerik (ör. yansı kökleri) depoda zaten varsa hedefe hiç kopyalanmaz.
+# - Ara dizinsiz işte baytlar bizden geçmez (yt-dlp/ffmpeg yazar): çıktı bittiği anda, sayfa önbelleğinde
+#   sıcakken bir kez okunur (intern).
+# - Hardlink'li dosyalar yerinde düzenlenmez (mp4tags/mkvtags st_nlink kontrolü); yeni dosya yazılıp
+#   rename edildiğinde bağ kendiliğinden kopar.
+# - Yalnızca depoda kalan (bağlantı sayısı 1) nesneler prune ile silinir.
+# Hardlink desteklemeyen dosya sistemlerinde (FAT/exFAT, bazı ağ paylaşımları) depo devre dışı kalır.
+
+STORE_NAME = ".ytdl-objects"
+_CHUNK = 4 * 1024 * 1024
+_PRUNE_INTERVAL_S = 24 * 3600
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(_CHUNK)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _link_over(src: Path, dst: Path) -> None:
+    """dst'yi src'ye hardlink yap (varsa atomik olarak değiştirilir)."""
+    tmp = dst.with_name(f".{dst.name}.__link_tmp__")
+    try:
+        tmp.unlink(missing_ok=True)
+        os.link(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        try:
+            tmp.unlink(missing_ok=True)
+        except Exception:
+            pass
+        raise
+
+
+class ContentStore:
+    """Bir çıktı kökünün nesne deposu (kök ile aynı dosya sisteminde)."""
+
+    def __init__(self, root: str):
+        self.root = Path(root).expanduser().resolve()
+        self.dir = self.root / STORE_NAME
+
+    def object_path(self, digest: str) -> Path:
+        return self.dir / digest[:2] / digest
+
+    def lookup(self, digest: str, size: int) -> Optional[Path]:
+        obj = self.object_path(digest)
+        try:
+            return obj if obj.stat().st_size == size else None
+        except OSError:
+            return None
+
+    def adopt(self, path: str, digest: str) -> bool:
+        """
+        Kök altındaki bitmiş dosyayı depoya al. Aynı içerik zaten varsa dosya nesnenin hardlink'i olur
+        (kopyası serbest kalır) ve True döner; yoksa dosya yeni nesne olarak bağlanır.
+        """
+        p = Path(path)
+        size = p.stat().st_size
+        obj = self.lookup(digest, size)
+        if obj is not None:
+            if os.path.samefile(obj, p):
+                return False
+            _link_over(obj, p)
+            return True
+        obj = self.object_path(digest)
+        obj.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(p, obj)
+        except FileExistsError:
+            pass
+        return False
+
+    def place(self, src: str, dst: str, *, move: bool, digest: Optional[str] = None) -> str:
+        """
+        src'yi dst olarak yerleştir (move: taşı, değilse kopyala) ve depoya bağla; özeti döndürür.
+        digest biliniyorsa ve içerik depoda varsa dst nesnenin hardlink'i olur, veri yazılmaz.
+        Bilinmiyorsa özet kopya sırasında alınır; aynı dosya sisteminde taşımada (rename) kopya
+        olmadığından dosya bir kez okunur.
+        """
+        d = Path(dst)
+        if digest is not None:
+            obj = self.lookup(digest, os.stat(src).st_size)
+            if obj is not None:
+                if not (d.exists() and os.path.samefile(obj, d)):
+                    _link_over(obj, d)
+                if move:
+                    os.remove(src)
+                return digest
+            (move_file if move else copy_file)(src, dst)
+        else:
+            h = hashlib.sha256()
+            if move:
+                copied = move_file(src, dst, hasher=h)
+            else:
+                copy_file(src, dst, hasher=h)
+                copied = True
+            digest = h.hexdigest() if copied else file_digest(dst)
+        # Aynı içerik depoda varsa yeni yazılan kopya nesnenin hardlink'iyle değiştirilir.
+        self.adopt(dst, digest)
+        return digest
+
+    def intern(self, path: str) -> Optional[str]:
+        """adopt + özet: zaten bağlı (st_nlink > 1) dosyalar yeniden okunmaz (None döner)."""
+        if os.stat(path).st_nlink > 1:
+            return None
+        digest = file_digest(path)
+        self.adopt(path, digest)
+        return digest
+
+    def prune(self, *, force: bool = False) -> int:
+        """Yalnızca depoda kalan nesneleri sil (günde en fazla bir kez). Silinen nesne sayısı."""
+        stamp = self.dir / ".last_prune"
+        try:
+            if not force and time.time() - stamp.stat().st_mtime < _PRUNE_INTERVAL_S:
+                return 0
+        except OSError:
+            pass
+        removed = 0
+        try:
+            buckets = list(self.dir.iterdir())
+        except OSError:
+            return 0
+        for bucket in buckets:
+            if not bucket.is_dir():
+                continue
+            for obj in bucket.iterdir():
+                try:
+                    if obj.stat().st_nlink == 1:
+                        obj.unlink()
+                        removed += 1
+                except OSError:
+                    pass
+        try:
+            stamp.touch()
+        except OSError:
+            pass
+        return removed
+
+
+def supported(root: str) -> bool:
+    """Kökte hardlink oluşturulabiliyor mu (deneme dosyasıyla)."""
+    d = Path(root).expanduser() / STORE_NAME
+    try:
+        d.mkdir(parents=True, exist_ok=True)
+        probe = d / ".probe"
+        probe.write_bytes(b"")
+        link = d / ".probe.link"
+        link.unlink(missing_ok=True)
+        os.link(probe, link)
+        link.unlink()
+        probe.unlink()
+        return True
+    except OSError:
+        return False
+
+
+def link_or_copy(src: str, dst: str, *, store: Optional[ContentStore] = None, digest: Optional[str] = None) -> None:
+    """
+    src'yi dst'de de göster: aynı dosya sisteminde hardlink; değilse store'lu (dst kökünün deposu)
+    yerleştirme, o da yoksa tek kopya. digest: src'nin bilinen özeti (varsa src yeniden okunmaz).
+    """
+    d = Path(dst)
+    d.parent.mkdir(parents=True, exist_ok=True)
+    if d.exists() and os.path.samefile(src, d):
+        return
+    try:
+        _link_over(Path(src), d)
+        return
+    except OSError:
+        pass
+    if store is not None:
+        store.place(src, dst, move=False, digest=digest)
+    else:
+        copy_file(src, dst)
@@ -1,23 +1,51 @@
 import os
 import re
+import sys
+import glob
 import shutil
 import signal
 import select
 import json
 import hashlib
 import threading
+import queue
 import urllib.request
 import urllib.error
 import subprocess
+import tempfile
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Callable, Optional
 
-from .utils import parse_progress
+from .utils import format_timestamp, parse_progress, get_data_dir
+from . import contentstore, imageinfo, loudness, mkvtags, mp4tags, oggopus, staging, streamcache, verify
+from .formats import UnsupportedSelector, expand_playlist_items, get_formats, match_selector, probe_playlist, resolve_streams
+from .storage import InsufficientSpace, check_free_space, format_bytes, preallocate, supports_fallocate
+from .jobs import ITEM_DONE, ITEM_FAILED, ITEM_SKIPPED, JobControl, PlaylistControl
+from .transfer import (
+    ThroughputProbe,
+    adapt_transfer_settings,
+    choose_transfer_settings,
+    describe_transfer,
+    record_throughput,
+    swap_transfer_args,
+    transfer_args,
+)
 
 _SPEED_RE = re.compile(r"\bat\s+([0-9]+(?:[\.,][0-9]+)?)\s*([KMGTP]?i?B)/s\b", re.IGNORECASE)
 _ETA_RE = re.compile(r"\bETA\s+([0-9:]+|Unknown)\b", re.IGNORECASE)
 _ANSI_RE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+_ARIA2_SPEED_RE = re.compile(r"\bDL:([0-9]+(?:\.[0-9]+)?)([KMGTP]?i?B)\b")
+_ARIA2_ETA_RE = re.compile(r"\bETA:((?:\d+h)?(?:\d+m)?(?:\d+s)?)\]")
+# Duraklatma yedek yolunda yt-dlp'nin temiz durdurulduğunu belirten dönüş kodu (EX_TEMPFAIL)
+_STOPPED_RC = 75
+_TAG_LINE_RE = re.compile(r"^__YTDL_([A-Z]+)__:(.*)$")
+_DEST_RE = re.compile(r'^\[\w+\] (?:.*?Destination: (.+)|Merging formats into "(.+)")$')
+_FRAG_RE = re.compile(r"\(frag (\d+)/")
+# '[download]  12.3% of ~ 45.67MiB at ...' => toplam boyut (ön ayırma için)
+_TOTAL_SIZE_RE = re.compile(r"^\[download\]\s+[\d.,]+% of\s+~?\s*([\d.]+)\s*([KMGT]?i?B)\b")
+_SIZE_UNITS = {"B": 1, "KiB": 1024, "MiB": 1024 ** 2, "GiB": 1024 ** 3, "TiB": 1024 ** 4, "KB": 1000, "MB": 1000 ** 2, "GB": 1000 ** 3, "TB": 1000 ** 4}
 _PL_ITEM_RE = re.compile(r"Downloading\s+(?:item|video)\s+(\d+)\s*(?:of\s+|/)\s*(\d+)", re.IGNORECASE)
 
 
@@ -34,7 +62,7 @@ def _parse_speed_eta(line: str) -> tuple[Optional[float], Optional[str]]:
     speed_mbps: Optional[float] = None
     eta: Optional[str] = None
 
-    m = _SPEED_RE.search(line)
+    m = _SPEED_RE.search(line) or _ARIA2_SPEED_RE.search(line)
     if m:
         num = m.group(1).replace(",", ".")
         try:
@@ -42,57 +70,100 @@ def _parse_speed_eta(line: str) -> tuple[Optional[float], Optional[str]]:
         except Exception:
             speed_mbps = None
 
-    m = _ETA_RE.search(line)
-    if m:
+    m = _ETA_RE.search(line) or _ARIA2_ETA_RE.search(line)
+    if m and m.group(1):
         eta = m.group(1)
 
     return speed_mbps, eta
 
 
-def _cleanup_cancel_artifacts(out_dir: Path, started_ts: float, *, recursive: bool = False) -> None:
+class _ArtifactManifest:
     """
-    İptal edilen işten kalan geçici/artık dosyaları temizle.
-    Yalnızca bu iş başladıktan sonra (mtime) güncellenen dosyaları hedefler.
+    İşin oluşturduğu ara dosyaların yolları; iptal/ağ hatası temizliği yalnızca bunlara dokunur.
+    - yt-dlp'nin 'Destination' / 'Merging formats into' satırlarından hedef yollar öğrenilir; her hedef
+      için bilinen geçici adlar (.part, .ytdl, .aria2, -FragN, .temp.<ext>, bizim __*_tmp__ dosyalarımız,
+      kapak görselleri) türetilir. Klasör taranmaz; başka işlerin dosyaları silinmez.
+    - Tamamlanmış hedefler (indirilmiş akışlar/çıktılar) silinmez; sürdürme ve önbellek için kalır.
+    - Bitmiş çıktılar (finalize sonrası son hali, bölüm dosyaları dahil) output ile kaydedilir; ara
+      dizin ve içerik deposu klasör taramak yerine bu listeyi kullanır.
     """
-    patterns = [
-        "*.part", "*.part.*", "*.part-*", "*.part*",
-        "*.ytdl", "*.aria2",
-        "*.__cover_tmp__.m4a",
-    ]
-
-    for pat in patterns:
-        it = out_dir.rglob(pat) if recursive else out_dir.glob(pat)
-        for p in it:
-            try:
-                if not p.is_file():
-                    continue
-                if p.stat().st_mtime < (started_ts - 2):
-                    continue
-                p.unlink(missing_ok=True)
-            except Exception:
-                pass
-
-    # yt-dlp --write-thumbnail artefaktları (kapak dosyaları) – iptal olunca kalmasın.
-    # Güvenlik: yalnızca bu iş başladıktan sonra güncellenmiş ve adında [..] olan thumbnail'ları sil.
-    thumb_exts = {".jpg", ".jpeg", ".png", ".webp"}
-    try:
-        it2 = out_dir.rglob('*') if recursive else out_dir.iterdir()
-        for p in it2:
-            if not p.is_file():
-                continue
-            if p.suffix.lower() not in thumb_exts:
-                continue
-            name = p.name
-            if "[" not in name or "]" not in name:
-                continue
-            if p.stat().st_mtime < (started_ts - 2):
-                continue
-            p.unlink(missing_ok=True)
-    except Exception:
-        pass
-
-
 
+    # Parçalı indirmede eklenip silinmemiş parçalar son görülen parça numarasının çevresindedir.
+    _FRAG_WINDOW = 64
+    _TMP_EXTS = (".m4a", ".opus", ".mp3", ".flac", ".mkv", ".mp4", ".webm")
+    _IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".webp")
+
+    def __init__(self, base: Path, on_output: Optional[Callable[[str], None]] = None):
+        self._base = base
+        self._lock = threading.Lock()
+        self._paths: list[Path] = []
+        self._frags: dict[Path, int] = {}
+        self._outputs: list[str] = []
+        self._on_output = on_output
+
+    def output(self, path: Optional[str]) -> None:
+        """Bitmiş çıktı (üzerine başka yazma yapılmayacak); on_output hemen çağrılır."""
+        if not path:
+            return
+        with self._lock:
+            if path in self._outputs:
+                return
+            self._outputs.append(path)
+        if self._on_output is not None:
+            self._on_output(path)
+
+    @property
+    def outputs(self) -> list[str]:
+        with self._lock:
+            return list(self._outputs)
+
+    def destination(self, path: str) -> None:
+        p = Path(path.strip().strip('"'))
+        if not p.is_absolute():
+            p = self._base / p
+        with self._lock:
+            if p in self._frags:
+                self._paths.remove(p)
+            self._paths.append(p)
+            self._frags.setdefault(p, 0)
+
+    def fragment(self, index: int) -> None:
+        """Son hedefin indirilen parça numarası ('(frag N/M)')."""
+        with self._lock:
+            if self._paths:
+                p = self._paths[-1]
+                self._frags[p] = max(self._frags[p], index)
+
+    def mark(self) -> int:
+        with self._lock:
+            return len(self._paths)
+
+    def _leftovers(self, p: Path, frag: int) -> list[Path]:
+        name, stem = p.name, p.stem
+        out = [p.with_name(name + x) for x in (".part", ".ytdl", ".aria2", ".part.aria2", ".part.frag.urls")]
+        out.append(p.with_name(f"{stem}.temp{p.suffix}"))
+        out.append(p.with_name(stem + ".__cover_tmp__.m4a"))
+        out.append(p.with_name(stem + ".__remux_tmp__.opus"))
+        out += [p.with_name(stem + ".__tags_tmp__" + ext) for ext in self._TMP_EXTS]
+        out += [p.with_name(stem + ext) for ext in self._IMAGE_EXTS]
+        if frag or p.with_name(name + ".part-Frag1").exists():
+            for i in range(max(1, frag - self._FRAG_WINDOW), frag + self._FRAG_WINDOW + 1):
+                out.append(p.with_name(f"{name}.part-Frag{i}"))
+                out.append(p.with_name(f"{name}.part-Frag{i}.part"))
+        return out
+
+    def cleanup(self, since: int = 0) -> None:
+        """since (mark()) sonrasında öğrenilen hedeflerin artıklarını sil."""
+        with self._lock:
+            targets = [(p, self._frags.get(p, 0)) for p in self._paths[since:]]
+        for p, frag in targets:
+            for cand in self._leftovers(p, frag):
+                try:
+                    cand.unlink()
+                except FileNotFoundError:
+                    pass
+                except Exception:
+                    pass
 
 
 # Hedefler:
@@ -145,6 +216,22 @@ FORMAT_OPTIONS = {
         "format": "bestaudio[vcodec=none][ext=m4a]",
     },
 
+    # Eski oynatıcılar için dönüştürmeli ses: en iyi kaynak (Opus öncelikli) -> MP3 (V0) / FLAC
+    "audio_mp3": {
+        "name": "Ses (MP3)",
+        "kind": "audio_transcode",
+        "format": "bestaudio[vcodec=none][acodec=opus]/bestaudio[vcodec=none]",
+        "codec": "mp3",
+        "kbps_hint": 260,
+    },
+    "audio_flac": {
+        "name": "Ses (FLAC)",
+        "kind": "audio_transcode",
+        "format": "bestaudio[vcodec=none][acodec=opus]/bestaudio[vcodec=none]",
+        "codec": "flac",
+        "kbps_hint": 900,
+    },
+
     # Sadece video: 1080p
     "video_only_mkv_1080": {
         "name": "Sadece Video (1080p)",
@@ -194,10 +281,27 @@ def _is_network_error_line(s: str) -> bool:
     return any(n in s for n in needles)
 
 
-def _cleanup_on_network_failure(code: int, last_line: str, out_dir: Path, started_ts: float, *, recursive: bool = False) -> None:
-    # Kullanıcı iptali (130) zaten ayrı ele alınıyor; burada ağ kopmasıyla patlayan yarım dosyaları temizliyoruz.
+class NetworkInterrupted(RuntimeError):
+    """İndirme ağ kopması yüzünden durdu; resume_policy='keep' ise kısmi dosyalar diskte kalır."""
+
+
+def _raise_download_failure(
+    code: int,
+    last_line: str,
+    manifest: _ArtifactManifest,
+    *,
+    resume_policy: str = "keep",
+) -> None:
+    """
+    yt-dlp hata koduyla bitti: ağ kopmasıysa NetworkInterrupted, değilse RuntimeError fırlat.
+    resume_policy="keep": .part/.ytdl korunur (bağlantı gelince kaldığı yerden sürdürülür).
+    resume_policy="cleanup": eski davranış, yarım dosyalar (manifest'tekiler) silinir.
+    """
     if code and code != 130 and _is_network_error_line(last_line or ""):
-        _cleanup_cancel_artifacts(out_dir, started_ts, recursive=recursive)
+        if resume_policy != "keep":
+            manifest.cleanup()
+        raise NetworkInterrupted(last_line or "İnternet bağlantısı kesildi")
+    raise RuntimeError(last_line or "İndirme hatası")
 
 
 # ---------------------------
@@ -208,10 +312,7 @@ def _cleanup_on_network_failure(code: int, last_line: str, out_dir: Path, starte
 
 def get_tools_dir() -> str:
     """Kullanıcı veri alanında (Flatpak'te ~/.var/app/.../data) araç dizinini döndürür."""
-    data_home = os.environ.get("XDG_DATA_HOME")
-    if not data_home:
-        data_home = os.path.join(os.path.expanduser("~"), ".local", "share")
-    d = os.path.join(data_home, "youtube-downloader", "tools")
+    d = os.path.join(get_data_dir(), "tools")
     os.makedirs(d, exist_ok=True)
     return d
 
@@ -409,10 +510,16 @@ def _run_cancelable_process(
 ) -> tuple[int, str]:
     """Run a subprocess with periodic cancellation checks.
     Returns (returncode, stderr_text). If cancelled, returns (130, 'cancelled').
+    cancel_event bir JobControl taşıyorsa (cancel_event.control) süreç duraklat/devam için kaydedilir.
     """
     def cancel_requested() -> bool:
         return cancel_event is not None and getattr(cancel_event, "is_set", lambda: False)()
 
+    control = getattr(cancel_event, "control", None)
+    threads = getattr(cancel_event, "threads", None)
+    if threads and cmd and cmd[0] == "ffmpeg":
+        cmd = with_ffmpeg_threads(cmd, threads)
+
     proc = subprocess.Popen(
         cmd,
         stdout=subprocess.PIPE,
@@ -420,6 +527,8 @@ def _run_cancelable_process(
         text=True,
         start_new_session=True,
     )
+    if control is not None:
+        control.register(proc.pid)
 
     try:
         while True:
@@ -431,6 +540,8 @@ def _run_cancelable_process(
                         proc.terminate()
                     except Exception:
                         pass
+                if control is not None:
+                    control.release_group(proc.pid)
                 try:
                     proc.wait(timeout=2)
                 except Exception:
@@ -451,6 +562,8 @@ def _run_cancelable_process(
                 # keep looping
                 continue
     finally:
+        if control is not None:
+            control.unregister(proc.pid)
         if timeout_s is not None:
             # best-effort global timeout (rarely used)
             pass
@@ -462,137 +575,67 @@ def _extract_video_id_from_name(name: str) -> Optional[str]:
     return m.group(1) if m else None
 
 
-def _list_cover_images(downloaded_media_path: str) -> list[str]:
-    """yt-dlp'nin yazdığı thumbnail dosyalarını topla (write-all-thumbnails destekler)."""
-    p = Path(downloaded_media_path)
-    d = p.parent
-    exts = {".jpg", ".jpeg", ".png", ".webp"}
-
-    vid = _extract_video_id_from_name(p.name)
-    stem = p.stem
-
-    candidates: list[str] = []
-
+def _cover_image(media_path: str, *, cancel_event=None) -> Optional[str]:
+    """
+    yt-dlp'nin --write-thumbnail ile (kendi ağ ayarlarıyla: proxy, çerez, kaynak adres) indirdiği tek
+    kapak: '<ad>.jpg' / '.png'. WebP ise tek ffmpeg ile JPEG'e çevrilir.
+    """
+    p = Path(media_path)
+    for ext in (".jpg", ".jpeg", ".png"):
+        cand = p.with_name(p.stem + ext)
+        if cand.is_file():
+            return str(cand)
+    src = p.with_name(p.stem + ".webp")
+    if not src.is_file():
+        return None
+    dst = p.with_name(p.stem + ".jpg")
+    rc, _err = _run_cancelable_process(
+        ["ffmpeg", "-v", "error", "-y", "-i", str(src), "-frames:v", "1", str(dst)],
+        cancel_event=cancel_event,
+    )
     try:
-        for f in d.iterdir():
-            if not f.is_file():
-                continue
-            if f.suffix.lower() not in exts:
-                continue
-            n = f.name
-            if vid and f"[{vid}]" in n:
-                candidates.append(str(f))
-                continue
-            # Fallback: aynı stem (örn. foo [id].jpg veya foo [id].1.jpg)
-            if n.startswith(stem) or n.startswith(stem + "."):
-                candidates.append(str(f))
+        src.unlink(missing_ok=True)
     except Exception:
         pass
-
-    # Deterministik sıralama
-    candidates = sorted(set(candidates))
-    return candidates
-
-
-def _ffprobe_image_area(path: str) -> Optional[int]:
-    ffprobe = shutil.which("ffprobe")
-    if not ffprobe:
-        return None
+    if rc == 0 and dst.exists():
+        return str(dst)
     try:
-        proc = subprocess.run(
-            [ffprobe, "-v", "error", "-select_streams", "v:0", "-show_entries", "stream=width,height", "-of", "csv=p=0:s=x", path],
-            check=False,
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
-        if proc.returncode != 0:
-            return None
-        out = (proc.stdout or "").strip()
-        if "x" not in out:
-            return None
-        w_s, h_s = out.split("x", 1)
-        w = int(w_s.strip())
-        h = int(h_s.strip())
-        if w > 0 and h > 0:
-            return w * h
+        dst.unlink(missing_ok=True)
     except Exception:
-        return None
+        pass
     return None
 
 
-def _pick_best_cover_image(candidates: list[str]) -> Optional[str]:
-    """En yüksek çözünürlüklü kapağı seçmeye çalış; olmazsa dosya boyutuna göre seç."""
-    if not candidates:
-        return None
-
-    best = None
-    best_metric = -1
-
-    for c in candidates:
-        metric = _ffprobe_image_area(c)
-        if metric is None:
-            try:
-                metric = int(os.path.getsize(c))
-            except Exception:
-                metric = 0
-        # tie-break: path name
-        if metric > best_metric or (metric == best_metric and best and c < best):
-            best_metric = metric
-            best = c
-
-    return best
-
-
-def _find_cover_image(downloaded_media_path: str) -> Optional[str]:
-    """En iyi (maksimum çözünürlüklü) thumbnail dosyasını bul."""
-    candidates = _list_cover_images(downloaded_media_path)
-    return _pick_best_cover_image(candidates)
-
-
-
-def _cleanup_any_images_in_dir(dir_path: str, *, recursive: bool = False) -> None:
-    """Belirtilen klasördeki tüm thumbnail/kapak görsellerini sil (playlist klasörü için)."""
-    exts = {".jpg", ".jpeg", ".png", ".webp"}
-    root = Path(dir_path)
-    try:
-        it = root.rglob("*") if recursive else root.iterdir()
-        for f in it:
-            try:
-                if f.is_file() and f.suffix.lower() in exts:
-                    f.unlink(missing_ok=True)
-            except Exception:
-                pass
-    except Exception:
-        pass
-
-def _cleanup_cover_images(downloaded_media_path: str) -> None:
-    """Bir medya dosyasına ait tüm thumbnail dosyalarını sil (başarılı postprocess sonrası)."""
-    for c in _list_cover_images(downloaded_media_path):
+def _remove_cover(cover: Optional[str]) -> None:
+    """Gömülen kapak dosyasını sil (kullanıcı isteği: çıktı klasöründe thumbnail kalmasın)."""
+    if cover:
         try:
-            Path(c).unlink(missing_ok=True)
+            Path(cover).unlink(missing_ok=True)
         except Exception:
             pass
 
 
-def _ffmpeg_attach_cover_to_m4a(input_m4a: str, cover_img: str, *, cancel_event=None) -> None:
-    """Attach cover art to an .m4a without re-encoding audio (remux only)."""
+def _ffmpeg_attach_cover_to_m4a(
+    input_m4a: str,
+    cover_img: Optional[str],
+    *,
+    tags: Optional[dict[str, str]] = None,
+    cancel_event=None,
+) -> None:
+    """Attach cover art and metadata to an .m4a in one remux pass (no re-encode).
+    mp4tags yerinde yazamadığında kullanılan yedek yol."""
     _require_ffmpeg()
     src = Path(input_m4a)
     tmp = src.with_name(src.stem + ".__cover_tmp__.m4a")
 
-    cmd = [
-        "ffmpeg",
-        "-v", "error",
-        "-y",
-        "-i", str(src),
-        "-i", str(cover_img),
-        "-map", "0",
-        "-map", "1",
-        "-c", "copy",
-        "-disposition:v:0", "attached_pic",
-        str(tmp),
-    ]
+    cmd = ["ffmpeg", "-v", "error", "-y", "-i", str(src)]
+    if cover_img:
+        cmd += ["-i", str(cover_img), "-map", "0", "-map", "1", "-c", "copy", "-disposition:v:0", "attached_pic"]
+    else:
+        cmd += ["-map", "0", "-c", "copy"]
+    for k, v in (tags or {}).items():
+        cmd += ["-metadata", f"{k}={v}"]
+    cmd.append(str(tmp))
     rc, err = _run_cancelable_process(cmd, cancel_event=cancel_event)
     if rc == 130:
         try:
@@ -632,10 +675,18 @@ def _run_ytdlp(
     progress_cb: Callable[[float, Optional[float], Optional[str]], None],
     status_cb: Callable[[str], None],
     cancel_event=None,
+    on_filepath: Optional[Callable[[str], None]] = None,
+    on_tag: Optional[Callable[[str, str], None]] = None,
+    control: Optional[JobControl] = None,
 ) -> tuple[int, list[str], str]:
     """
     Returns: (returncode, printed_filepaths, last_line)
     printed_filepaths: yt-dlp --print after_move:filepath ile yazdırılan dosya yolları (varsa).
+    on_filepath: her yeni dosya yolu yakalandığında (öğe tamamlandığında) hemen çağrılır.
+    on_tag: '__YTDL_<TAG>__:<değer>' biçimindeki --print satırları için (tag, değer) ile çağrılır.
+        yt-dlp'nin hedef dosya satırları ('DEST', yol), parça ilerlemesi ('FRAG', n) ve ilerleme satırındaki
+        toplam boyut ('SIZE', bayt) da bununla bildirilir.
+    control: duraklat/devam; yedek yolda yt-dlp temiz durdurulur ve _STOPPED_RC döner.
     """
 
     def cancel_requested() -> bool:
@@ -650,6 +701,8 @@ def _run_ytdlp(
         bufsize=0,
         start_new_session=True,
     )
+    if control is not None:
+        control.register(process.pid)
 
     printed_paths: list[str] = []
     last_line: str = ""
@@ -674,9 +727,35 @@ def _run_ytdlp(
         plain = _ANSI_RE.sub('', line_str)
 
         s = plain.strip()
+
+        # Bizim eklediğimiz etiketli --print satırları (yol/ilerleme değil)
+        m_tag = _TAG_LINE_RE.match(s)
+        if m_tag:
+            if on_tag is not None:
+                try:
+                    on_tag(m_tag.group(1), m_tag.group(2))
+                except Exception:
+                    pass
+            return
+
         if s:
             last_line = s
 
+        # Artık dosya manifesti için: yt-dlp'nin yazdığı hedefler ve parça numaraları
+        if on_tag is not None:
+            m_dest = _DEST_RE.match(s)
+            m_frag = _FRAG_RE.search(s) if m_dest is None else None
+            m_size = _TOTAL_SIZE_RE.match(s) if m_dest is None else None
+            try:
+                if m_dest:
+                    on_tag("DEST", m_dest.group(1) or m_dest.group(2))
+                elif m_frag:
+                    on_tag("FRAG", m_frag.group(1))
+                if m_size and m_size.group(2) in _SIZE_UNITS:
+                    on_tag("SIZE", str(int(float(m_size.group(1)) * _SIZE_UNITS[m_size.group(2)])))
+            except Exception:
+                pass
+
 
         # Playlist içinde kaçıncı öğe indiriliyor? (UI'da 2/5 gösterebilmek için)
         m_item = _PL_ITEM_RE.search(plain)
@@ -704,6 +783,8 @@ def _run_ytdlp(
                 sp = str(cand)
                 if sp not in printed_paths:
                     printed_paths.append(sp)
+                    if on_filepath is not None:
+                        on_filepath(sp)
         except Exception:
             pass
 
@@ -717,6 +798,9 @@ def _run_ytdlp(
                 if cancel_requested():
                     status_cb("İptal ediliyor...")
                     kill_group(signal.SIGTERM)
+                    if control is not None:
+                        # Duraklatılmış süreç SIGTERM'i ancak devam edince işler.
+                        control.resume()
                     try:
                         process.wait(timeout=2)
                     except Exception:
@@ -724,6 +808,20 @@ def _run_ytdlp(
                     status_cb("İptal edildi")
                     return (130, printed_paths, last_line)
 
+                if control is not None and control.stop_requested():
+                    # Yedek duraklatma: yt-dlp'yi Ctrl+C gibi durdur; .part/.ytdl dosyaları korunur.
+                    control.release_group(process.pid)
+                    kill_group(signal.SIGINT)
+                    try:
+                        process.wait(timeout=5)
+                    except Exception:
+                        kill_group(signal.SIGTERM)
+                        try:
+                            process.wait(timeout=2)
+                        except Exception:
+                            kill_group(signal.SIGKILL)
+                    return (_STOPPED_RC, printed_paths, last_line)
+
                 # veri bekle
                 r, _, _ = select.select([process.stdout], [], [], 0.2)
 
@@ -755,9 +853,13 @@ def _run_ytdlp(
                         break
 
     finally:
+        if control is not None:
+            control.unregister(process.pid)
         try:
             if process.poll() is None:
                 kill_group(signal.SIGTERM)
+                if control is not None:
+                    control.release_group(process.pid)
             try:
                 process.wait(timeout=2)
             except subprocess.TimeoutExpired:
@@ -775,13 +877,302 @@ def _run_ytdlp(
     return (process.returncode or 0, printed_paths, last_line)
 
 
-def _ffmpeg_remux_audio_to_opus(src_path: str, dst_path: str, *, cancel_event=None) -> None:
+def _with_download_archive(cmd: list[str], archive_path: str) -> list[str]:
+    """Komutun sonundaki URL'den önce --download-archive ekle."""
+    return cmd[:-1] + ["--download-archive", archive_path] + cmd[-1:]
+
+
+def _run_ytdlp_resumable(
+    cmd: list[str],
+    *,
+    progress_cb: Callable[[float, Optional[float], Optional[str]], None],
+    status_cb: Callable[[str], None],
+    cancel_event=None,
+    on_filepath: Optional[Callable[[str], None]] = None,
+    on_tag: Optional[Callable[[str, str], None]] = None,
+    control: Optional[JobControl] = None,
+) -> tuple[int, list[str], str]:
+    """
+    _run_ytdlp + duraklatma yedek yolu: yt-dlp durdurulduysa devam edilene kadar bekler ve aynı
+    komutu yeniden çalıştırır (yt-dlp .part/.ytdl üzerinden kaldığı yerden sürdürür).
+    Tamamlanmış playlist öğeleri geçici bir --download-archive ile atlanır (komutta işe özel
+    arşiv zaten varsa onu yt-dlp kendisi günceller).
+    Dönen yollar tüm çalıştırmaların birleşimidir.
+    """
+    all_paths: list[str] = []
+    done_ids: list[str] = []
+    archive_path: Optional[str] = None
+
+    def on_path(p: str) -> None:
+        if p in all_paths:
+            return
+        all_paths.append(p)
+        if on_filepath is not None:
+            on_filepath(p)
+
+    def on_tag_any(tag: str, value: str) -> None:
+        if tag == "ARCHIVE":
+            # yt-dlp arşiv satırı: '<extractor_key küçük harf> <id>'
+            key, _, vid = value.strip().partition(" ")
+            if key and vid:
+                done_ids.append(f"{key.lower()} {vid}")
+        if on_tag is not None:
+            on_tag(tag, value)
+
+    run_cmd = cmd
+    try:
+        while True:
+            code, _paths, last_line = _run_ytdlp(
+                run_cmd,
+                progress_cb=progress_cb,
+                status_cb=status_cb,
+                cancel_event=cancel_event,
+                on_filepath=on_path,
+                on_tag=on_tag_any,
+                control=control,
+            )
+            if code != _STOPPED_RC or control is None:
+                return (code, all_paths, last_line)
+
+            status_cb("Duraklatıldı (kısmi dosyalar korunuyor)")
+            if not control.wait_if_paused(cancel_event):
+                # Bekleyen post-process worker'ları da serbest kalsın.
+                control.resume()
+                status_cb("İptal edildi")
+                return (130, all_paths, last_line)
+            status_cb("İndirme sürdürülüyor...")
+
+            if done_ids and "--download-archive" not in cmd:
+                if archive_path is None:
+                    fd, archive_path = tempfile.mkstemp(prefix="ytdl-archive-", suffix=".txt")
+                    os.close(fd)
+                with open(archive_path, "w", encoding="utf-8") as f:
+                    f.write("\n".join(done_ids) + "\n")
+                run_cmd = _with_download_archive(cmd, archive_path)
+    finally:
+        if archive_path:
+            try:
+                os.remove(archive_path)
+            except Exception:
+                pass
+
+
+# Playlist öğe başına çalıştırma: bu süre boyunca ilerleme yüzdesi değişmeyen öğe "takılmış" sayılır.
+_ITEM_STALL_S = 300.0
+_ITEM_MAX_DEFERRALS = 1
+
+
+class _ItemCancelEvent:
+    """
+    Tek playlist öğesinin yt-dlp çalıştırması için iptal bayrağı.
+    İş iptal edildiğinde, kullanıcı öğeyi atladığında veya öğe stall_s boyunca ilerlemediğinde set olur.
+    Duraklatma sırasında ve post-process aşamasında (yüzde 100) takılma sayacı işlemez.
+    """
+
+    def __init__(self, cancel_event, playlist_control: PlaylistControl, index: int, *, control: Optional[JobControl] = None, stall_s: Optional[float] = None):
+        self._cancel_event = cancel_event
+        self._playlist_control = playlist_control
+        self._control = control
+        self.index = int(index)
+        self.stall_s = stall_s
+        self.stalled = False
+        self._last_fraction = 0.0
+        self._last_change = time.monotonic()
+
+    def job_cancelled(self) -> bool:
+        return self._cancel_event is not None and getattr(self._cancel_event, "is_set", lambda: False)()
+
+    def note_progress(self, p: float) -> None:
+        if p != self._last_fraction:
+            self._last_fraction = p
+            self._last_change = time.monotonic()
+
+    def touch(self) -> None:
+        self._last_change = time.monotonic()
+
+    def is_set(self) -> bool:
+        if self.job_cancelled():
+            return True
+        if self._playlist_control.skip_requested(self.index):
+            return True
+        if self.stall_s:
+            if (self._control is not None and self._control.is_paused()) or self._last_fraction >= 0.999:
+                self._last_change = time.monotonic()
+            elif time.monotonic() - self._last_change >= float(self.stall_s):
+                self.stalled = True
+                return True
+        return False
+
+
+def _run_playlist_items(
+    cmd: list[str],
+    *,
+    playlist_control: PlaylistControl,
+    items: list[int],
+    progress_cb: Callable[[float, Optional[float], Optional[str]], None],
+    status_cb: Callable[[str], None],
+    cancel_event=None,
+    on_filepath: Optional[Callable[[str], None]] = None,
+    on_tag: Optional[Callable[[str, str], None]] = None,
+    control: Optional[JobControl] = None,
+    entry_ids: Optional[dict[int, str]] = None,
+    done: Optional[set[int]] = None,
+    stall_s: Optional[float] = _ITEM_STALL_S,
+    prepare_item: Optional[Callable[[int, list[str]], list[str]]] = None,
+    manifest: Optional[_ArtifactManifest] = None,
+    rewrite_cmd: Optional[Callable[[list[str]], list[str]]] = None,
+) -> tuple[int, list[str], str]:
+    """
+    Playlist'i öğe başına ayrı yt-dlp çalıştırmasıyla indir (URL'den önce --playlist-items N eklenir).
+    - Atlanan öğe yalnızca kendi sürecini durdurur; kalan öğeler indirilmeye devam eder.
+    - Takılan öğe bir kez sona ertelenir; yine takılırsa başarısız sayılır.
+    - Başarısız öğe diğerlerini durdurmaz; ağ kopması ise işi durdurur (sürdürme için).
+    prepare_item(index, cmd): öğe başlamadan çağrılır; öğe için diske konan (önbellekten) dosyaları
+        döndürür, çıktıya dönüşmeyenler öğe bitince silinir.
+    manifest: atlanan/takılan öğenin artıkları, öğe başladıktan sonra manifest'e giren yollardan silinir.
+    rewrite_cmd(cmd): her öğe başlamadan komutu günceller (örn. ölçülen hıza göre aktarım ayarları).
+    Dönen değer _run_ytdlp ile aynı biçimdedir: iptalde 130; hiçbir öğe tamamlanamadıysa son hata kodu.
+    """
+    playlist_control.set_items(items, done=done)
+    ids = entry_ids or {}
+    total = len(items)
+    all_paths: list[str] = []
+    last_line = ""
+    last_failure: tuple[int, str] = (0, "")
+
+    def on_path(p: str) -> None:
+        if p in all_paths:
+            return
+        all_paths.append(p)
+        if on_filepath is not None:
+            on_filepath(p)
+
+    while True:
+        if cancel_event is not None and getattr(cancel_event, "is_set", lambda: False)():
+            return (130, all_paths, last_line)
+        index = playlist_control.next_item()
+        if index is None:
+            break
+
+        counts = playlist_control.counts()
+        finished = sum(counts.get(k, 0) for k in (ITEM_DONE, ITEM_FAILED, ITEM_SKIPPED))
+        status_cb(f"__PL_ITEM__:{min(total, finished + 1)}:{total}")
+
+        ev = _ItemCancelEvent(cancel_event, playlist_control, index, control=control, stall_s=stall_s)
+
+        def item_progress(p: float, speed_mbps: Optional[float] = None, eta: Optional[str] = None, ev=ev) -> None:
+            ev.note_progress(p)
+            progress_cb(p, speed_mbps, eta)
+
+        def item_status(msg: str, ev=ev) -> None:
+            # Öğe atlandığında _run_ytdlp'nin "İptal..." mesajları işin iptali gibi görünmesin.
+            if msg.startswith("__PL_ITEM__:") or (msg.startswith("İptal") and not ev.job_cancelled()):
+                return
+            status_cb(msg)
+
+        def item_path(p: str, ev=ev) -> None:
+            on_path(p)
+            ev.touch()
+
+        item_mark = manifest.mark() if manifest is not None else 0
+        base = rewrite_cmd(cmd) if rewrite_cmd is not None else cmd
+        item_cmd = base[:-1] + ["--playlist-items", str(index)] + base[-1:]
+        seeded = prepare_item(index, item_cmd) if prepare_item is not None else []
+        code, _paths, line = _run_ytdlp_resumable(
+            item_cmd,
+            progress_cb=item_progress,
+            status_cb=item_status,
+            cancel_event=ev,
+            on_filepath=item_path,
+            on_tag=on_tag,
+            control=control,
+        )
+        for p in seeded:
+            if p not in all_paths:
+                try:
+                    Path(p).unlink(missing_ok=True)
+                except Exception:
+                    pass
+        if line:
+            last_line = line
+
+        if code == 130:
+            if ev.job_cancelled():
+                return (130, all_paths, last_line)
+            if manifest is not None:
+                manifest.cleanup(since=item_mark)
+            if ev.stalled:
+                if playlist_control.defer(index, limit=_ITEM_MAX_DEFERRALS):
+                    status_cb(f"Öğe {index} ilerlemiyor, sona ertelendi")
+                else:
+                    last_failure = (1, f"Öğe {index} ilerlemiyor")
+                    status_cb(f"Öğe {index} ilerlemiyor, geçildi")
+            else:
+                playlist_control.finish(index, ITEM_SKIPPED)
+                status_cb(f"Öğe {index} atlandı")
+            continue
+
+        if code != 0:
+            if _is_network_error_line(line):
+                # Ağ kopması tüm öğeleri etkiler: işi durdur (kısmi dosyalar + arşiv ile sürdürülebilir).
+                return (code, all_paths, line)
+            playlist_control.finish(index, ITEM_FAILED)
+            last_failure = (code, line)
+            status_cb(f"Öğe {index} başarısız, sonrakine geçiliyor")
+            continue
+
+        playlist_control.finish(index, ITEM_DONE)
+
+    if playlist_control.items_in_state(ITEM_FAILED) and not playlist_control.items_in_state(ITEM_DONE):
+        return (last_failure[0] or 1, all_paths, last_failure[1] or last_line)
+    return (0, all_paths, last_line)
+
+
+def _plan_playlist_items(url: str, playlist_items: Optional[str], download_archive: Optional[str]) -> Optional[tuple[list[int], dict[int, str], set[int]]]:
+    """
+    Öğe başına çalıştırma planı: (indeksler, indeks->video id, arşivde zaten olan indeksler).
+    Playlist okunamazsa None (çağıran tek yt-dlp çalıştırmasına döner).
+    """
+    try:
+        info = probe_playlist(url)
+    except Exception:
+        return None
+    if not info.get("is_playlist") or int(info.get("count") or 0) <= 0:
+        return None
+    entries = info.get("entries") or []
+    items = expand_playlist_items(playlist_items, int(info["count"]))
+    if not items:
+        return None
+
+    ids: dict[int, str] = {}
+    archived: set[str] = set()
+    if download_archive:
+        try:
+            with open(download_archive, "r", encoding="utf-8") as f:
+                archived = {ln.strip() for ln in f if ln.strip()}
+        except Exception:
+            archived = set()
+    done: set[int] = set()
+    for i in items:
+        if 0 < i <= len(entries):
+            e = entries[i - 1]
+            if e.get("id"):
+                ids[i] = e["id"]
+                if e.get("ie_key") and f"{e['ie_key'].lower()} {e['id']}" in archived:
+                    done.add(i)
+    return items, ids, done
+
+
+def _ffmpeg_remux_audio_to_opus(src_path: str, dst_path: str, *, tags: Optional[dict[str, str]] = None, cancel_event=None) -> None:
     """
     Opus stream -> .opus konteynerine remux (codec copy, re-encode yok).
-    İptal destekli.
+    İptal destekli. oggopus remux'u yapamadığında kullanılan yedek yol.
     """
     _require_ffmpeg()
-    cmd = ["ffmpeg", "-v", "error", "-y", "-i", src_path, "-vn", "-map_metadata", "0", "-c:a", "copy", dst_path]
+    cmd = ["ffmpeg", "-v", "error", "-y", "-i", src_path, "-vn", "-map_metadata", "0", "-c:a", "copy"]
+    for k, v in (tags or {}).items():
+        cmd += ["-metadata", f"{k}={v}"]
+    cmd.append(dst_path)
     rc, err = _run_cancelable_process(cmd, cancel_event=cancel_event)
     if rc == 130:
         try:
@@ -797,170 +1188,1514 @@ def _ffmpeg_remux_audio_to_opus(src_path: str, dst_path: str, *, cancel_event=No
         raise RuntimeError(err.splitlines()[-1] if err else "ffmpeg remux hatası")
 
 
-def download_video(
-    url: str,
-    output_dir: str,
-    format_key: str,
-    progress_cb: Callable[[float, Optional[float], Optional[str]], None],
-    status_cb: Callable[[str], None],
-    cancel_event=None,
-    format_override: Optional[str] = None,
-    playlist: bool = False,
-    playlist_items: Optional[str] = None,
-):
-    ytdlp = _find_ytdlp()
-    opt = FORMAT_OPTIONS.get(format_key)
-    if not opt:
-        raise RuntimeError(f"Bilinmeyen format_key: {format_key}")
+_UNSAFE_NAME_RE = re.compile(r'[\x00-\x1f/\\:*?"<>|]+')
 
-    out_dir = Path(output_dir).expanduser().resolve()
-    out_dir.mkdir(parents=True, exist_ok=True)
-    job_started_ts = time.time()
 
-    kind = opt["kind"]
-    fmt = format_override or opt["format"]
+def _parse_chapters(value: str, *, clip: Optional[tuple[float, float]] = None) -> list[tuple[float, Optional[float], str]]:
+    """
+    yt-dlp '%(chapters)j' çıktısını (başlangıç, bitiş, başlık) listesine çevir.
+    clip verilirse bölümler klibin zaman eksenine kaydırılır ve aralık dışında kalanlar atılır.
+    """
+    try:
+        raw = json.loads(value)
+    except Exception:
+        return []
+    if not isinstance(raw, list):
+        return []
+    out: list[tuple[float, Optional[float], str]] = []
+    for ch in raw:
+        if not isinstance(ch, dict):
+            continue
+        try:
+            start = float(ch.get("start_time") or 0.0)
+            end = float(ch["end_time"]) if ch.get("end_time") is not None else None
+        except (TypeError, ValueError):
+            continue
+        if clip is not None:
+            c0, c1 = clip
+            end = min(end, c1) if end is not None else c1
+            start = max(start, c0)
+            if end <= start:
+                continue
+            start, end = start - c0, end - c0
+        title = str(ch.get("title") or "").strip() or f"Bölüm {len(out) + 1}"
+        out.append((start, end, title))
+    out.sort(key=lambda c: c[0])
+    return out if len(out) > 1 else []
 
-    # ffmpeg gerektiren durumlar
-    if kind in ("video_av", "video_only_remux", "audio_opus"):
-        _require_ffmpeg()
 
-    out_tmpl = "%(title).200B [%(id)s].%(ext)s"
-    if playlist:
-        out_tmpl = "%(playlist)s/%(playlist_index)03d - %(title).200B [%(id)s].%(ext)s"
+def _ffprobe_format_title(path: str) -> Optional[str]:
+    ffprobe = shutil.which("ffprobe")
+    if not ffprobe:
+        return None
+    try:
+        proc = subprocess.run(
+            [ffprobe, "-v", "error", "-show_entries", "format_tags=title", "-of", "default=nw=1:nk=1", path],
+            check=False,
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+        title = (proc.stdout or "").strip().splitlines()
+        return title[0].strip() if proc.returncode == 0 and title else None
+    except Exception:
+        return None
 
-    base_cmd = [
-        ytdlp,
-        "--newline",
-        "--progress",
-        "--retries", "1000000",
-        "--fragment-retries", "1000000",
-        "--extractor-retries", "5",
-        "--retry-sleep", "5",
-        "--socket-timeout", "10",
-        # Playlist kontrolü: varsayılan tek video
-        ("--yes-playlist" if playlist else "--no-playlist"),
-        "--restrict-filenames",
-        "-P", str(out_dir),
-        "-o", out_tmpl,
-        # Temel metadata (title/artist/album) göm.
-        # --embed-metadata, --add-metadata ile eşdeğer bir alias'tır.
-        "--parse-metadata", "%(title|)s:%(meta_title)s",
-        "--parse-metadata", "%(artist,creator,uploader,channel|)s:%(meta_artist)s",
-        "--parse-metadata", "%(album,playlist_title,channel,uploader|)s:%(meta_album)s",
-        "--embed-metadata",
-        "--no-embed-chapters",
-        "--no-embed-info-json",
-        "--print", "after_move:filepath",
-        "-f", fmt,
-    ]
 
-    if playlist and playlist_items:
-        base_cmd += ["--playlist-items", str(playlist_items)]
+def _split_chapter_file(
+    src: str,
+    dst: str,
+    start: float,
+    end: Optional[float],
+    metadata: dict[str, str],
+    *,
+    cover: Optional[str],
+    cancel_event=None,
+) -> str:
+    """Tek bölümü stream copy ile kes (re-encode yok); kapak ve metadata korunur."""
+    is_opus = Path(src).suffix.lower() == ".opus"
+    cmd = ["ffmpeg", "-v", "error", "-y", "-ss", f"{start:.3f}", "-i", src]
+    if end is not None:
+        cmd += ["-t", f"{max(0.0, end - start):.3f}"]
+    # Ogg kapak akışı yazamaz: .opus'ta kapak sonradan opustags ile yeniden gömülür.
+    cmd += ["-map", "0:a" if is_opus else "0", "-c", "copy", "-map_metadata", "0", "-map_chapters", "-1"]
+    for k, v in metadata.items():
+        cmd += ["-metadata", f"{k}={v}"]
+    cmd.append(dst)
+    rc, err = _run_cancelable_process(cmd, cancel_event=cancel_event)
+    if rc != 0:
+        try:
+            Path(dst).unlink(missing_ok=True)
+        except Exception:
+            pass
+        if rc == 130:
+            raise RuntimeError("İptal edildi")
+        raise RuntimeError(err.splitlines()[-1] if err else "ffmpeg bölüm ayırma hatası")
+    if is_opus and cover:
+        try:
+            _try_set_cover_opus(dst, cover, cancel_event=cancel_event)
+        except Exception:
+            pass
+    return dst
 
-    # Video + Ses (mutlaka Opus)
-    if kind == "video_av":
-        status_cb(opt["name"])
-        cmd = base_cmd + ["--merge-output-format", opt["merge_output_format"], url]
-        code, paths, last_line = _run_ytdlp(cmd, progress_cb=progress_cb, status_cb=status_cb, cancel_event=cancel_event)
-        filepath = paths[-1] if paths else None
-        if code == 130:
-            _cleanup_cancel_artifacts(out_dir, job_started_ts, recursive=playlist)
-            return
-        if code != 0:
-            _cleanup_on_network_failure(code, last_line, out_dir, job_started_ts, recursive=playlist)
-            raise RuntimeError(last_line or "İndirme hatası")
-        progress_cb(1.0)
-        status_cb("İndirme tamamlandı")
-        if playlist and paths:
+
+def _split_into_chapters(
+    path: str,
+    chapters: list[tuple[float, Optional[float], str]],
+    *,
+    cancel_event=None,
+    status_cb: Optional[Callable[[str], None]] = None,
+    workers: Optional[int] = None,
+) -> list[str]:
+    """
+    Bitmiş çıktıyı bölüm başına dosyalara ayır: '<ad>/<NN> - <bölüm>.<ext>' (kaynak dosya kalır).
+    Her bölüm ayrı ffmpeg süreciyle (stream copy) paralel kesilir; bölümlere title/track/album
+    yazılır, kapak (m4a attached_pic, mkv eki, opus METADATA_BLOCK_PICTURE) korunur.
+    """
+    src = Path(path)
+    if not chapters or not src.is_file():
+        return []
+    out_dir = src.with_suffix("")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    album = _ffprobe_format_title(str(src)) or src.stem
+    total = len(chapters)
+    width = max(2, len(str(total)))
+
+    cover: Optional[str] = None
+    if src.suffix.lower() == ".opus" and shutil.which("opustags"):
+        # Kapağı bir kez çıkar; her bölüme yeniden gömülür.
+        cover_path = out_dir / ".cover.jpg"
+        rc, _err = _run_cancelable_process(
+            ["ffmpeg", "-v", "error", "-y", "-i", str(src), "-map", "0:v:0", "-c", "copy", "-frames:v", "1", str(cover_path)],
+            cancel_event=cancel_event,
+        )
+        cover = str(cover_path) if rc == 0 and cover_path.is_file() else None
+
+    if status_cb is not None:
+        status_cb(f"Bölümlere ayrılıyor ({total})…")
+
+    def job(n: int, ch: tuple[float, Optional[float], str]) -> str:
+        start, end, title = ch
+        name = _UNSAFE_NAME_RE.sub("_", title).strip(" .")[:150] or f"Bölüm {n}"
+        dst = out_dir / f"{n:0{width}d} - {name}{src.suffix}"
+        meta = {"title": title, "track": f"{n}/{total}", "album": album}
+        return _split_chapter_file(str(src), str(dst), start, end, meta, cover=cover, cancel_event=cancel_event)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(total, workers or default_pp_workers()))) as pool:
+            futures = [pool.submit(job, n, ch) for n, ch in enumerate(chapters, 1)]
+            return [f.result() for f in futures]
+    finally:
+        if cover:
             try:
-                return str(Path(paths[0]).parent)
+                Path(cover).unlink(missing_ok=True)
             except Exception:
-                return str(out_dir)
-        return filepath
+                pass
 
-    # Ses (M4A)
-    # Ses (M4A) — sadece gerçek M4A
-    if kind == "audio_m4a":
-        status_cb(opt["name"])
-        cmd = base_cmd + ["--write-all-thumbnails", "--convert-thumbnails", "jpg", url]
-        code, paths, last_line = _run_ytdlp(cmd, progress_cb=progress_cb, status_cb=status_cb, cancel_event=cancel_event)
 
-        cancelled = (code == 130)
-        if cancelled:
-            # Kullanıcı iptal etmiş olsa bile, tamamlanmış öğeleri (varsa) post-process ederek
-            # seçilen formatın (.m4a + kapak) deterministik kalmasını sağlarız.
-            status_cb("İptal edildi (tamamlanan öğeler işleniyor…)")
+class _PostprocessCancelled(Exception):
+    """Post-process aşamasında kullanıcı iptali (kısmi çıktılar temizlenmeli)."""
 
-        if (not cancelled) and code != 0:
-            _cleanup_on_network_failure(code, last_line, out_dir, job_started_ts, recursive=playlist)
-            raise RuntimeError(last_line or "İndirme hatası")
 
-        if not paths:
-            if cancelled:
-                _cleanup_cancel_artifacts(out_dir, job_started_ts, recursive=playlist)
-                status_cb("İptal edildi")
-                return
-            raise RuntimeError("İndirme tamamlandı ama dosya yolu alınamadı.")
+class _PostprocessCancelEvent:
+    """Post-process için iptal görünümü (cancel_event yerine geçer).
 
-        # Güvenlik: beklenen çıktı .m4a değilse (normalde --print after_move:filepath bunu sağlamalı)
-        # iptal modunda yalnızca geçerli .m4a dosyalarını işleyip devam edelim.
-        bad = [p for p in paths if Path(p).suffix.lower() != ".m4a"]
-        if bad:
-            if cancelled:
-                paths = [p for p in paths if Path(p).suffix.lower() == ".m4a"]
-                if not paths:
-                    _cleanup_cancel_artifacts(out_dir, job_started_ts, recursive=playlist)
-                    status_cb("İptal edildi")
-                    return
-            else:
-                raise RuntimeError("Bu içerik için M4A audio bulunamadı.")
+    İndirme sürerken gelen iptal, tamamlanmış öğeleri etkilemez (salvage: tamamlananlar
+    yine finalize edilir). yt-dlp başarıyla bittikten sonra arm() çağrılır; bundan sonra
+    gelen iptal post-process'i durdurur.
+    """
+
+    def __init__(self, cancel_event=None, *, control: Optional[JobControl] = None, threads: Optional[int] = None):
+        self._cancel_event = cancel_event
+        # _run_cancelable_process ffmpeg/opustags süreçlerini bununla duraklat/devam için kaydeder.
+        self.control = control
+        # ffmpeg başına thread sınırı (ffmpeg_threads); None => ffmpeg kendi seçer.
+        self.threads = threads
+        self._armed = threading.Event()
+
+    def arm(self) -> None:
+        self._armed.set()
+
+    @property
+    def armed(self) -> bool:
+        return self._armed.is_set()
+
+    def is_set(self) -> bool:
+        if not self._armed.is_set() or self._cancel_event is None:
+            return False
+        return bool(getattr(self._cancel_event, "is_set", lambda: False)())
 
-        pp_cancel_event = None if cancelled else cancel_event
 
-        # Kapak (thumbnail) varsa M4A içine göm (remux; re-encode yok).
-        for fp in paths:
-            if (not cancelled) and pp_cancel_event is not None and getattr(pp_cancel_event, "is_set", lambda: False)():
-                _cleanup_cancel_artifacts(out_dir, job_started_ts, recursive=playlist)
+def default_pp_workers() -> int:
+    """Post-process worker sayısı varsayılanı: çekirdek sayısı (sandbox'ta affinity dikkate alınır)."""
+    try:
+        n = len(os.sched_getaffinity(0))
+    except Exception:
+        n = os.cpu_count() or 1
+    return max(1, int(n))
+
+
+def ffmpeg_threads(workers: int) -> int:
+    """workers adet ffmpeg aynı anda çalışırken süreç başına thread: çekirdekler aşırı paylaştırılmaz."""
+    return max(1, default_pp_workers() // max(1, int(workers)))
+
+
+def with_ffmpeg_threads(cmd: list[str], threads: int) -> list[str]:
+    """ffmpeg komutuna filtre (global) ve kodlayıcı (çıktı seçeneği, son argümandan önce) thread sınırı ekle."""
+    if "-threads" in cmd:
+        return cmd
+    n = str(max(1, int(threads)))
+    return [cmd[0], "-filter_threads", n, *cmd[1:-1], "-threads", n, cmd[-1]]
+
+
+class _PostprocessPipeline:
+    """Tamamlanan öğeleri indirme sürerken finalize eden aşama.
+
+    workers adet thread kuyruktan öğe alır; asıl iş (ffmpeg/opustags) her biri kendi process
+    grubunda çalıştığı için öğeler çekirdekler arasında paralel finalize edilir.
+    Kuyruk sınırlıdır (depth): post-process geride kalırsa yt-dlp çıktısını okuyan thread
+    bekler (backpressure); böylece bekleyen iş sayısı playlist boyutuyla büyümez.
+    finalize() hata verirse kalan öğeler atlanır ve hata close() ile yeniden fırlatılır.
+    Sonuçlar gönderim sırasına göre değerlendirilir (deterministik): last_result en son
+    gönderilen başarılı öğeye, hata ise en küçük sıradaki hataya karşılık gelir.
+    """
+
+    def __init__(
+        self,
+        finalize: Callable[[str], Optional[str]],
+        *,
+        workers: Optional[int] = None,
+        depth: Optional[int] = None,
+    ):
+        self._finalize = finalize
+        n = max(1, int(workers or default_pp_workers()))
+        self._q: queue.Queue = queue.Queue(maxsize=max(1, int(depth or n * 2)))
+        self._overflow: list[tuple[int, str]] = []
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._errors: list[tuple[int, BaseException]] = []
+        self._failed = threading.Event()
+        self._last: tuple[int, Optional[str]] = (-1, None)
+        self._threads = [threading.Thread(target=self._loop, daemon=True) for _ in range(n)]
+        for t in self._threads:
+            t.start()
+
+    @property
+    def last_result(self) -> Optional[str]:
+        return self._last[1]
+
+    def submit(self, path: str, cancel_requested: Optional[Callable[[], bool]] = None) -> None:
+        with self._lock:
+            seq = self._seq
+            self._seq += 1
+        while not self._failed.is_set():
+            try:
+                self._q.put((seq, path), timeout=0.2)
                 return
+            except queue.Full:
+                # İptal istendiyse okuyucu thread'i bekletme; öğe close() sırasında işlenir.
+                if cancel_requested is not None and cancel_requested():
+                    self._overflow.append((seq, path))
+                    return
+
+    def _loop(self) -> None:
+        while True:
+            item = self._q.get()
+            if item is None:
+                return
+            seq, path = item
+            if self._failed.is_set():
+                continue
+            try:
+                out = self._finalize(path)
+            except BaseException as e:
+                with self._lock:
+                    self._errors.append((seq, e))
+                self._failed.set()
+                continue
+            if out:
+                with self._lock:
+                    if seq > self._last[0]:
+                        self._last = (seq, out)
+
+    def close(self) -> None:
+        """Kuyruğu boşalt, worker'ları bekle; finalize hatası varsa yeniden fırlat."""
+        overflow, self._overflow = self._overflow, []
+        for seq, path in overflow:
+            while not self._failed.is_set():
+                try:
+                    self._q.put((seq, path), timeout=0.2)
+                    break
+                except queue.Full:
+                    continue
+        for _ in self._threads:
+            self._q.put(None)
+        for t in self._threads:
+            t.join()
+        if self._errors:
+            # İptal her zaman öncelikli; değilse en erken gönderilen öğenin hatası.
+            for _seq, e in self._errors:
+                if isinstance(e, _PostprocessCancelled):
+                    raise e
+            raise min(self._errors, key=lambda x: x[0])[1]
+
+
+_VORBIS_KEYS = {"album_artist": "ALBUMARTIST"}
+
+
+def _tags_from_info(info: Optional[dict]) -> dict[str, str]:
+    """__YTDL_META__ satırındaki alanlardan --embed-metadata'nın yazacağı etiketler."""
+    info = info or {}
+    pick = {
+        "title": ("meta_title", "title"),
+        "artist": ("meta_artist",),
+        "album": ("meta_album",),
+        "date": ("upload_date",),
+        "comment": ("webpage_url",),
+        "description": ("description",),
+        "genre": ("genre",),
+        "composer": ("composer",),
+        "album_artist": ("album_artist",),
+    }
+    tags: dict[str, str] = {}
+    for key, fields in pick.items():
+        value = next((info[f] for f in fields if info.get(f) not in (None, "")), None)
+        if value is not None:
+            tags[key] = str(value)
+    return tags
+
+
+def _finalize_m4a_item(
+    fp: str,
+    *,
+    pp_cancel_event: _PostprocessCancelEvent,
+    status_cb: Callable[[str], None],
+    cache_source: Optional[Callable[[str, bool], None]] = None,
+    tags: Optional[dict[str, str]] = None,
+    cover: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Tek bir M4A öğesine metadata ve kapağı (cover: görsel yolu) yaz, kapak dosyasını sil.
+    Önce mp4tags ile yerinde (yalnızca moov yazılır, ses verisine dokunulmaz); olmazsa tek ffmpeg
+    remux'u (metadata + kapak birlikte).
+    """
+    if pp_cancel_event.is_set():
+        raise _PostprocessCancelled()
 
-            cover = _find_cover_image(fp)
+    try:
+        if cover or tags:
+            if pp_cancel_event.armed:
+                status_cb("Kapak ekleniyor…")
+            in_place = False
             try:
-                if cover:
-                    status_cb("Kapak ekleniyor…")
-                    _ffmpeg_attach_cover_to_m4a(fp, cover, cancel_event=pp_cancel_event)
+                # Hardlink'li dosya (örn. akış önbelleğinden bağlanmış) yerinde değişirse diğer ad da değişir.
+                if os.stat(fp).st_nlink == 1:
+                    cover_bytes = Path(cover).read_bytes() if cover else None
+                    mp4tags.write_tags(fp, dict(tags or {}), cover=cover_bytes)
+                    in_place = True
+            except (mp4tags.Mp4EditError, OSError):
+                in_place = False
+            if not in_place:
+                _ffmpeg_attach_cover_to_m4a(fp, cover, tags=tags, cancel_event=pp_cancel_event)
+    except Exception:
+        if pp_cancel_event.is_set():
+            raise _PostprocessCancelled()
+        raise
+    finally:
+        _remove_cover(cover)
+
+    # Etiketler yazıldıktan sonra önbelleğe bağlanır (yerinde düzenleme önbellek girdisini değiştirmesin).
+    if cache_source is not None:
+        try:
+            cache_source(fp, False)
+        except Exception:
+            pass
+    return fp
+
+
+class _RemuxWorker:
+    """
+    Kalıcı oggopus süreci (oggopus._serve). Remux saf Python olduğundan iş parçacığı havuzunda GIL'i
+    tutar ve paralel işçiler tek çekirdeğe sıkışırdı; her öğe için yeni yorumlayıcı başlatmak da
+    kısa öğelerde remux süresine yaklaşır. Boşta kalan süreçler sonraki öğelerde yeniden kullanılır.
+    """
+
+    _idle: list["_RemuxWorker"] = []
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self.proc = subprocess.Popen(
+            [sys.executable, oggopus.__file__],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            start_new_session=True,
+        )
+
+    @classmethod
+    def acquire(cls) -> "_RemuxWorker":
+        with cls._lock:
+            while cls._idle:
+                worker = cls._idle.pop()
+                if worker.proc.poll() is None:
+                    return worker
+        return cls()
+
+    def release(self) -> None:
+        with self._lock:
+            self._idle.append(self)
+
+    def kill(self) -> None:
+        try:
+            os.killpg(self.proc.pid, signal.SIGKILL)
+        except Exception:
+            pass
+        try:
+            self.proc.wait(timeout=2)
+        except Exception:
+            pass
+
+    def run(self, request: dict, cancel_event: _PostprocessCancelEvent) -> Optional[str]:
+        """İsteği çalıştır; hata metnini (başarıda None) döndür. İptalde süreç öldürülür."""
+        control = cancel_event.control
+        if control is not None:
+            control.register(self.proc.pid)
+        try:
+            self.proc.stdin.write(json.dumps(request) + "\n")
+            self.proc.stdin.flush()
+            while not select.select([self.proc.stdout], [], [], 0.2)[0]:
+                if cancel_event.is_set():
+                    raise _PostprocessCancelled()
+            line = self.proc.stdout.readline()
+        except BaseException:
+            # Yarıda kalan istek süreci belirsiz durumda bırakır; havuza dönmez.
+            self.kill()
+            raise
+        finally:
+            if control is not None:
+                control.unregister(self.proc.pid)
+                # Yanıt ile kayıt silme arasında duraklatıldıysa boşta durdurulmuş kalmasın.
+                control.release_group(self.proc.pid)
+        if not line:
+            self.kill()
+            return f"oggopus süreci beklenmedik şekilde kapandı (çıkış kodu {self.proc.poll()})"
+        self.release()
+        return json.loads(line).get("error")
+
+
+def _remux_opus_process(
+    src: str,
+    dst: str,
+    *,
+    tags: dict[str, str],
+    cover: Optional[str],
+    cancel_event: _PostprocessCancelEvent,
+) -> None:
+    """oggopus.remux'u kalıcı bir işçi sürecinde çalıştır; ffmpeg gibi iptal/duraklat alır."""
+    dims = (imageinfo.dimensions(cover) or (0, 0)) if cover else (0, 0)
+    request = {"src": src, "dst": dst, "tags": tags, "cover": cover, "cover_dims": list(dims)}
+    try:
+        error = _RemuxWorker.acquire().run(request, cancel_event)
+    except BaseException:
+        # Öldürülen süreç kendi geçici çıktısını silemez.
+        Path(dst).unlink(missing_ok=True)
+        raise
+    if error:
+        Path(dst).unlink(missing_ok=True)
+        raise oggopus.WebmRemuxError(error)
+
+
+def _finalize_opus_item(
+    fp: str,
+    *,
+    pp_cancel_event: _PostprocessCancelEvent,
+    status_cb: Callable[[str], None],
+    cache_source: Optional[Callable[[str, bool], None]] = None,
+    tags: Optional[dict[str, str]] = None,
+    cover: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Tek bir Opus öğesini .opus'a remux et, metadata ve kapağı (cover) göm, kaynak/kapak dosyasını temizle.
+    .webm kaynakta oggopus tek geçişte (OpusTags + kapak dahil) yazar; olmazsa ffmpeg + opustags.
+    """
+    if pp_cancel_event.is_set():
+        raise _PostprocessCancelled()
+
+    src = Path(fp)
+    if not src.exists():
+        return None
+
+    vorbis = {_VORBIS_KEYS.get(k, k.upper()): v for k, v in (tags or {}).items()}
+
+    # Eğer yt-dlp doğrudan .opus verdiyse remux gerekmeyebilir; yine de metadata/cover embed yapılabilir.
+    pending_cover = cover
+    if src.suffix.lower() == ".opus":
+        dst = src
+        if vorbis:
+            try:
+                _write_tags(str(dst), vorbis, cancel_event=pp_cancel_event)
             except Exception:
-                if (not cancelled) and pp_cancel_event is not None and getattr(pp_cancel_event, "is_set", lambda: False)():
-                    _cleanup_cancel_artifacts(out_dir, job_started_ts, recursive=playlist)
-                    return
+                if pp_cancel_event.is_set():
+                    raise _PostprocessCancelled()
+    else:
+        dst = src.with_suffix(".opus")
+        tmp = src.with_name(src.stem + ".__remux_tmp__.opus")
+        try:
+            _remux_opus_process(str(src), str(tmp), tags=vorbis, cover=cover, cancel_event=pp_cancel_event)
+            tmp.replace(dst)
+            pending_cover = None
+        except _PostprocessCancelled:
+            raise
+        except Exception:
+            # Desteklenmeyen yapı (ör. Opus olmayan/çok izli WebM): ffmpeg remux + opustags kapak
+            try:
+                _ffmpeg_remux_audio_to_opus(str(src), str(dst), tags=vorbis, cancel_event=pp_cancel_event)
+            except Exception:
+                if pp_cancel_event.is_set():
+                    raise _PostprocessCancelled()
                 raise
-            finally:
-                # Kullanıcı isteği: çıktı klasöründe thumbnail (jpg/webp/png) kalmasın.
+
+    # Kapak (thumbnail) henüz gömülmediyse .opus içine göm (opustags ile; re-encode yok)
+    try:
+        if pending_cover:
+            if pp_cancel_event.armed:
+                status_cb("Kapak ekleniyor…")
+            _try_set_cover_opus(str(dst), pending_cover, cancel_event=pp_cancel_event)
+    except Exception:
+        # Kapak ekleme hatasında: iptal değilse sessiz geç (indirimi bozmasın).
+        if pp_cancel_event.is_set():
+            raise _PostprocessCancelled()
+    finally:
+        _remove_cover(cover)
+
+    # Kaynak .webm'i temizle (dst zaten aynı dosyaysa dokunma); önbellek açıksa oraya taşınır.
+    if src != dst:
+        try:
+            if cache_source is not None:
+                cache_source(str(src), True)
+            src.unlink(missing_ok=True)
+        except Exception:
+            pass
+
+    return str(dst)
+
+
+# Dönüştürmeli (transcode) ses çıktıları: uzun FLAC girdileri örnek sınırlarında parçalara bölünüp
+# çekirdekler arasında paralel kodlanır, parçalar konteyner düzeyinde (concat demuxer, stream copy)
+# birleştirilir. MP3 tek geçişte kodlanır: kodlayıcı gecikmesi/dolgusu her parça sınırında duyulur
+# bir boşluk bırakır, çerçeve sınırları da örnek sınırlarıyla çakışmaz.
+_TRANSCODE_CODECS = {
+    "mp3": ["-c:a", "libmp3lame", "-q:a", "0"],
+    "flac": ["-c:a", "flac", "-sample_fmt", "s16"],
+}
+_SEGMENTED_CODECS = ("flac",)
+_SEGMENT_MIN_S = 120.0  # bundan kısa parçalar süreç başlatma maliyetine değmez
+_SEEK_PREROLL_S = 1.0  # parça başından bu kadar önce aranır; kesim atrim ile örnek hassasiyetinde yapılır
+
+
+def _ffprobe_duration(path: str) -> Optional[float]:
+    ffprobe = shutil.which("ffprobe")
+    if not ffprobe:
+        return None
+    try:
+        proc = subprocess.run(
+            [ffprobe, "-v", "error", "-show_entries", "format=duration", "-of", "default=nw=1:nk=1", path],
+            check=False,
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+        value = float((proc.stdout or "").strip())
+        return value if proc.returncode == 0 and value > 0 else None
+    except Exception:
+        return None
+
+
+def _ffprobe_sample_rate(path: str) -> Optional[int]:
+    ffprobe = shutil.which("ffprobe")
+    if not ffprobe:
+        return None
+    try:
+        proc = subprocess.run(
+            [ffprobe, "-v", "error", "-select_streams", "a:0", "-show_entries", "stream=sample_rate",
+             "-of", "default=nw=1:nk=1", path],
+            check=False,
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+        value = int((proc.stdout or "").strip())
+        return value if proc.returncode == 0 and value > 0 else None
+    except Exception:
+        return None
+
+
+def _segment_bounds(duration: float, n: int, rate: int) -> list[int]:
+    """Eşit aralıklı iç sınırlar, örnek (sample) cinsinden."""
+    total = int(duration * rate)
+    bounds: list[int] = []
+    for i in range(1, n):
+        t = total * i // n
+        if (not bounds or t > bounds[-1] + rate) and t < total - rate:
+            bounds.append(t)
+    return bounds
+
+
+def _transcode_audio(
+    src: str,
+    dst: str,
+    codec: str,
+    *,
+    cover: Optional[str] = None,
+    workers: int = 1,
+    cancel_event=None,
+) -> None:
+    """
+    src'nin ilk ses akışını codec'e (mp3/flac) kodla; metadata ve kapak dst'ye taşınır.
+    FLAC'ta workers > 1 ve girdi yeterince uzunsa parçalar paralel kodlanıp stream copy ile birleştirilir;
+    sınırlar tam örnek sayısıdır (atrim, mutlak zaman damgalarıyla), birleşik çıktı tek geçişle aynıdır.
+    MP3 her zaman tek geçişte kodlanır.
+    """
+    _require_ffmpeg()
+    codec_args = _TRANSCODE_CODECS[codec]
+    segmented = codec in _SEGMENTED_CODECS and workers > 1
+    duration = _ffprobe_duration(src) if segmented else None
+    rate = _ffprobe_sample_rate(src) if duration else None
+    n = min(int(workers), int(duration // _SEGMENT_MIN_S)) if duration and rate else 1
+
+    def fail(rc: int, err: str, what: str) -> None:
+        if rc == 130:
+            raise RuntimeError("İptal edildi")
+        raise RuntimeError(err.splitlines()[-1] if err else what)
+
+    tail = ["-map_metadata", "1" if n > 1 else "0"]
+    cover_in = str(2 if n > 1 else 1)
+    if cover:
+        tail += ["-map", f"{cover_in}:0", "-c:v", "copy", "-disposition:v:0", "attached_pic"]
+        if codec == "mp3":
+            tail += ["-id3v2_version", "3", "-metadata:s:v", "comment=Cover (front)"]
+    cover_args = ["-i", cover] if cover else []
+
+    if n < 2:
+        cmd = ["ffmpeg", "-v", "error", "-y", "-i", src, *cover_args, "-map", "0:a:0", *codec_args, *tail, dst]
+        rc, err = _run_cancelable_process(cmd, cancel_event=cancel_event)
+        if rc != 0:
+            Path(dst).unlink(missing_ok=True)
+            fail(rc, err, "ffmpeg dönüştürme hatası")
+        return
+
+    edges: list[Optional[int]] = [0, *_segment_bounds(float(duration), n, int(rate)), None]
+    work = Path(tempfile.mkdtemp(prefix=".transcode-", dir=str(Path(dst).parent)))
+    try:
+        def encode(i: int) -> str:
+            start, end = int(edges[i]), edges[i + 1]
+            seg = str(work / f"{i:03d}.{codec}")
+            # Kaba arama parça başından önce; -copyts ile zaman damgaları mutlak kalır, atrim örnek
+            # sayısıyla keser. Böylece komşu parçalar aynı zaman çizgisinde tam örnek sınırında birleşir.
+            seek = max(0.0, start / rate - _SEEK_PREROLL_S)
+            trim = f"atrim=start_sample={start}" + (f":end_sample={end}" if end is not None else "")
+            cmd = [
+                "ffmpeg", "-v", "error", "-y", "-ss", f"{seek:.6f}", "-copyts", "-i", src,
+                "-map", "0:a:0", "-af", f"{trim},asetpts=N/SR/TB", "-map_metadata", "-1", *codec_args, seg,
+            ]
+            rc, err = _run_cancelable_process(cmd, cancel_event=cancel_event)
+            if rc != 0:
+                fail(rc, err, "ffmpeg parça kodlama hatası")
+            return seg
+
+        with ThreadPoolExecutor(max_workers=len(edges) - 1) as pool:
+            segments = list(pool.map(encode, range(len(edges) - 1)))
+
+        listing = work / "concat.txt"
+        quoted = [s.replace("'", "'\\''") for s in segments]
+        listing.write_text("".join(f"file '{q}'\n" for q in quoted), encoding="utf-8")
+        cmd = [
+            "ffmpeg", "-v", "error", "-y",
+            "-f", "concat", "-safe", "0", "-i", str(listing),
+            "-i", src, *cover_args,
+            "-map", "0:a", "-c:a", "copy", *tail, dst,
+        ]
+        rc, err = _run_cancelable_process(cmd, cancel_event=cancel_event)
+        if rc != 0:
+            Path(dst).unlink(missing_ok=True)
+            fail(rc, err, "ffmpeg birleştirme hatası")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def _finalize_transcode_item(
+    fp: str,
+    codec: str,
+    *,
+    pp_cancel_event: _PostprocessCancelEvent,
+    status_cb: Callable[[str], None],
+    cache_source: Optional[Callable[[str, bool], None]] = None,
+    workers: int = 1,
+    cover: Optional[str] = None,
+) -> Optional[str]:
+    """Tek bir ses öğesini mp3/flac'a dönüştür (kapak dahil); kaynak ve kapak dosyasını temizle."""
+    if pp_cancel_event.is_set():
+        raise _PostprocessCancelled()
+
+    src = Path(fp)
+    if not src.exists():
+        return None
+    if src.suffix.lower() == f".{codec}":
+        # Kaynak zaten hedef biçimde (bazı sitelerde FLAC/MP3 doğrudan sunulur): dönüştürme gereksiz.
+        _remove_cover(cover)
+        return str(src)
+    dst = src.with_suffix(f".{codec}")
+    try:
+        if pp_cancel_event.armed or workers > 1:
+            status_cb(f"{codec.upper()} dönüştürülüyor…")
+        _transcode_audio(str(src), str(dst), codec, cover=cover, workers=workers, cancel_event=pp_cancel_event)
+    except Exception:
+        if pp_cancel_event.is_set():
+            raise _PostprocessCancelled()
+        raise
+    finally:
+        _remove_cover(cover)
+
+    try:
+        if cache_source is not None:
+            cache_source(str(src), True)
+        src.unlink(missing_ok=True)
+    except Exception:
+        pass
+    return str(dst)
+
+
+def _write_tags(path: str, tags: dict[str, str], *, cancel_event=None) -> None:
+    """
+    Yalnızca etiket yaz (ses yeniden kodlanmaz): .opus'ta opustags, .m4a'da mp4tags ile yerinde
+    (REPLAYGAIN_* anahtarları iTunes serbest öğeleri olur); diğerlerinde ffmpeg remux.
+    """
+    p = Path(path)
+    if p.suffix.lower() in (".m4a", ".mp4"):
+        mp4 = {
+            (f"{mp4tags.FREEFORM_PREFIX}{mp4tags.ITUNES_MEAN}:{k.lower()}" if k.upper().startswith("REPLAYGAIN_") else k): v
+            for k, v in tags.items()
+        }
+        try:
+            # Hardlink'li dosya (örn. önbellek ya da depo nesnesi) yerinde değiştirilmez.
+            if os.stat(p).st_nlink == 1:
+                mp4tags.write_tags(str(p), mp4)
+                return
+        except (mp4tags.Mp4EditError, OSError):
+            pass
+    if p.suffix.lower() == ".opus":
+        # ffmpeg Ogg kapağını (METADATA_BLOCK_PICTURE) taşıyamaz; opustags yoksa dokunma.
+        opustags = shutil.which("opustags")
+        if not opustags:
+            return
+        cmd = [opustags, "--in-place"]
+        for k, v in tags.items():
+            cmd += ["--set", f"{k}={v}"]
+        cmd.append(str(p))
+        rc, err = _run_cancelable_process(cmd, cancel_event=cancel_event)
+        if rc == 130:
+            raise RuntimeError("İptal edildi")
+        if rc != 0:
+            raise RuntimeError(err.splitlines()[-1] if err else "opustags etiket hatası")
+        return
+
+    tmp = p.with_name(p.stem + ".__tags_tmp__" + p.suffix)
+    cmd = ["ffmpeg", "-v", "error", "-y", "-i", str(p), "-map", "0", "-c", "copy", "-map_metadata", "0"]
+    if p.suffix.lower() in (".m4a", ".mp4"):
+        cmd += ["-movflags", "use_metadata_tags"]
+    if p.suffix.lower() == ".mp3":
+        cmd += ["-id3v2_version", "3"]
+    for k, v in tags.items():
+        cmd += ["-metadata", f"{k}={v}"]
+    cmd.append(str(tmp))
+    rc, err = _run_cancelable_process(cmd, cancel_event=cancel_event)
+    if rc != 0:
+        try:
+            tmp.unlink(missing_ok=True)
+        except Exception:
+            pass
+        if rc == 130:
+            raise RuntimeError("İptal edildi")
+        raise RuntimeError(err.splitlines()[-1] if err else "ffmpeg etiket hatası")
+    tmp.replace(p)
+
+
+def _write_mkv_tags(path: str, tags: dict[str, str], *, cancel_event=None) -> int:
+    """
+    MKV'ye metadata yaz; yazılan bayt sayısını döndür. Önce mkvtags ile yerinde (yalnızca Tags/Info/
+    SeekHead yazılır), olmazsa tek ffmpeg copy remux'u (dosyanın tamamı yeniden yazılır).
+    """
+    try:
+        if os.stat(path).st_nlink > 1:
+            # Hardlink'li dosya (ör. önbellek girdisi) yerinde değiştirilmez.
+            raise mkvtags.MkvEditError("Dosyanın birden çok bağlantısı var.")
+        return mkvtags.write_tags(path, tags)
+    except (mkvtags.MkvEditError, OSError):
+        _write_tags(path, tags, cancel_event=cancel_event)
+        return os.path.getsize(path)
+
+
+class _PhaseLog:
+    """
+    İş aşamalarının (indirme, birleştirme/remux, metadata) süresi ve diske yazdığı bayt.
+    Aşama sınırları yt-dlp'nin before_dl/post_process/after_move --print satırlarından (öğe başına)
+    alınır; özet UI'a '__PHASES__:' satırıyla bildirilir.
+    """
+
+    def __init__(self):
+        self._totals: dict[str, list[float]] = {}
+        self._open: dict[str, tuple[str, float]] = {}
+
+    def add(self, phase: str, seconds: float = 0.0, written: int = 0) -> None:
+        t = self._totals.setdefault(phase, [0.0, 0])
+        t[0] += max(0.0, seconds)
+        t[1] += int(written)
+
+    def mark(self, key: str, phase: Optional[str]) -> None:
+        """key (video id) için açık aşamayı kapat ve (verilmişse) yenisini başlat."""
+        now = time.monotonic()
+        prev = self._open.pop(key, None)
+        if prev is not None:
+            self.add(prev[0], now - prev[1])
+        if phase is not None:
+            self._open[key] = (phase, now)
+
+    def summary(self) -> str:
+        return " · ".join(f"{name}: {sec:.1f} sn, {format_bytes(written)}" for name, (sec, written) in self._totals.items())
+
+
+def _replaygain_tags(path: str, track: "loudness.TrackLoudness", album: Optional[tuple[float, float]]) -> dict[str, str]:
+    """Parça (ve varsa albüm: (loudness, peak)) için ReplayGain etiketleri; Opus'ta R128_*_GAIN."""
+    track_lufs = track.loudness
+    if track_lufs is None:
+        return {}
+    if Path(path).suffix.lower() == ".opus":
+        tags = {"R128_TRACK_GAIN": str(loudness.r128_gain(track_lufs))}
+        if album is not None:
+            tags["R128_ALBUM_GAIN"] = str(loudness.r128_gain(album[0]))
+        return tags
+    tags = {
+        "REPLAYGAIN_TRACK_GAIN": f"{loudness.replaygain(track_lufs):.2f} dB",
+        "REPLAYGAIN_TRACK_PEAK": f"{track.peak:.6f}",
+    }
+    if album is not None:
+        tags["REPLAYGAIN_ALBUM_GAIN"] = f"{loudness.replaygain(album[0]):.2f} dB"
+        tags["REPLAYGAIN_ALBUM_PEAK"] = f"{album[1]:.6f}"
+    return tags
+
+
+def _apply_replaygain(
+    analyses: dict[str, "loudness.TrackLoudness"],
+    *,
+    album: bool,
+    cancel_event=None,
+    status_cb: Callable[[str], None],
+    workers: Optional[int] = None,
+) -> None:
+    """
+    Analiz edilmiş parçalara ReplayGain etiketlerini yaz. album=True (playlist) ise albüm değeri
+    tüm parçaların blokları birlikte kapılanarak hesaplanır. Etiketler paralel yazılır.
+    """
+    items = [(p, t) for p, t in analyses.items() if t is not None and Path(p).is_file()]
+    if not items:
+        return
+    album_values = None
+    if album and len(items) > 1:
+        album_lufs = loudness.gated_loudness([t for _p, t in items])
+        if album_lufs is not None:
+            album_values = (album_lufs, max(t.peak for _p, t in items))
+    status_cb("ReplayGain etiketleri yazılıyor…")
+    with ThreadPoolExecutor(max_workers=max(1, min(len(items), workers or default_pp_workers()))) as pool:
+        futures = []
+        for p, t in items:
+            tags = _replaygain_tags(p, t, album_values)
+            if tags:
+                futures.append(pool.submit(_write_tags, p, tags, cancel_event=cancel_event))
+        for f in futures:
+            f.result()
+
+
+# Ön doğrulama: seçilen -f ifadesi taranan format kümesinde karşılanamıyorsa indirme hiç başlamaz.
+_PREFLIGHT_ERRORS = {
+    "video_only_mp4": "Bu içerik için 1080p MP4 video-only formatı bulunamadı.",
+    "audio_m4a": "Bu içerik için M4A audio bulunamadı.",
+    "audio_opus": "Bu içerik için Opus audio bulunamadı.",
+    "audio_transcode": "Bu içerik için ses akışı bulunamadı.",
+}
+
+
+def _preflight_validate(
+    url: str,
+    kind: str,
+    fmt: str,
+    *,
+    playlist: bool,
+    scanned_formats: Optional[list[dict]],
+    status_cb: Callable[[str], None],
+) -> None:
+    """
+    yt-dlp başlamadan önce format politikasını doğrula; karşılanamıyorsa RuntimeError.
+    scanned_formats: UI taramasının format listesi (varsa milisaniyeler sürer). Yoksa formatlar
+    yeniden taranır. Playlist'te doğrulama atlanır: tarama tek öğenin formatlarını içerir, diğer
+    öğeler farklı olabilir. Uzantı gibi kısıtlar seçicide ([ext=m4a]) olduğundan match_selector yeterlidir.
+    Tarama başarısız olursa veya ifade değerlendirilemiyorsa karar yt-dlp'ye bırakılır.
+    """
+    if playlist:
+        return
+    formats = scanned_formats
+    if formats is None:
+        status_cb("Format doğrulanıyor...")
+        try:
+            formats, _title = get_formats(url)
+        except Exception:
+            return
+    if not formats:
+        return
+    try:
+        chosen = match_selector(formats, fmt)
+    except UnsupportedSelector:
+        return
+    msg = _PREFLIGHT_ERRORS.get(kind, "Seçilen format bu içerik için bulunamadı.")
+    if chosen is None:
+        raise RuntimeError(msg)
+
+
+_AUDIO_KINDS = ("audio_m4a", "audio_opus", "audio_transcode")
+_OWN_METADATA_KINDS = ("audio_m4a", "audio_opus")
+_META_FIELDS = "meta_title,title,meta_artist,meta_album,upload_date,webpage_url,description,genre,composer,album_artist"
+_YT_ID_RE = re.compile(r"(?:[?&]v=|youtu\.be/|/shorts/|/live/|/embed/)([A-Za-z0-9_-]{11})(?![A-Za-z0-9_-])")
+_KEPT_STREAM_RE = re.compile(r"(?:\.f([0-9A-Za-z_-]+))?\.(webm|mp4|m4a|mkv|opus)")
+
+
+def _video_id_from_url(url: str) -> Optional[str]:
+    m = _YT_ID_RE.search(url or "")
+    return m.group(1) if m else None
+
+
+def _cache_kept_streams(final_paths: list[str], stream_ids: dict[str, str]) -> None:
+    """-k ile diskte bırakılan ara akışları (birleştirme parçaları / remux kaynağı) önbelleğe taşı."""
+    for fp in final_paths:
+        p = Path(fp)
+        vid = _extract_video_id_from_name(p.name)
+        if not vid:
+            continue
+        for cand in p.parent.glob(glob.escape(p.stem) + ".*"):
+            if cand == p or not cand.is_file():
+                continue
+            m = _KEPT_STREAM_RE.fullmatch(cand.name[len(p.stem):])
+            if not m:
+                continue
+            fid = m.group(1) or stream_ids.get(vid)
+            if fid and "+" not in fid:
+                streamcache.store(str(cand), vid, fid, move=True)
+
+
+_MEDIA_EXTS = {".mkv", ".mka", ".webm", ".mp4", ".m4a", ".opus", ".ogg", ".mp3", ".flac"}
+
+
+def _open_store(root: str, status_cb: Callable[[str], None]) -> Optional[contentstore.ContentStore]:
+    if contentstore.supported(root):
+        return contentstore.ContentStore(root)
+    status_cb(f"Hardlink desteklenmiyor, tekilleştirme kapalı: {root}")
+    return None
+
+
+def download_video(
+    url: str,
+    output_dir: str,
+    format_key: str,
+    progress_cb: Callable[[float, Optional[float], Optional[str]], None],
+    status_cb: Callable[[str], None],
+    *args,
+    staging_dir: Optional[str] = None,
+    dedup: bool = False,
+    mirror_dirs: Optional[list[str]] = None,
+    verify_cb: Optional[Callable[[dict], None]] = None,
+    **kwargs,
+):
+    """
+    Tek çıktılı indirme (parametreler için _download_video).
+    staging_dir: verilirse tüm ara işler (indirme, parçalar, birleştirme, kapak/etiket) bu dizinde
+        yapılır; bitmiş dosyalar hedefe tek seferde taşınır (staging.Stage). Ara dizinde yer yoksa
+        doğrudan hedefte çalışılır. Ağ kopmasında ara dizin sürdürme için korunur; başka hata ya da
+        iptalde yalnızca bitmiş çıktılar taşınır, ara dizinin geri kalanı silinir.
+    dedup: bitmiş çıktılar hedef kökün içerik deposuna (contentstore) bağlanır; aynı medya başka bir
+        playlist klasöründe zaten varsa yeni kopya hardlink'e dönüşür.
+    mirror_dirs: çıktılar aynı göreli düzenle bu köklerde de gösterilir (aynı dosya sisteminde
+        hardlink, değilse kökün deposunda yoksa tek kopya).
+    verify_cb: verilirse bitmiş çıktılar arka planda doğrulanır (verify.submit; yapı, akışlar, süre) ve
+        her sonuç bununla bildirilir. İndirme doğrulamayı beklemez.
+    """
+    if not (staging_dir or dedup or mirror_dirs or verify_cb):
+        return _download_video(url, output_dir, format_key, progress_cb, status_cb, *args, **kwargs)
+    verify_info: Optional[dict[str, dict]] = {} if verify_cb is not None else None
+
+    out_dir = Path(output_dir).expanduser().resolve()
+    store = _open_store(str(out_dir), status_cb) if dedup else None
+    stage: Optional[staging.Stage] = None
+    if staging_dir:
+        key = staging.job_key(str(out_dir), url, format_key, kwargs.get("output_label"))
+        # Hedefte de çıktı kadar yer olmalı (birleştirme/remux artık ara dizinde yapılır).
+        check_free_space(str(out_dir), kwargs.get("expected_bytes"))
+        try:
+            stage = staging.Stage(staging_dir, str(out_dir), key)
+            check_free_space(str(stage.dir), kwargs.get("expected_bytes"))
+        except (OSError, InsufficientSpace) as e:
+            if stage is not None:
                 try:
-                    _cleanup_cover_images(fp)
-                except Exception:
+                    stage.dir.rmdir()
+                except OSError:
                     pass
+                stage = None
+            status_cb(f"Ara dizin kullanılamıyor, doğrudan hedefe yazılıyor ({e})")
+
+    # Bitmiş çıktılar (manifest'in listesi); ara dizinsiz işte her biri bittiği anda (sıcakken) depoya alınır.
+    finished_outputs: list[str] = []
+    digests: dict[str, str] = {}
+
+    def on_output(path: str) -> None:
+        finished_outputs.append(path)
+        if store is None or stage is not None:
+            return
+        try:
+            digest = store.intern(path)
+        except OSError as e:
+            status_cb(f"Tekilleştirme atlandı: {Path(path).name} ({e})")
+            return
+        if digest:
+            digests[path] = digest
+
+    if stage is None:
+        result = _download_video(
+            url, output_dir, format_key, progress_cb, status_cb, *args, verify_info=verify_info, on_output=on_output, **kwargs
+        )
+        outputs = [f for f in finished_outputs if Path(f).resolve().is_relative_to(out_dir)]
+    else:
+        finished: list[str] = []
+
+        def stage_status(msg: str) -> None:
+            # "tamamlandı" ancak dosyalar hedefe taşındıktan sonra bildirilir.
+            if msg == "İndirme tamamlandı":
+                finished.append(msg)
+                return
+            status_cb(msg)
+
+        def publish_finished() -> list[str]:
+            """Yalnızca manifest'in bitmiş saydığı çıktıları taşı; ara dizinin geri kalanını sil."""
+            published: list[str] = []
+            kept = False
+            for f in finished_outputs:
+                if not os.path.isfile(f):
+                    continue
+                try:
+                    published.append(stage.publish(f, store=store))
+                except OSError as e:
+                    kept = True
+                    status_cb(f"Hedefe taşınamadı, ara dizinde kaldı: {Path(f).name} ({e})")
+            if not kept:
+                stage.discard()
+            return published
+
+        cancel_event = args[0] if args else kwargs.get("cancel_event")
+        try:
+            result = _download_video(
+                url, str(stage.dir), format_key, progress_cb, stage_status, *args,
+                verify_info=verify_info, on_output=on_output, **kwargs
+            )
+        except NetworkInterrupted:
+            # .part/.ytdl ara dizinde kalır; sürdürülen iş aynı dizini bulur.
+            raise
+        except BaseException:
+            # Hata/iptal: yarım indirmeler, parçalar ve kapak/etiket geçicileri hedefe taşınmaz.
+            publish_finished()
+            raise
+        if finished:
+            status_cb("Dosyalar hedef klasöre taşınıyor…")
+        # Özet hedefe kopyalanırken alınır (stage.digests); depoda olan içerik hardlink'e dönüşür.
+        if cancel_event is not None and cancel_event.is_set():
+            outputs = publish_finished()
+        else:
+            outputs = stage.publish_all(store=store)
+        digests.update(stage.digests)
+        if finished:
+            status_cb(finished[-1])
+        result = stage.final(result)
+
+    for mirror in mirror_dirs or []:
+        root = Path(mirror).expanduser().resolve()
+        if root == out_dir:
+            continue
+        mirror_store = _open_store(str(root), status_cb) if dedup else None
+        try:
+            for f in outputs:
+                contentstore.link_or_copy(
+                    f, str(root / Path(f).resolve().relative_to(out_dir)), store=mirror_store, digest=digests.get(f)
+                )
+        except (OSError, ValueError) as e:
+            status_cb(f"Yansı kopyası başarısız: {root} ({e})")
+            continue
+        if mirror_store is not None:
+            mirror_store.prune()
+    if store is not None:
+        store.prune()
+    if verify_cb is not None:
+        _submit_verifications(outputs, verify_info or {}, url=url, output_dir=str(out_dir), format_key=format_key,
+                              clip=kwargs.get("clip"), verify_cb=verify_cb)
+    return result
+
+
+def _submit_verifications(
+    outputs: list[str],
+    infos: dict[str, dict],
+    *,
+    url: str,
+    output_dir: str,
+    format_key: str,
+    clip: Optional[tuple[float, float]],
+    verify_cb: Callable[[dict], None],
+) -> None:
+    """Bitmiş medya çıktılarını (adında [id] olanlar; bölüm dosyaları hariç) doğrulama havuzuna ver."""
+    opt = FORMAT_OPTIONS[format_key]
+    for path in outputs:
+        vid = _extract_video_id_from_name(Path(path).name)
+        if not vid or Path(path).suffix.lower() not in _MEDIA_EXTS:
+            continue
+        info = infos.get(vid) or {}
+        duration = info.get("duration")
+        if clip is not None:
+            start, end = float(clip[0]), float(clip[1])
+            duration = (min(end, float(duration)) if isinstance(duration, (int, float)) else end) - start
+        verify.submit(path, {
+            "kind": opt["kind"],
+            "codec": opt.get("codec"),
+            "vcodec": info.get("vcodec"),
+            "acodec": info.get("acodec"),
+            "duration": duration,
+            "clip": clip is not None,
+            "url": url,
+            "output_dir": output_dir,
+            "format_key": format_key,
+            "video_id": vid,
+            "playlist_index": info.get("playlist_index"),
+        }, verify_cb)
+
+
+def _download_video(
+    url: str,
+    output_dir: str,
+    format_key: str,
+    progress_cb: Callable[[float, Optional[float], Optional[str]], None],
+    status_cb: Callable[[str], None],
+    cancel_event=None,
+    format_override: Optional[str] = None,
+    playlist: bool = False,
+    playlist_items: Optional[str] = None,
+    pp_workers: Optional[int] = None,
+    transfer_mode: str = "adaptive",
+    external_downloader: Optional[str] = None,
+    control: Optional[JobControl] = None,
+    download_archive: Optional[str] = None,
+    resume_policy: str = "keep",
+    playlist_control: Optional[PlaylistControl] = None,
+    expected_bytes: Optional[int] = None,
+    stream_cache: bool = False,
+    output_label: Optional[str] = None,
+    pinned_ids: Optional[set[str]] = None,
+    scanned_formats: Optional[list[dict]] = None,
+    clip: Optional[tuple[float, float]] = None,
+    split_chapters: bool = False,
+    replaygain: bool = False,
+    verify_info: Optional[dict[str, dict]] = None,
+    on_output: Optional[Callable[[str], None]] = None,
+):
+    """
+    pp_workers: post-process (remux/kapak/dönüştürme) için paralel worker sayısı; None => çekirdek sayısı.
+        Her ffmpeg çekirdek / worker kadar thread ile sınırlanır (ffmpeg_threads).
+    transfer_mode: "adaptive" => parça eşzamanlılığı/chunk boyutu ölçülen hıza göre; "default" => yt-dlp varsayılanı.
+    external_downloader: "auto" => aria2c varsa onu kullan; None => yt-dlp'nin kendi indiricisi.
+    control: JobControl ile duraklat/devam (yt-dlp ve ffmpeg süreç grupları SIGSTOP/SIGCONT).
+    download_archive: işe özel yt-dlp arşivi; sürdürmede tamamlanmış öğeler atlanır.
+    resume_policy: "keep" => ağ kopmasında kısmi dosyalar korunur (NetworkInterrupted); "cleanup" => silinir.
+    playlist_control: verilirse playlist öğe başına ayrı yt-dlp ile indirilir; öğeler tek tek atlanabilir,
+        öne alınabilir veya yeniden denenebilir (PlaylistControl).
+    expected_bytes: taramadan tahmin edilen en yüksek disk ihtiyacı (storage.estimate_job_bytes);
+        boş alan yetmiyorsa iş başlamadan InsufficientSpace fırlatılır.
+    stream_cache: ham akışlar (video id, format_id) anahtarıyla önbelleğe alınır; aynı videonun başka
+        formatı istendiğinde önbellekteki akış yeniden indirilmez (streamcache). Varsayılan kapalı:
+        ham akışlar (-k) veri dizinine taşınır; hedef başka diskteyse iş başına GB'larca kopya demektir.
+    output_label: çıktı adına eklenen etiket ('Ad [id].<etiket>.mkv'); çok çıktılı işte ad çakışmasın diye.
+    pinned_ids: verilirse bu işte önbelleğe giren videolar sabitlenir ve id'leri buraya eklenir
+        (download_outputs sonraki çıktılar bitene kadar akışların silinmemesi için kullanır).
+    scanned_formats: taramadaki format listesi; seçim bununla önceden doğrulanır (verilmezse tek
+        videoda yeniden taranır). Politikaya uymayan iş aktarım başlamadan hata verir.
+    clip: (başlangıç, bitiş) saniye; yalnızca bu aralık indirilir (yt-dlp --download-sections, ffmpeg
+        aralık isteğiyle okur). Kesim anahtar karelere hizalanır (yeniden kodlama yok); çıktı adına
+        '.clip-<baş>-<bit>' eklenir. Kısmi akışlar önbelleğe alınmaz.
+    split_chapters: bitmiş her çıktı videonun bölüm listesine göre '<ad>/NN - <bölüm>.<ext>'
+        dosyalarına da ayrılır (stream copy, paralel ffmpeg; bölümsüz videolarda atlanır).
+    replaygain: ses çıktılarında ses yüksekliği ölçülür ve ReplayGain etiketleri yazılır (yalnızca
+        etiket); playlist'te albüm değeri de yazılır. numpy yoksa atlanır (loudness.available()).
+    verify_info: verilirse video id -> yt-dlp'nin bildirdiği süre/codec/playlist sırası ile doldurulur
+        (download_video bitmiş çıktıları bununla doğrular).
+    on_output: her çıktı bittiği anda (bölüm dosyaları dahil, ReplayGain etiketleri yazıldıktan sonra)
+        yoluyla çağrılır; playlist'te post-process iş parçacığından gelebilir.
+    """
+    ytdlp = _find_ytdlp()
+    opt = FORMAT_OPTIONS.get(format_key)
+    if not opt:
+        raise RuntimeError(f"Bilinmeyen format_key: {format_key}")
+
+    out_dir = Path(output_dir).expanduser().resolve()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    # Saatlerce indirip birleştirme adımında disk dolmasın: tahmini ihtiyaç boş alana sığmalı.
+    check_free_space(str(out_dir), expected_bytes)
+    # İptal/hata temizliği yalnızca bu işin oluşturduğu dosyalara dokunur.
+    manifest = _ArtifactManifest(out_dir, on_output)
+
+    kind = opt["kind"]
+    fmt = format_override or opt["format"]
+    pp_workers = max(1, int(pp_workers or default_pp_workers()))
+
+    if clip is not None:
+        clip_start, clip_end = float(clip[0]), float(clip[1])
+        if clip_start < 0 or clip_end <= clip_start:
+            raise RuntimeError(f"Geçersiz klip aralığı: {clip_start:g}-{clip_end:g}")
+        # Klip ham akışın yalnızca bir parçası: önbelleğe girerse tam akış sanılır.
+        stream_cache = False
+
+    # ffmpeg gerektiren durumlar (klip aralığını ffmpeg indirir)
+    if kind in ("video_av", "video_only_remux", "audio_opus", "audio_transcode") or clip is not None:
+        _require_ffmpeg()
+
+    # Sonradan atılacak indirmeler yerine: seçim format kümesinde karşılanıyor mu?
+    _preflight_validate(url, kind, fmt, playlist=playlist, scanned_formats=scanned_formats, status_cb=status_cb)
+
+    # Aktarım ayarları: iş başında seçilir ve UI'a raporlanır (__TRANSFER__:...).
+    # İlk saniyelerde ölçülen hız kalıcı tahmine işlenir ve bu işin sonraki playlist öğelerine uygulanır.
+    prealloc = bool(expected_bytes) and supports_fallocate(str(out_dir))
+    transfer = choose_transfer_settings(transfer_mode, external_downloader=external_downloader, preallocate=prealloc)
+    # yt-dlp'nin kendi indiricisinde: ilk ilerleme satırındaki toplam boyut kadar .part'a yer ayrılır
+    # (aria2c bunu --file-allocation ile kendisi yapar). Hedef başına bir kez.
+    alloc_state: dict[str, Optional[str]] = {"dest": None}
+    probe = ThroughputProbe()
+    # Ölçümden sonra geçerli ayarlar (öğe başına yt-dlp'de sonraki öğelerin komutuna yazılır)
+    adapted = {"settings": transfer}
+    user_progress_cb = progress_cb
+
+    def progress_cb(p: float, speed_mbps: Optional[float] = None, eta: Optional[str] = None) -> None:
+        if transfer_mode == "adaptive" and not probe.done:
+            measured = probe.feed(speed_mbps)
+            if measured is not None:
+                record_throughput(measured)
+                adapted["settings"] = adapt_transfer_settings(transfer, measured)
+                status_cb("__TRANSFER__:" + describe_transfer(adapted["settings"], measured))
+        user_progress_cb(p, speed_mbps, eta)
+
+    status_cb("__TRANSFER__:" + describe_transfer(transfer))
+
+    label = f".{output_label}" if output_label else ""
+    if clip is not None:
+        label += f".clip-{format_timestamp(clip_start)}-{format_timestamp(clip_end)}"
+    out_tmpl = f"%(title).200B [%(id)s]{label}.%(ext)s"
+    if playlist:
+        out_tmpl = f"%(playlist)s/%(playlist_index)03d - %(title).200B [%(id)s]{label}.%(ext)s"
+
+    # MKV video çıktılarında da metadata yt-dlp'ye yeniden yazdırılmaz (çok GB'lık ikinci geçiş);
+    # birleştirme/remux bitince mkvtags ile yerinde yazılır.
+    merge_phase = {"video_av": "birleştirme", "video_only_remux": "remux"}.get(kind)
+    own_metadata = kind in _OWN_METADATA_KINDS or (merge_phase is not None and output_ext(opt) == "mkv")
+    phases = _PhaseLog()
+
+    base_cmd = [
+        ytdlp,
+        "--newline",
+        "--progress",
+        "--retries", "1000000",
+        "--fragment-retries", "1000000",
+        "--extractor-retries", "5",
+        "--retry-sleep", "5",
+        "--socket-timeout", "10",
+        # Playlist kontrolü: varsayılan tek video
+        ("--yes-playlist" if playlist else "--no-playlist"),
+        "--restrict-filenames",
+        "-P", str(out_dir),
+        "-o", out_tmpl,
+        # Temel metadata (title/artist/album) göm.
+        # --embed-metadata, --add-metadata ile eşdeğer bir alias'tır.
+        "--parse-metadata", "%(title|)s:%(meta_title)s",
+        "--parse-metadata", "%(artist,creator,uploader,channel|)s:%(meta_artist)s",
+        "--parse-metadata", "%(album,playlist_title,channel,uploader|)s:%(meta_album)s",
+        "--embed-metadata",
+        "--no-embed-chapters",
+        "--no-embed-info-json",
+        # Akış önbelleği için (video id, format_id); filepath satırından önce gelmeli.
+        "--print", "after_move:__YTDL_STREAM__:%(id)s %(format_id)s",
+        *(["--print", "after_move:__YTDL_CHAPTERS__:%(id)s %(chapters)j"] if split_chapters else []),
+        # M4A/Opus/MKV: metadata yt-dlp'ye yeniden yazdırılmaz; finalize adımında tek seferde yazılır
+        # (M4A: mp4tags yerinde, Opus: oggopus remux'u sırasında, MKV: mkvtags yerinde).
+        *(["--print", f"after_move:__YTDL_META__:%(id)s %(.{{{_META_FIELDS}}})j"] if own_metadata else []),
+        # Video: aşama süreleri (indirme / birleştirme-remux) öğe başına ölçülür.
+        *([
+            "--print", "before_dl:__YTDL_PHASE__:%(id)s dl",
+            "--print", "post_process:__YTDL_PHASE__:%(id)s pp",
+            "--print", "after_move:__YTDL_PHASE__:%(id)s done",
+        ] if merge_phase else []),
+        # Doğrulama: beklenen süre ve seçilen akışların codec'leri.
+        *(["--print", "after_move:__YTDL_VERIFY__:%(id)s %(.{duration,vcodec,acodec,playlist_index})j"] if verify_info is not None else []),
+        "--print", "after_move:filepath",
+        # Duraklatma yedek yolunda yeniden başlatırken tamamlanan öğeleri atlamak için arşiv kimliği
+        "--print", "after_move:__YTDL_ARCHIVE__:%(extractor_key)s %(id)s",
+        *transfer_args(transfer),
+        "-f", fmt,
+    ]
+    if clip is not None:
+        # Yalnızca aralığın baytları çekilir; aktarım (ve aria2c yerine) ffmpeg ile yapılır.
+        base_cmd += ["--download-sections", f"*{clip_start:.3f}-{clip_end:.3f}"]
+
+    item_plan = None
+    if playlist and playlist_control is not None:
+        status_cb("Playlist öğeleri hazırlanıyor...")
+        item_plan = _plan_playlist_items(url, playlist_items, download_archive)
 
-        # Playlist modunda: klasörde thumbnail dosyası kalmasın (tüm jpg/webp/png temizle)
-        if playlist:
+    if playlist and playlist_items and item_plan is None:
+        base_cmd += ["--playlist-items", str(playlist_items)]
+    if download_archive:
+        base_cmd += ["--download-archive", str(download_archive)]
+
+    if own_metadata:
+        base_cmd.remove("--embed-metadata")
+
+    # Akış önbelleği: yt-dlp'nin bildirdiği (video id -> format_id) eşlemesi
+    stream_ids: dict[str, str] = {}
+    # M4A metadata: video id -> yt-dlp alanları
+    meta_by_id: dict[str, dict] = {}
+    # Bölüm ayırma: video id -> bölümler (filepath satırından önce gelir)
+    chapters_by_id: dict[str, list] = {}
+
+    def on_tag(tag: str, value: str) -> None:
+        if tag == "META":
+            vid, _, raw = value.strip().partition(" ")
             try:
-                dirs = sorted({str(Path(p).parent) for p in (paths or []) if p})
-                if not dirs and out_dir:
-                    dirs = [str(Path(out_dir))]
-                for d in dirs:
-                    _cleanup_any_images_in_dir(d, recursive=False)
+                info = json.loads(raw)
             except Exception:
+                info = None
+            if vid and isinstance(info, dict):
+                meta_by_id[vid] = info
+        elif tag == "DEST":
+            manifest.destination(value)
+            alloc_state["dest"] = value
+        elif tag == "SIZE":
+            dest = alloc_state["dest"]
+            if prealloc and dest and adapted["settings"].get("downloader") != "aria2c":
+                alloc_state["dest"] = None
+                part = dest if dest.endswith(".part") else dest + ".part"
+                preallocate(part, int(value))
+        elif tag == "FRAG":
+            try:
+                manifest.fragment(int(value))
+            except ValueError:
                 pass
-
-        if cancelled:
-            _cleanup_cancel_artifacts(out_dir, job_started_ts, recursive=playlist)
-            status_cb("İptal edildi")
-            if playlist and paths:
+        elif tag == "VERIFY" and verify_info is not None:
+            vid, _, raw = value.strip().partition(" ")
+            try:
+                info = json.loads(raw)
+            except Exception:
+                info = None
+            if vid and isinstance(info, dict):
+                verify_info[vid] = info
+        elif tag == "CHAPTERS":
+            vid, _, raw = value.strip().partition(" ")
+            if vid:
+                chapters_by_id[vid] = _parse_chapters(raw, clip=(clip_start, clip_end) if clip is not None else None)
+        elif tag == "PHASE":
+            vid, _, step = value.strip().partition(" ")
+            if vid:
+                phases.mark(vid, {"dl": "indirme", "pp": merge_phase}.get(step))
+        elif tag == "STREAM":
+            vid, _, fid = value.strip().partition(" ")
+            if vid and fid:
+                stream_ids[vid] = fid
+                if stream_cache and pinned_ids is not None:
+                    pinned_ids.add(vid)
+                    streamcache.pin(vid)
+
+    def split_output(path: Optional[str], *, cancel=None) -> None:
+        if not split_chapters or not path:
+            return
+        chapters = chapters_by_id.get(_extract_video_id_from_name(Path(path).name) or "")
+        if chapters:
+            # Playlist'te öğeler zaten paralel finalize edilir: iç havuz açılmaz (worker x worker ffmpeg olmasın).
+            workers = 1 if playlist else pp_workers
+            for part in _split_into_chapters(path, chapters, cancel_event=cancel, status_cb=status_cb, workers=workers):
+                manifest.output(part)
+
+    def split_outputs(paths: list[str]) -> None:
+        split_cancel = _PostprocessCancelEvent(cancel_event, control=control, threads=ffmpeg_threads(pp_workers))
+        split_cancel.arm()
+        for p in dict.fromkeys(paths):
+            manifest.output(p)
+            split_output(p, cancel=split_cancel)
+
+    def finish_video_outputs(paths: list[str]) -> None:
+        """Birleştirilmiş/remux edilmiş çıktılara metadata yaz ve aşama özetini bildir."""
+        for p in dict.fromkeys(paths):
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            try:
+                size = os.path.getsize(p)
+            except OSError:
+                continue
+            # İndirilen akışlar ~ çıktı boyu; birleştirme/remux çıktıyı bir kez daha yazar.
+            phases.add("indirme", written=size)
+            phases.add(merge_phase, written=size)
+            if not own_metadata:
+                continue
+            tags = _tags_from_info(meta_by_id.get(_extract_video_id_from_name(Path(p).name) or ""))
+            if not tags:
+                continue
+            started = time.monotonic()
+            written = _write_mkv_tags(p, tags, cancel_event=cancel_event)
+            phases.add("metadata", time.monotonic() - started, written)
+        status_cb("__PHASES__:" + phases.summary())
+
+    def cache_source(path: str, move: bool) -> None:
+        vid = _extract_video_id_from_name(Path(path).name)
+        fid = stream_ids.get(vid or "")
+        if stream_cache and vid and fid and "+" not in fid:
+            streamcache.store(path, vid, fid, move=move)
+
+    def seed_from_cache(cmd: list[str], index: Optional[int] = None) -> list[str]:
+        """Önbellekte olan akışları yt-dlp'nin bekleyeceği dosya adlarına bağla (tek video ya da playlist öğesi)."""
+        if index is None:
+            vid = None if playlist else _video_id_from_url(url)
+            if vid is None and not playlist and pinned_ids and len(pinned_ids) == 1:
+                # Çok çıktılı işin önceki çıktısı videonun id'sini zaten öğrendi (YouTube dışı URL).
+                vid = next(iter(pinned_ids))
+            selection = ["--no-playlist"]
+        else:
+            vid = (item_plan[1] if item_plan is not None else {}).get(index)
+            selection = ["--yes-playlist", "--playlist-items", str(index)]
+        if not stream_cache or not streamcache.has_video(vid):
+            return []
+        extra = [*selection, "--restrict-filenames", "-P", str(out_dir), "-o", out_tmpl]
+        if "--merge-output-format" in cmd:
+            extra += ["--merge-output-format", cmd[cmd.index("--merge-output-format") + 1]]
+        info = resolve_streams(url, fmt, extra_args=extra)
+        if not info or info.get("id") != vid:
+            return []
+        target = Path(info["filename"])
+        if not target.is_absolute():
+            target = out_dir / target
+        streams = info["streams"]
+        seeded: list[str] = []
+        for fid, ext in streams:
+            dst = target if len(streams) == 1 else target.with_name(f"{target.stem}.f{fid}.{ext}")
+            if streamcache.materialize(vid, fid, str(dst)):
+                seeded.append(str(dst))
+                status_cb(f"Önbellekteki akış kullanılıyor ({fid})")
+        return seeded
+
+    def run_ytdlp(cmd: list[str], on_filepath: Optional[Callable[[str], None]] = None) -> tuple[int, list[str], str]:
+        keep_streams = stream_cache and kind in ("video_av", "video_only_remux")
+        if keep_streams:
+            # Birleştirme/remux kaynakları silinmesin; iş bitince önbelleğe taşınır.
+            cmd = cmd[:-1] + ["-k"] + cmd[-1:]
+        seeded = seed_from_cache(cmd)
+        result = _run_ytdlp_any(cmd, on_filepath)
+        code, paths, _last = result
+        if keep_streams and code == 0:
+            _cache_kept_streams(paths, stream_ids)
+        for p in seeded:
+            if p not in paths:
                 try:
-                    return str(Path(paths[0]).parent)
+                    Path(p).unlink(missing_ok=True)
                 except Exception:
-                    return str(out_dir)
-            return paths[-1]
+                    pass
+        return result
+
+    def _run_ytdlp_any(cmd: list[str], on_filepath: Optional[Callable[[str], None]]) -> tuple[int, list[str], str]:
+        if item_plan is not None:
+            items, entry_ids, done = item_plan
+            return _run_playlist_items(
+                cmd,
+                playlist_control=playlist_control,
+                items=items,
+                progress_cb=progress_cb,
+                status_cb=status_cb,
+                cancel_event=cancel_event,
+                on_filepath=on_filepath,
+                on_tag=on_tag,
+                control=control,
+                entry_ids=entry_ids,
+                done=done,
+                prepare_item=lambda index, item_cmd: seed_from_cache(item_cmd, index),
+                manifest=manifest,
+                rewrite_cmd=lambda item_cmd: swap_transfer_args(item_cmd, transfer, adapted["settings"]),
+            )
+        return _run_ytdlp_resumable(
+            cmd,
+            progress_cb=progress_cb,
+            status_cb=status_cb,
+            cancel_event=cancel_event,
+            on_filepath=on_filepath,
+            on_tag=on_tag,
+            control=control,
+        )
 
+    # Video + Ses (mutlaka Opus)
+    if kind == "video_av":
+        status_cb(opt["name"])
+        cmd = base_cmd + ["--merge-output-format", opt["merge_output_format"], url]
+        code, paths, last_line = run_ytdlp(cmd)
+        filepath = paths[-1] if paths else None
+        if code == 130:
+            manifest.cleanup()
+            return
+        if code != 0:
+            _raise_download_failure(code, last_line, manifest, resume_policy=resume_policy)
+        finish_video_outputs(paths)
+        split_outputs(paths)
         progress_cb(1.0)
         status_cb("İndirme tamamlandı")
         if playlist and paths:
@@ -968,124 +2703,187 @@ def download_video(
                 return str(Path(paths[0]).parent)
             except Exception:
                 return str(out_dir)
-        return paths[-1]
+        return filepath
 
-    # Ses (Opus)# Ses (Opus) — çıktı .opus olacak
-    if kind == "audio_opus":
+    # Ses (M4A / Opus / MP3 / FLAC)
+    # - M4A: sadece gerçek M4A; kapak remux ile gömülür.
+    # - Opus: çıktı .opus olacak (remux + opustags ile kapak).
+    # - FLAC: tek videoda örnek sınırlarında parçalı paralel kodlama (playlist'te öğeler zaten paralel); MP3 tek geçiş.
+    # Her öğe, yt-dlp 'after_move:filepath' satırını bastığı anda post-process aşamasına verilir;
+    # böylece playlist'lerde indirme ve finalize işlemleri üst üste biner.
+    if kind in _AUDIO_KINDS:
         status_cb(opt["name"])
-        cmd = base_cmd + ["--write-all-thumbnails", "--convert-thumbnails", "jpg", url]
-        code, paths, last_line = _run_ytdlp(cmd, progress_cb=progress_cb, status_cb=status_cb, cancel_event=cancel_event)
-
-        cancelled = (code == 130)
-        if cancelled:
-            # Playlist içinde iptal edildiğinde, yt-dlp tamamlanmış ilk öğeleri .webm olarak bırakabilir.
-            # Tamamlananları remux+kapak ile finalize ederek kullanıcı seçimi (.opus) ile uyumlu tutarız.
-            status_cb("İptal edildi (tamamlanan öğeler işleniyor…)")
+        segment_workers = 1 if playlist else pp_workers
+        # Kapak: yalnızca en iyi thumbnail (yt-dlp ağ ayarlarıyla) indirilir; gerekirse finalize çevirir.
+        cmd = base_cmd + ["--write-thumbnail", url]
+
+        def cancel_requested() -> bool:
+            return cancel_event is not None and getattr(cancel_event, "is_set", lambda: False)()
+
+        pp_cancel_event = _PostprocessCancelEvent(cancel_event, control=control, threads=ffmpeg_threads(pp_workers))
+        bad_paths: list[str] = []
+        # ReplayGain: parçalar indirme sürerken analiz edilir, etiketler albüm değeri bilinince yazılır.
+        measure = replaygain and loudness.available()
+        analyses: dict[str, Optional[loudness.TrackLoudness]] = {}
+
+        def finalize(fp: str) -> Optional[str]:
+            # Duraklatılmışsa yeni öğeye başlama (CPU/disk de serbest kalsın)
+            if control is not None and not control.wait_if_paused(pp_cancel_event):
+                raise _PostprocessCancelled()
+            vid = _extract_video_id_from_name(Path(fp).name) or ""
+            # Kapak öğenin kendi adından bulunur (klasör taranmaz); öğeler birbirinin kapağına dokunmaz.
+            cover = _cover_image(fp, cancel_event=pp_cancel_event)
+            if kind == "audio_m4a":
+                # Güvenlik: beklenen çıktı .m4a değilse (normalde --print after_move:filepath bunu sağlamalı)
+                # dokunmadan işaretle; iptal değilse iş sonunda hata verilir.
+                if Path(fp).suffix.lower() != ".m4a":
+                    bad_paths.append(fp)
+                    _remove_cover(cover)
+                    return None
+                dst = _finalize_m4a_item(
+                    fp,
+                    pp_cancel_event=pp_cancel_event,
+                    status_cb=status_cb,
+                    cache_source=cache_source,
+                    tags=_tags_from_info(meta_by_id.get(vid)),
+                    cover=cover,
+                )
+            elif kind == "audio_transcode":
+                dst = _finalize_transcode_item(
+                    fp,
+                    opt["codec"],
+                    pp_cancel_event=pp_cancel_event,
+                    status_cb=status_cb,
+                    cache_source=cache_source,
+                    workers=segment_workers,
+                    cover=cover,
+                )
+            else:
+                dst = _finalize_opus_item(
+                    fp,
+                    pp_cancel_event=pp_cancel_event,
+                    status_cb=status_cb,
+                    cache_source=cache_source,
+                    tags=_tags_from_info(meta_by_id.get(vid)),
+                    cover=cover,
+                )
+            # Bölümler de aynı post-process aşamasında (indirme sürerken) ayrılır.
+            try:
+                split_output(dst, cancel=pp_cancel_event)
+            except Exception:
+                if pp_cancel_event.is_set():
+                    raise _PostprocessCancelled()
+                raise
+            if measure and dst:
+                # ReplayGain etiketleri iş sonunda yazılır; çıktı ancak ondan sonra bitmiş sayılır.
+                analyses[dst] = loudness.analyze(dst, cancel_event=pp_cancel_event)
+            else:
+                manifest.output(dst)
+            return dst
 
-        if (not cancelled) and code != 0:
-            _cleanup_on_network_failure(code, last_line, out_dir, job_started_ts, recursive=playlist)
-            raise RuntimeError(last_line or "İndirme hatası")
+        pipeline = _PostprocessPipeline(finalize, workers=pp_workers)
+        try:
+            code, paths, last_line = run_ytdlp(cmd, on_filepath=lambda fp: pipeline.submit(fp, cancel_requested))
 
-        if not paths:
+            cancelled = (code == 130)
             if cancelled:
-                _cleanup_cancel_artifacts(out_dir, job_started_ts, recursive=playlist)
-                status_cb("İptal edildi")
+                # Kullanıcı iptal etmiş olsa bile, tamamlanmış öğeleri (varsa) post-process ederek
+                # seçilen formatın (.m4a/.opus + kapak) deterministik kalmasını sağlarız.
+                status_cb("İptal edildi (tamamlanan öğeler işleniyor…)")
+            elif code == 0:
+                # İndirme bitti: bundan sonraki iptal, kalan post-process'i durdurur.
+                pp_cancel_event.arm()
+
+            pp_error: Optional[BaseException] = None
+            try:
+                pipeline.close()
+            except _PostprocessCancelled:
+                manifest.cleanup()
                 return
-            raise RuntimeError("Opus indirildi ama dosya yolu alınamadı.")
+            except Exception as e:
+                pp_error = e
 
-        last_dst: Optional[str] = None
-        pp_cancel_event = None if cancelled else cancel_event
+            if (not cancelled) and code != 0:
+                _raise_download_failure(code, last_line, manifest, resume_policy=resume_policy)
 
-        for fp in paths:
-            if (not cancelled) and pp_cancel_event is not None and getattr(pp_cancel_event, "is_set", lambda: False)():
-                _cleanup_cancel_artifacts(out_dir, job_started_ts, recursive=playlist)
-                return
+            if pp_error is not None:
+                raise pp_error
 
-            src = Path(fp)
-            if not src.exists():
-                continue
+            if not paths:
+                if cancelled:
+                    manifest.cleanup()
+                    status_cb("İptal edildi")
+                    return
+                if kind != "audio_opus":
+                    raise RuntimeError("İndirme tamamlandı ama dosya yolu alınamadı.")
+                raise RuntimeError("Opus indirildi ama dosya yolu alınamadı.")
+
+            if bad_paths:
+                if not cancelled:
+                    raise RuntimeError("Bu içerik için M4A audio bulunamadı.")
+                paths = [p for p in paths if p not in bad_paths]
+                if not paths:
+                    manifest.cleanup()
+                    status_cb("İptal edildi")
+                    return
 
-            # Eğer yt-dlp doğrudan .opus verdiyse remux gerekmeyebilir; yine de cover embed yapılabilir.
-            if src.suffix.lower() == ".opus":
-                dst = src
-            else:
-                dst = src.with_suffix(".opus")
-                try:
-                    _ffmpeg_remux_audio_to_opus(str(src), str(dst), cancel_event=pp_cancel_event)
-                except Exception:
-                    if (not cancelled) and pp_cancel_event is not None and getattr(pp_cancel_event, "is_set", lambda: False)():
-                        _cleanup_cancel_artifacts(out_dir, job_started_ts, recursive=playlist)
-                        return
-                    raise
+            # Playlist modunda: bu işin bıraktığı thumbnail/ara dosya kalmasın (klasör taranmaz)
+            if playlist:
+                manifest.cleanup()
 
-            # Kapak (thumbnail) varsa .opus içine göm (opustags ile; re-encode yok)
-            cover = _find_cover_image(str(dst))
-            try:
-                if cover:
-                    status_cb("Kapak ekleniyor…")
-                    _try_set_cover_opus(str(dst), cover, cancel_event=pp_cancel_event)
-            except Exception:
-                # Kapak ekleme hatasında: iptal değilse sessiz geç (indirimi bozmasın).
-                if (not cancelled) and pp_cancel_event is not None and getattr(pp_cancel_event, "is_set", lambda: False)():
-                    _cleanup_cancel_artifacts(out_dir, job_started_ts, recursive=playlist)
-                    return
-            finally:
-                # Kullanıcı isteği: çıktı klasöründe thumbnail (jpg/webp/png) kalmasın.
-                try:
-                    _cleanup_cover_images(str(dst))
-                except Exception:
-                    pass
+            last_dst = pipeline.last_result
 
-            # Kaynak .webm'i temizle (dst zaten aynı dosyaysa dokunma)
-            if src != dst:
+            if measure and not cancelled and analyses:
                 try:
-                    src.unlink(missing_ok=True)
+                    _apply_replaygain(
+                        analyses,
+                        album=playlist,
+                        cancel_event=pp_cancel_event,
+                        status_cb=status_cb,
+                        workers=pp_workers,
+                    )
                 except Exception:
-                    pass
-
-            last_dst = str(dst)
+                    if pp_cancel_event.is_set():
+                        manifest.cleanup()
+                        status_cb("İptal edildi")
+                        return
+                    raise
 
-        # Playlist modunda: klasörde thumbnail dosyası kalmasın (tüm jpg/webp/png temizle)
-        if playlist:
-            try:
-                dirs = sorted({str(Path(p).parent) for p in (paths or []) if p})
-                if not dirs and out_dir:
-                    dirs = [str(Path(out_dir))]
-                for d in dirs:
-                    _cleanup_any_images_in_dir(d, recursive=False)
-            except Exception:
-                pass
+            if cancelled:
+                manifest.cleanup()
+                status_cb("İptal edildi")
+                if playlist and paths:
+                    try:
+                        return str(Path(paths[0]).parent)
+                    except Exception:
+                        return str(out_dir)
+                return last_dst or str(out_dir)
 
-        if cancelled:
-            _cleanup_cancel_artifacts(out_dir, job_started_ts, recursive=playlist)
-            status_cb("İptal edildi")
+            progress_cb(1.0)
+            status_cb("İndirme tamamlandı")
             if playlist and paths:
                 try:
                     return str(Path(paths[0]).parent)
                 except Exception:
                     return str(out_dir)
-            return last_dst or str(out_dir)
-
-        progress_cb(1.0)
-        status_cb("İndirme tamamlandı")
-        if playlist and paths:
-            try:
-                return str(Path(paths[0]).parent)
-            except Exception:
-                return str(out_dir)
-        return last_dst or paths[-1]
+            return last_dst or paths[-1]
+        finally:
+            # ReplayGain'i beklenen çıktılar: etiketler yazılsa da yazılmasa da (iptal/hata) artık bitmiş.
+            for dst in list(analyses):
+                manifest.output(dst)
 
     if kind == "video_only_remux":
         status_cb(opt["name"])
         cmd = base_cmd + ["--remux-video", opt["remux_to"], url]
-        code, paths, last_line = _run_ytdlp(cmd, progress_cb=progress_cb, status_cb=status_cb, cancel_event=cancel_event)
+        code, paths, last_line = run_ytdlp(cmd)
         filepath = paths[-1] if paths else None
         if code == 130:
-            _cleanup_cancel_artifacts(out_dir, job_started_ts, recursive=playlist)
+            manifest.cleanup()
             return
         if code != 0:
-            _cleanup_on_network_failure(code, last_line, out_dir, job_started_ts, recursive=playlist)
-            raise RuntimeError(last_line or "İndirme hatası")
+            _raise_download_failure(code, last_line, manifest, resume_policy=resume_policy)
+        finish_video_outputs(paths)
+        split_outputs(paths)
         progress_cb(1.0)
         status_cb("İndirme tamamlandı")
         if playlist and paths:
@@ -1098,17 +2896,115 @@ def download_video(
     if kind == "video_only_mp4":
         status_cb(opt["name"])
         cmd = base_cmd + [url]
-        code, paths, last_line = _run_ytdlp(cmd, progress_cb=progress_cb, status_cb=status_cb, cancel_event=cancel_event)
+        code, paths, last_line = run_ytdlp(cmd)
         filepath = paths[-1] if paths else None
         if code == 130:
-            _cleanup_cancel_artifacts(out_dir, job_started_ts, recursive=playlist)
+            manifest.cleanup()
             return
         if code != 0:
-            _cleanup_on_network_failure(code, last_line, out_dir, job_started_ts, recursive=playlist)
-            raise RuntimeError(last_line or "İndirme hatası")
+            _raise_download_failure(code, last_line, manifest, resume_policy=resume_policy)
         if filepath and Path(filepath).suffix.lower() != ".mp4":
             raise RuntimeError("Bu içerik için 1080p MP4 video-only formatı bulunamadı.")
+        split_outputs(paths)
         progress_cb(1.0)
         status_cb("İndirme tamamlandı")
         return filepath
-    raise RuntimeError("Bilinmeyen seçenek türü.")
\ No newline at end of file
+    raise RuntimeError("Bilinmeyen seçenek türü.")
+
+
+def _selector_stream_count(selector: str) -> int:
+    return len([p for p in (selector or "").split("/", 1)[0].split("+") if p.strip()])
+
+
+def output_ext(opt: dict) -> str:
+    """FORMAT_OPTIONS seçeneğinin bitmiş çıktısının uzantısı (noktasız)."""
+    kind = opt.get("kind")
+    if kind == "video_av":
+        return str(opt.get("merge_output_format") or "mkv")
+    if kind == "video_only_remux":
+        return str(opt.get("remux_to") or "mkv")
+    if kind == "audio_transcode":
+        return str(opt.get("codec") or "")
+    return {"audio_opus": "opus", "audio_m4a": "m4a", "video_only_mp4": "mp4"}.get(str(kind), str(kind))
+
+
+def download_outputs(
+    url: str,
+    output_dir: str,
+    format_keys: list[str],
+    progress_cb: Callable[[float, Optional[float], Optional[str]], None],
+    status_cb: Callable[[str], None],
+    cancel_event=None,
+    format_overrides: Optional[dict[str, str]] = None,
+    download_archive: Optional[str] = None,
+    expected_bytes: Optional[int] = None,
+    stream_cache: Optional[bool] = None,
+    **kwargs,
+) -> list[Optional[str]]:
+    """
+    Tek işte birden fazla çıktı (örn. MKV (VP9+Opus) + kapaklı .opus, ya da .opus + .m4a).
+    En çok akış gerektiren çıktı önce indirilir; ham akışlar önbelleğe alınır ve iş bitene kadar
+    sabitlenir. Sonraki çıktılar aynı akışları önbellekten bağlar, yalnızca eksik akışları indirir
+    ve kendi finalize adımlarını (merge / remux / kapak) çalıştırır.
+    stream_cache: None => yalnızca birden çok çıktı istendiğinde (ortak akışlar gerçekten yeniden
+        kullanıldığında) açık.
+    Diğer parametreler download_video'ya aynen geçer. Dönen liste format_keys sırasıyladır.
+    """
+    keys = list(dict.fromkeys(format_keys))
+    overrides = format_overrides or {}
+    for key in keys:
+        if key not in FORMAT_OPTIONS:
+            raise RuntimeError(f"Bilinmeyen format_key: {key}")
+    if stream_cache is None:
+        stream_cache = len(keys) > 1
+    if len(keys) == 1:
+        return [
+            download_video(
+                url, output_dir, keys[0], progress_cb, status_cb,
+                cancel_event=cancel_event,
+                format_override=overrides.get(keys[0]),
+                download_archive=download_archive,
+                expected_bytes=expected_bytes,
+                stream_cache=stream_cache,
+                **kwargs,
+            )
+        ]
+
+    order = sorted(keys, key=lambda k: -_selector_stream_count(overrides.get(k) or FORMAT_OPTIONS[k]["format"]))
+    results: dict[str, Optional[str]] = {}
+    used_exts: set[str] = set()
+    pinned: set[str] = set()
+    try:
+        for n, key in enumerate(order, 1):
+            if cancel_event is not None and getattr(cancel_event, "is_set", lambda: False)():
+                break
+            opt = FORMAT_OPTIONS[key]
+            ext = output_ext(opt)
+            # Aynı uzantılı ikinci çıktı (örn. iki ayrı .mkv) öncekinin üzerine yazmasın.
+            label = key if ext in used_exts else None
+            used_exts.add(ext)
+            last = n == len(order)
+
+            def pass_status(msg: str, last=last) -> None:
+                # Ara çıktılarda "tamamlandı" bildirimi işin bittiği sanılmasın.
+                if not last and msg == "İndirme tamamlandı":
+                    return
+                status_cb(msg)
+
+            status_cb(f"Çıktı {n}/{len(order)}: {opt['name']}")
+            results[key] = download_video(
+                url, output_dir, key, progress_cb, pass_status,
+                cancel_event=cancel_event,
+                format_override=overrides.get(key),
+                # Her çıktı kendi arşivini tutar; aksi halde sonraki çıktılar öğeleri "zaten indirilmiş" sayar.
+                download_archive=(download_archive if n == 1 or not download_archive else f"{download_archive}.{n}"),
+                expected_bytes=expected_bytes if n == 1 else None,
+                stream_cache=stream_cache,
+                output_label=label,
+                pinned_ids=pinned,
+                **kwargs,
+            )
+    finally:
+        if pinned:
+            streamcache.unpin_all(pinned)
+    return [results.get(k) for k in keys]
@@ -52,6 +52,7 @@ def probe_playlist(url: str, *, timeout_sec: int = 20) -> Dict[str, Any]:
       playlist_only: bool  (URL 'playlist?list=...' gibi, açık bir tek video hedeflemiyorsa)
       title: str
       count: int
+      entries: list[{"id", "ie_key"}]  (playlist sırasıyla; flat girdiler)
     """
     ytdlp = _find_ytdlp()
 
@@ -72,8 +73,12 @@ def probe_playlist(url: str, *, timeout_sec: int = 20) -> Dict[str, Any]:
     is_playlist = isinstance(entries, list)
     title = (info.get("title") or info.get("playlist_title") or "").strip()
     count = 0
+    flat_entries: List[Dict[str, str]] = []
     if is_playlist:
         count = len(entries)
+        for e in entries:
+            e = e if isinstance(e, dict) else {}
+            flat_entries.append({"id": str(e.get("id") or ""), "ie_key": str(e.get("ie_key") or "")})
         # Bazı extractor'lar count alanı döndürebilir; varsa daha güvenilir olanı al
         for k in ("playlist_count", "n_entries", "entries_count"):
             v = info.get(k)
@@ -98,9 +103,195 @@ def probe_playlist(url: str, *, timeout_sec: int = 20) -> Dict[str, Any]:
         "playlist_only": bool(playlist_only),
         "title": title,
         "count": int(count) if isinstance(count, int) else 0,
+        "entries": flat_entries,
     }
 
 
+def resolve_streams(url: str, fmt: str, *, extra_args: Optional[List[str]] = None, timeout_sec: int = 25) -> Optional[Dict[str, Any]]:
+    """
+    İndirmeden (simulate) yt-dlp'nin -f ifadesi için seçeceği akışları ve dosya adını çöz.
+    extra_args: çıktı adını etkileyen bayraklar (-P, -o, --restrict-filenames, --merge-output-format...)
+        ve öğe seçimi (--no-playlist ya da --yes-playlist --playlist-items N).
+    Dönen sözlük:
+      id: str
+      filename: str  (birleştirme/remux öncesi hedef dosya adı)
+      streams: list[(format_id, ext)]  (birden fazlaysa yt-dlp bunları '<ad>.f<format_id>.<ext>' olarak indirir)
+    Çözülemezse None.
+    """
+    ytdlp = _find_ytdlp()
+    cmd = [
+        ytdlp,
+        "--simulate",
+        "--no-warnings",
+        "-f", fmt,
+        *(extra_args or []),
+        "--print", "%(id)s\t%(format_id)s\t%(ext)s\t%(requested_formats.:.ext|)j",
+        "--print", "filename",
+        url,
+    ]
+    try:
+        proc = subprocess.run(cmd, check=False, capture_output=True, text=True, timeout=timeout_sec)
+    except subprocess.TimeoutExpired:
+        return None
+    lines = [ln for ln in (proc.stdout or "").splitlines() if ln.strip()]
+    if proc.returncode != 0 or len(lines) < 2:
+        return None
+
+    parts = lines[0].split("\t")
+    if len(parts) < 3:
+        return None
+    vid, format_id, ext = parts[0].strip(), parts[1].strip(), parts[2].strip()
+    fids = [f for f in format_id.split("+") if f]
+    exts: List[str] = []
+    if len(parts) > 3:
+        try:
+            v = json.loads(parts[3])
+            if isinstance(v, list):
+                exts = [str(x) for x in v]
+        except Exception:
+            exts = []
+    if len(fids) > 1:
+        if len(exts) != len(fids):
+            return None
+        streams = list(zip(fids, exts))
+    else:
+        streams = [(format_id, ext)]
+    return {"id": vid, "filename": lines[1].strip(), "streams": streams}
+
+
+# -f ifadesi değerlendirme (yalnızca FORMAT_OPTIONS ve override'larda kullanılan alt küme):
+# 'bestvideo[...]', 'bestaudio[...]', çıplak format_id; '+' birleştirme, '/' alternatif.
+_FILTER_RE = re.compile(r"\[([a-z_]+)\s*(!?[~^$*]?=|[<>]=?)\s*'?([^'\]]*)'?\]")
+_SELECTOR_PART_RE = re.compile(r"^(bestvideo|bestaudio|[0-9A-Za-z_-]+)((?:\[[^\]]*\])*)$")
+
+
+class UnsupportedSelector(ValueError):
+    """Format ifadesi buradaki basit değerlendiricinin desteklediği alt kümenin dışında."""
+
+
+def _filesize_hint(f: Dict[str, Any]) -> int:
+    for k in ("filesize", "filesize_approx"):
+        v = f.get(k)
+        if isinstance(v, (int, float)) and v > 0:
+            return int(v)
+    return 0
+
+
+def _match_filter(f: Dict[str, Any], key: str, op: str, value: str) -> bool:
+    negate = op.startswith("!")
+    op = op.lstrip("!")
+    actual = f.get(key)
+    if op in ("<", "<=", ">", ">=") or (op == "=" and re.fullmatch(r"\d+(?:\.\d+)?", value)):
+        try:
+            a, b = float(actual), float(value)
+        except (TypeError, ValueError):
+            return False
+        res = {"=": a == b, "<": a < b, "<=": a <= b, ">": a > b, ">=": a >= b}[op]
+        return res != negate
+    a = str(actual if actual is not None else "none").lower()
+    b = value.lower()
+    if op == "=":
+        res = a == b
+    elif op == "^=":
+        res = a.startswith(b)
+    elif op == "$=":
+        res = a.endswith(b)
+    elif op == "*=":
+        res = b in a
+    else:  # "~="
+        res = re.search(b, a) is not None
+    return res != negate
+
+
+def select_format(formats: List[Dict[str, Any]], part: str) -> Optional[Dict[str, Any]]:
+    """Tek selector parçasını (bestvideo[height=1080], bestaudio[acodec=opus] ya da format_id) karşılayan en büyük format."""
+    part = part.strip()
+    m = _SELECTOR_PART_RE.match(part)
+    if not m:
+        raise UnsupportedSelector(part)
+    base, brackets = m.group(1), m.group(2)
+    filters = _FILTER_RE.findall(brackets)
+    if len(filters) != brackets.count("["):
+        raise UnsupportedSelector(part)
+    if base not in ("bestvideo", "bestaudio"):
+        if filters:
+            raise UnsupportedSelector(part)
+        by_id = [f for f in formats if str(f.get("format_id") or "") == base]
+        return by_id[0] if by_id else None
+    cands = []
+    for f in formats:
+        vcodec = str(f.get("vcodec") or "none").lower()
+        acodec = str(f.get("acodec") or "none").lower()
+        if base == "bestvideo" and vcodec == "none":
+            continue
+        if base == "bestaudio" and acodec == "none":
+            continue
+        if all(_match_filter(f, k, op, v) for k, op, v in filters):
+            cands.append(f)
+    if not cands:
+        return None
+    return max(cands, key=_filesize_hint)
+
+
+def match_selector(formats: List[Dict[str, Any]], selector: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    -f ifadesini taranan formatlara karşı değerlendir: '/' alternatiflerinden ilk karşılananın
+    formatlarını döndürür; hiçbiri karşılanmıyorsa None. Desteklenmeyen ifade => UnsupportedSelector.
+    """
+    fmts = [f for f in (formats or []) if isinstance(f, dict)]
+    for alt in (selector or "").split("/"):
+        parts = [p for p in alt.split("+") if p.strip()]
+        if not parts:
+            continue
+        chosen = [select_format(fmts, p) for p in parts]
+        if all(c is not None for c in chosen):
+            return chosen  # type: ignore[return-value]
+    return None
+
+
+def expand_playlist_items(spec: Optional[str], count: int) -> List[int]:
+    """
+    yt-dlp --playlist-items girdisini 1 tabanlı indeks listesine çevir (playlist sırasıyla, tekrarsız).
+    Desteklenen biçimler: "3", "1:5", "1-5", "2:10:2", "-3:" (sondan), "5:" / ":5" (açık uç).
+    spec boşsa tüm öğeler (1..count). Açık uç/negatif indeks için count gerekir.
+    """
+    s = (spec or "").strip()
+    if not s:
+        return list(range(1, max(0, int(count)) + 1))
+
+    def resolve(v: str, default: int) -> int:
+        v = v.strip()
+        if not v:
+            return default
+        n = int(v)
+        if n < 0:
+            n = count + 1 + n
+        return n
+
+    out: List[int] = []
+    seen = set()
+    for part in [p.strip() for p in s.split(",") if p.strip()]:
+        try:
+            if ":" in part or re.match(r"^\d+-\d+$", part):
+                bits = part.split(":") if ":" in part else part.split("-", 1)
+                start = resolve(bits[0], 1)
+                end = resolve(bits[1], count) if len(bits) > 1 else count
+                step = int(bits[2]) if len(bits) > 2 and bits[2].strip() else 1
+                if step == 0:
+                    continue
+                rng = range(start, end + 1, step) if step > 0 else range(start, end - 1, step)
+            else:
+                rng = [resolve(part, 0)]
+        except ValueError:
+            continue
+        for i in rng:
+            if i <= 0 or (count and i > count) or i in seen:
+                continue
+            seen.add(i)
+            out.append(i)
+    return out
+
+
 def get_formats(url: str, *, timeout_sec: int = 25) -> Tuple[List[Dict[str, Any]], str]:
     """Tek video için formatları getir (playlist kapalı)."""
     ytdlp = _find_ytdlp()
@@ -0,0 +1,77 @@
+import struct
+from typing import BinaryIO, Optional
+
+# Görsel boyutunu süreç başlatmadan (ffprobe olmadan) başlıktan okur:
+# - PNG: IHDR, WebP: VP8/VP8L/VP8X başlığı (ilk 30 bayt).
+# - JPEG: segmentler uzunluklarıyla atlanarak SOF işaretçisine gidilir; EXIF/ICC gibi büyük segmentler
+#   okunmaz, yalnızca segment başlıkları (birkaç bayt) okunur.
+# Tanınmayan biçimde None döner; çağıran gerekirse ffprobe'a düşer.
+
+_PNG_SIG = b"\x89PNG\r\n\x1a\n"
+# SOF0..SOF15 (DHT=C4, JPG=C8, DAC=CC hariç)
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+_JPEG_MAX_SEGMENTS = 256
+
+
+def _jpeg_dimensions(f: BinaryIO) -> Optional[tuple[int, int]]:
+    f.seek(2)
+    for _ in range(_JPEG_MAX_SEGMENTS):
+        b = f.read(1)
+        while b == b"\xff":
+            b = f.read(1)  # dolgu baytları
+            if b != b"\xff":
+                break
+        else:
+            return None
+        if not b:
+            return None
+        marker = b[0]
+        if marker == 0xD8 or marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            continue  # uzunluksuz işaretçiler
+        if marker in (0xD9, 0xDA):
+            return None  # SOF'tan önce görüntü verisi/sonu
+        head = f.read(2)
+        if len(head) != 2:
+            return None
+        length = struct.unpack(">H", head)[0]
+        if length < 2:
+            return None
+        if marker in _JPEG_SOF:
+            sof = f.read(5)
+            if len(sof) != 5:
+                return None
+            height, width = struct.unpack(">xHH", sof)
+            return (width, height) if width and height else None
+        f.seek(length - 2, 1)
+    return None
+
+
+def _webp_dimensions(head: bytes) -> Optional[tuple[int, int]]:
+    chunk = head[12:16]
+    if chunk == b"VP8 " and len(head) >= 30 and head[23:26] == b"\x9d\x01\x2a":
+        w, h = struct.unpack_from("<HH", head, 26)
+        return w & 0x3FFF, h & 0x3FFF
+    if chunk == b"VP8L" and len(head) >= 25 and head[20] == 0x2F:
+        bits = struct.unpack_from("<I", head, 21)[0]
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X" and len(head) >= 30:
+        w = int.from_bytes(head[24:27], "little") + 1
+        h = int.from_bytes(head[27:30], "little") + 1
+        return w, h
+    return None
+
+
+def dimensions(path: str) -> Optional[tuple[int, int]]:
+    """(genişlik, yükseklik); biçim tanınmazsa ya da başlık bozuksa None."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(32)
+            if head[:8] == _PNG_SIG and head[12:16] == b"IHDR" and len(head) >= 24:
+                return struct.unpack_from(">II", head, 16)
+            if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+                return _webp_dimensions(head)
+            if head[:3] == b"\xff\xd8\xff":
+                return _jpeg_dimensions(f)
+    except (OSError, struct.error):
+        return None
+    return None
@@ -0,0 +1,428 @@
+import os
+import json
+import signal
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Iterator, Optional
+
+from . import staging
+from .utils import get_data_dir
+
+# İş kontrolü (duraklat / devam):
+# - yt-dlp ve ffmpeg kendi process gruplarında çalışır (start_new_session=True); duraklatma
+#   tüm kayıtlı gruplara SIGSTOP, devam SIGCONT gönderir. Aktarım durumu (.part, açık dosyalar)
+#   olduğu gibi kalır.
+# - Yedek yol ("stop"): SIGSTOP desteklenmiyorsa, açıkça istenirse veya duraklatma stop_after_s
+#   saniyeden uzun sürerse yt-dlp temiz şekilde durdurulur (.part/.ytdl korunur); devam edilince
+#   aynı komut yeniden çalıştırılır ve yt-dlp kaldığı yerden sürdürür.
+
+
+class JobControl:
+    """Tek bir indirme işi için duraklat/devam kontrolü (thread-safe)."""
+
+    def __init__(self, *, stop_after_s: Optional[float] = 60.0):
+        self.stop_after_s = stop_after_s
+        self._lock = threading.Lock()
+        self._groups: set[int] = set()
+        self._resumed = threading.Event()
+        self._resumed.set()
+        self._paused_at: Optional[float] = None
+        self._hard_stop = False
+
+    # ---- durum ----
+    def is_paused(self) -> bool:
+        return not self._resumed.is_set()
+
+    def stop_requested(self) -> bool:
+        """yt-dlp durdurulmalı mı? (yedek yol: .part korunur, devamda yeniden başlatılır)"""
+        with self._lock:
+            if self._resumed.is_set():
+                return False
+            if self._hard_stop:
+                return True
+            if self.stop_after_s is not None and self._paused_at is not None:
+                return (time.monotonic() - self._paused_at) >= float(self.stop_after_s)
+            return False
+
+    # ---- process grupları ----
+    def register(self, pgid: int) -> None:
+        with self._lock:
+            self._groups.add(int(pgid))
+            paused = not self._resumed.is_set()
+        if paused:
+            # Duraklatma sırasında başlayan süreç de hemen beklemeye alınsın.
+            _signal_group(pgid, signal.SIGSTOP)
+
+    def unregister(self, pgid: int) -> None:
+        with self._lock:
+            self._groups.discard(int(pgid))
+
+    # ---- kontrol ----
+    def pause(self, *, stop: bool = False) -> None:
+        """İşi duraklat. stop=True => SIGSTOP yerine temiz durdurma (yedek yol)."""
+        with self._lock:
+            if self._resumed.is_set():
+                self._paused_at = time.monotonic()
+            self._resumed.clear()
+            groups = list(self._groups)
+            if stop:
+                self._hard_stop = True
+        if stop:
+            return
+        for pgid in groups:
+            if not _signal_group(pgid, signal.SIGSTOP):
+                with self._lock:
+                    self._hard_stop = True
+
+    def resume(self) -> None:
+        with self._lock:
+            groups = list(self._groups)
+            self._paused_at = None
+            self._hard_stop = False
+            self._resumed.set()
+        for pgid in groups:
+            _signal_group(pgid, signal.SIGCONT)
+
+    def wait_if_paused(self, cancel_event=None, *, poll_s: float = 0.2) -> bool:
+        """Duraklatılmışsa devam edilene kadar bekle. İptal edilirse False döner."""
+        while not self._resumed.wait(poll_s):
+            if cancel_event is not None and getattr(cancel_event, "is_set", lambda: False)():
+                return False
+        return True
+
+    def release_group(self, pgid: int) -> None:
+        """Sonlandırılacak süreç duraklatılmışsa sinyalleri işleyebilmesi için devam ettir."""
+        _signal_group(pgid, signal.SIGCONT)
+
+
+def _signal_group(pgid: int, sig: int) -> bool:
+    try:
+        os.killpg(int(pgid), sig)
+        return True
+    except Exception:
+        return False
+
+
+# ---------------------------
+# Sürdürme günlüğü (journal)
+# ---------------------------
+# Her indirme işi başlarken spec'i (url, format, klasör, playlist...) kalıcı olarak yazılır ve iş
+# bitince/iptal edilince silinir. Ağ kopmasıyla yarım kalan iş "interrupted" işaretlenir; uygulama
+# kapanır/çökerse kayıt "running" olarak kalır. Açılışta bu kayıtlardan .part/.ytdl ya da arşiv
+# durumu hâlâ diskte olanlar sürdürme için önerilir. İş başına bir --download-archive dosyası
+# tutulur; böylece sürdürmede tamamlanmış playlist öğeleri yeniden indirilmez.
+
+_JOURNAL_LOCK = threading.Lock()
+_JOURNAL_MAX_AGE_S = 14 * 24 * 3600
+_PARTIAL_PATTERNS = ("*.part", "*.part-Frag*", "*.ytdl")
+
+
+def _journal_path() -> str:
+    return os.path.join(get_data_dir(), "jobs.json")
+
+
+def get_jobs_dir() -> str:
+    d = os.path.join(get_data_dir(), "jobs")
+    os.makedirs(d, exist_ok=True)
+    return d
+
+
+def job_archive_path(job_id: str) -> str:
+    """İşe özel yt-dlp --download-archive dosyası."""
+    return os.path.join(get_jobs_dir(), f"{job_id}.archive")
+
+
+def _read_journal() -> dict:
+    try:
+        with open(_journal_path(), "r", encoding="utf-8") as f:
+            data = json.load(f) or {}
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+
+def _write_journal(data: dict) -> None:
+    try:
+        path = _journal_path()
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+    except Exception:
+        pass
+
+
+def journal_add(spec: dict) -> str:
+    """Yeni işi 'running' olarak kaydet; job_id döndürür."""
+    job_id = uuid.uuid4().hex[:12]
+    entry = dict(spec)
+    entry.update({"job_id": job_id, "state": "running", "started_ts": time.time()})
+    with _JOURNAL_LOCK:
+        data = _read_journal()
+        data[job_id] = entry
+        _write_journal(data)
+    return job_id
+
+
+def journal_get(job_id: str) -> Optional[dict]:
+    with _JOURNAL_LOCK:
+        entry = _read_journal().get(job_id)
+    return dict(entry) if isinstance(entry, dict) else None
+
+
+def journal_update(job_id: str, **fields) -> None:
+    with _JOURNAL_LOCK:
+        data = _read_journal()
+        entry = data.get(job_id)
+        if not isinstance(entry, dict):
+            return
+        entry.update(fields)
+        _write_journal(data)
+
+
+def journal_remove(job_id: str) -> None:
+    """İş bitti/iptal edildi: kaydı ve arşiv dosyalarını (çok çıktılı işte çıktı başına bir tane) sil."""
+    with _JOURNAL_LOCK:
+        data = _read_journal()
+        data.pop(job_id, None)
+        _write_journal(data)
+    archive = Path(job_archive_path(job_id))
+    for p in [archive, *archive.parent.glob(archive.name + ".*")]:
+        try:
+            p.unlink()
+        except Exception:
+            pass
+
+
+def _staged_partial_files(entry: dict) -> Iterator[Path]:
+    """Ara dizinli işte .part/.ytdl dosyaları hedefte değil, işin ara dizinindedir."""
+    root = entry.get("staging_dir")
+    if not root:
+        return
+    url = str(entry.get("url") or "")
+    out_dir = str(entry.get("output_dir") or "")
+    for key in [entry.get("format_key"), *(entry.get("extra_format_keys") or [])]:
+        if not key:
+            continue
+        # Çok çıktılı işte aynı uzantılı çıktı format anahtarıyla etiketlenir.
+        for label in (None, key):
+            d = staging.stage_dir(str(root), staging.job_key(out_dir, url, str(key), label))
+            try:
+                if d.is_dir():
+                    yield from (p for pat in _PARTIAL_PATTERNS for p in d.rglob(pat) if p.is_file())
+            except OSError:
+                continue
+
+
+def _partial_files(entry: dict) -> Iterator[Path]:
+    """İşin diskte kalan kısmi dosyaları (ara dizin ve hedef klasör)."""
+    yield from _staged_partial_files(entry)
+    out_dir = Path(str(entry.get("output_dir") or "")).expanduser()
+    if not out_dir.is_dir():
+        return
+    # Playlist çıktıları bir alt klasörde (playlist adı) olur.
+    prefixes = ("", "*/") if entry.get("playlist") else ("",)
+    try:
+        for pre in prefixes:
+            for pat in _PARTIAL_PATTERNS:
+                for p in out_dir.glob(pre + pat):
+                    if p.is_file() and p.stat().st_mtime >= float(entry.get("started_ts") or 0) - 2:
+                        yield p
+    except Exception:
+        return
+
+
+def _archived_count(job_id: str) -> int:
+    try:
+        with open(job_archive_path(job_id), "r", encoding="utf-8") as f:
+            return sum(1 for line in f if line.strip())
+    except Exception:
+        return 0
+
+
+def _has_partial_state(entry: dict) -> bool:
+    if _archived_count(str(entry.get("job_id"))) > 0:
+        return True
+    return next(_partial_files(entry), None) is not None
+
+
+def remaining_bytes(entry: dict) -> Optional[int]:
+    """
+    Sürdürülen işin hâlâ gereken disk alanı: tahminden arşivdeki (tamamlanmış) öğelerin payı ve
+    diskteki kısmi dosyaların boyu düşülür (aria2c ön ayırması dahil, bu baytlar zaten diskte).
+    Tahmin yoksa None.
+    """
+    expected = entry.get("expected_bytes")
+    if not isinstance(expected, (int, float)) or expected <= 0:
+        return None
+    total = int(entry.get("selected_total") or 0) or 1
+    done = min(_archived_count(str(entry.get("job_id"))), total)
+    remaining = float(expected) * (total - done) / total
+    for p in _partial_files(entry):
+        try:
+            remaining -= p.stat().st_size
+        except OSError:
+            pass
+    return max(0, int(remaining))
+
+
+def find_resumable_jobs() -> list[dict]:
+    """
+    Sürdürülebilir işler (en yeni önce).
+    Diskte kısmi durumu kalmayan veya çok eski kayıtlar günlükten temizlenir.
+    """
+    now = time.time()
+    with _JOURNAL_LOCK:
+        data = _read_journal()
+    keep: list[dict] = []
+    stale: list[str] = []
+    for job_id, entry in data.items():
+        if not isinstance(entry, dict) or not entry.get("url"):
+            stale.append(job_id)
+            continue
+        if now - float(entry.get("started_ts") or 0) > _JOURNAL_MAX_AGE_S or not _has_partial_state(entry):
+            stale.append(job_id)
+            continue
+        keep.append(dict(entry))
+    for job_id in stale:
+        journal_remove(job_id)
+    keep.sort(key=lambda e: float(e.get("started_ts") or 0), reverse=True)
+    return keep
+
+
+# ---------------------------
+# Playlist öğe kontrolü
+# ---------------------------
+# Playlist işleri öğe başına ayrı bir yt-dlp çalıştırmasıyla indirilir (--playlist-items N); her öğe
+# bağımsız olarak atlanabilir, öne alınabilir veya (başarısız/atlanmışsa) yeniden kuyruğa alınabilir.
+# Öğeler playlist sırasındaki indeksleriyle (1'den başlar) anılır.
+
+ITEM_PENDING = "pending"
+ITEM_RUNNING = "running"
+ITEM_DONE = "done"
+ITEM_FAILED = "failed"
+ITEM_SKIPPED = "skipped"
+
+
+class PlaylistControl:
+    """Çalışan playlist işindeki öğelerin sırası ve durumu (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue: list[int] = []
+        self._state: dict[int, str] = {}
+        self._deferred: dict[int, int] = {}
+        self._current: Optional[int] = None
+        self._skip_current = False
+
+    def set_items(self, items: list[int], *, done: Optional[set[int]] = None) -> None:
+        """Öğe listesini (sırasıyla) yükle. done: zaten tamamlanmış öğeler (örn. arşivde olanlar)."""
+        with self._lock:
+            self._queue = []
+            self._state = {}
+            self._deferred = {}
+            for i in items:
+                i = int(i)
+                if i in self._state:
+                    continue
+                if done and i in done:
+                    self._state[i] = ITEM_DONE
+                    continue
+                self._state[i] = ITEM_PENDING
+                self._queue.append(i)
+
+    # ---- runner tarafı ----
+    def next_item(self) -> Optional[int]:
+        """Sıradaki bekleyen öğeyi 'running' yap ve döndür; kalmadıysa None."""
+        with self._lock:
+            if not self._queue:
+                self._current = None
+                return None
+            i = self._queue.pop(0)
+            self._state[i] = ITEM_RUNNING
+            self._current = i
+            self._skip_current = False
+            return i
+
+    def current(self) -> Optional[int]:
+        with self._lock:
+            return self._current
+
+    def skip_requested(self, index: int) -> bool:
+        with self._lock:
+            return self._skip_current and self._current == int(index)
+
+    def finish(self, index: int, state: str) -> None:
+        with self._lock:
+            index = int(index)
+            self._state[index] = state
+            if self._current == index:
+                self._current = None
+                self._skip_current = False
+
+    def defer(self, index: int, *, limit: int = 1) -> bool:
+        """Takılan öğeyi kuyruğun sonuna al. limit kez ertelenmişse başarısız sayar ve False döner."""
+        with self._lock:
+            index = int(index)
+            n = self._deferred.get(index, 0) + 1
+            self._deferred[index] = n
+            if self._current == index:
+                self._current = None
+                self._skip_current = False
+            if n > limit:
+                self._state[index] = ITEM_FAILED
+                return False
+            self._state[index] = ITEM_PENDING
+            if index not in self._queue:
+                self._queue.append(index)
+            return True
+
+    # ---- kullanıcı tarafı ----
+    def skip(self, index: Optional[int] = None) -> bool:
+        """Öğeyi atla. index=None => şu an indirilen öğe. Bekleyen öğe kuyruktan çıkarılır."""
+        with self._lock:
+            if index is None or index == self._current:
+                if self._current is None:
+                    return False
+                self._skip_current = True
+                return True
+            index = int(index)
+            if self._state.get(index) != ITEM_PENDING:
+                return False
+            self._queue.remove(index)
+            self._state[index] = ITEM_SKIPPED
+            return True
+
+    def prioritize(self, index: int) -> bool:
+        """Bekleyen öğeyi kuyruğun başına al (şu anki öğe bittikten sonra indirilir)."""
+        with self._lock:
+            index = int(index)
+            if self._state.get(index) != ITEM_PENDING:
+                return False
+            self._queue.remove(index)
+            self._queue.insert(0, index)
+            return True
+
+    def retry(self, index: int) -> bool:
+        """Başarısız/atlanmış öğeyi yeniden kuyruğa al (sona)."""
+        with self._lock:
+            index = int(index)
+            if self._state.get(index) not in (ITEM_FAILED, ITEM_SKIPPED):
+                return False
+            self._state[index] = ITEM_PENDING
+            self._deferred.pop(index, None)
+            self._queue.append(index)
+            return True
+
+    def items_in_state(self, state: str) -> list[int]:
+        with self._lock:
+            return sorted(i for i, s in self._state.items() if s == state)
+
+    def counts(self) -> dict[str, int]:
+        with self._lock:
+            out: dict[str, int] = {}
+            for s in self._state.values():
+                out[s] = out.get(s, 0) + 1
+            return out
@@ -0,0 +1,157 @@
+import os
+import signal
+import subprocess
+from typing import Optional
+
+try:
+    import numpy as np
+except ImportError:  # numpy opsiyonel: yoksa ReplayGain aşaması devre dışı
+    np = None
+
+# ReplayGain 2.0 / EBU R128 ses yüksekliği analizi:
+# - ffmpeg dosyayı çözer, 48 kHz'e örnekler ve K-ağırlıklama (BS.1770 iki biquad) uygular; ham ve
+#   ağırlıklı kanallar yan yana f32le olarak pipe'tan okunur.
+# - NumPy büyük bloklarla (CHUNK_S saniye) 100 ms'lik enerji dilimleri ve sample peak hesaplar;
+#   parça hiçbir zaman tamamen belleğe alınmaz (saklanan: saniyede 10 float).
+# - 400 ms bloklar (%75 örtüşme) mutlak (-70 LUFS) ve göreli (-10 LU) kapıdan geçirilir.
+# - Albüm (playlist) değeri tüm parçaların blokları birlikte kapılanarak bulunur.
+
+RATE = 48000
+REFERENCE_LUFS = -18.0  # ReplayGain 2.0 referansı
+R128_REFERENCE_LUFS = -23.0  # Opus R128_*_GAIN etiketleri bu referansa göredir
+CHUNK_S = 10
+_SEG = RATE // 10  # 100 ms
+_K_WEIGHTING = (
+    "biquad=b0=1.53512485958697:b1=-2.69169618940638:b2=1.19839281085285:a0=1:a1=-1.69065929318241:a2=0.73248077421585,"
+    "biquad=b0=1.0:b1=-2.0:b2=1.0:a0=1:a1=-1.99004745483398:a2=0.99007225036621"
+)
+
+
+def available() -> bool:
+    return np is not None
+
+
+class TrackLoudness:
+    """Bir parçanın 100 ms enerji dilimleri (kanal toplamı) ve sample peak değeri."""
+
+    def __init__(self, segments, peak: float):
+        self.segments = segments
+        self.peak = float(peak)
+
+    def blocks(self):
+        """400 ms bloklar (100 ms adım): ardışık 4 dilimin ortalaması."""
+        s = self.segments
+        if len(s) < 4:
+            return s[:0]
+        c = np.concatenate(([0.0], np.cumsum(s)))
+        return (c[4:] - c[:-4]) / 4.0
+
+    @property
+    def loudness(self) -> Optional[float]:
+        return gated_loudness([self])
+
+
+def gated_loudness(tracks: list[TrackLoudness]) -> Optional[float]:
+    """BS.1770 kapılı (integrated) ses yüksekliği, LUFS. Kapıdan blok geçmezse None."""
+    blocks = [t.blocks() for t in tracks]
+    z = np.concatenate(blocks) if blocks else np.zeros(0)
+    if not len(z):
+        return None
+    z = z[z > 10 ** ((-70.0 + 0.691) / 10)]
+    if not len(z):
+        return None
+    relative = -0.691 + 10 * np.log10(z.mean()) - 10.0
+    z = z[z > 10 ** ((relative + 0.691) / 10)]
+    if not len(z):
+        return None
+    return float(-0.691 + 10 * np.log10(z.mean()))
+
+
+def _channel_count(path: str) -> int:
+    try:
+        proc = subprocess.run(
+            ["ffprobe", "-v", "error", "-select_streams", "a:0", "-show_entries", "stream=channels", "-of", "default=nw=1:nk=1", path],
+            check=False,
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+        return max(1, int((proc.stdout or "").strip()))
+    except Exception:
+        return 2
+
+
+def analyze(path: str, *, cancel_event=None) -> Optional[TrackLoudness]:
+    """
+    Dosyanın ilk ses akışını analiz et. İptal/hata durumunda None.
+    cancel_event bir JobControl taşıyorsa (cancel_event.control) ffmpeg duraklat/devam için kaydedilir.
+    """
+    if np is None:
+        return None
+    ch = _channel_count(path)
+    if ch > 2:
+        ch = 2  # çok kanallı kaynaklar stereo'ya indirilir (yaklaşık)
+        pre = f"aformat=sample_fmts=dbl:sample_rates={RATE}:channel_layouts=stereo"
+    else:
+        pre = f"aformat=sample_fmts=dbl:sample_rates={RATE}"
+    graph = f"[0:a:0]{pre},asplit[raw][k];[k]{_K_WEIGHTING}[kw];[raw][kw]amerge=inputs=2[out]"
+    cmd = ["ffmpeg", "-v", "error", "-nostdin", "-i", path, "-filter_complex", graph, "-map", "[out]", "-f", "f32le", "-"]
+
+    control = getattr(cancel_event, "control", None)
+    threads = getattr(cancel_event, "threads", None)
+    if threads:
+        # Paralel finalize worker'larıyla birlikte çekirdekler aşırı paylaştırılmasın.
+        cmd[1:1] = ["-filter_threads", str(int(threads))]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, start_new_session=True)
+    if control is not None:
+        control.register(proc.pid)
+
+    width = 2 * ch
+    frame_bytes = width * 4
+    chunk_bytes = CHUNK_S * RATE * frame_bytes
+    parts = []
+    peak = 0.0
+    rest = np.zeros((0, ch), dtype=np.float32)
+    ok = False
+    try:
+        while True:
+            if cancel_event is not None and getattr(cancel_event, "is_set", lambda: False)():
+                return None
+            buf = proc.stdout.read(chunk_bytes)
+            if not buf:
+                break
+            usable = len(buf) - len(buf) % frame_bytes
+            frames = np.frombuffer(buf[:usable], dtype=np.float32).reshape(-1, width)
+            peak = max(peak, float(np.abs(frames[:, :ch]).max(initial=0.0)))
+            kw = np.concatenate((rest, frames[:, ch:]))
+            n = len(kw) // _SEG * _SEG
+            if n:
+                sq = kw[:n].astype(np.float64) ** 2
+                parts.append(sq.reshape(-1, _SEG, ch).mean(axis=1).sum(axis=1))
+            rest = kw[n:]
+        ok = proc.wait() == 0
+    finally:
+        if proc.poll() is None:
+            try:
+                os.killpg(proc.pid, signal.SIGTERM)
+            except Exception:
+                proc.terminate()
+            proc.wait()
+        if control is not None:
+            control.unregister(proc.pid)
+    if not ok:
+        return None
+    segments = np.concatenate(parts) if parts else np.zeros(0)
+    return TrackLoudness(segments, peak)
+
+
+def replaygain(loudness: Optional[float]) -> Optional[float]:
+    """Kazanç (dB) = referans - ölçülen."""
+    return None if loudness is None else REFERENCE_LUFS - loudness
+
+
+def r128_gain(loudness: Optional[float]) -> Optional[int]:
+    """Opus R128_*_GAIN: -23 LUFS'a göre Q7.8 tamsayı (RFC 7845)."""
+    if loudness is None:
+        return None
+    return max(-32768, min(32767, int(round((R128_REFERENCE_LUFS - loudness) * 256))))
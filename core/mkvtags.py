@@ -0,0 +1,401 @@
+import os
+import zlib
+from typing import BinaryIO, Optional
+
+# Matroska (MKV) etiketlerini yerinde yazan küçük EBML düzenleyici:
+# - Yalnızca Tags, Info (başlık) ve SeekHead yeniden kurulur; Cluster'lar (ses/görüntü) okunmaz/yazılmaz.
+# - Yeni eleman eskisinin (ve hemen ardındaki Void'lerin) yerine sığarsa yerinde yazılır, artan alan
+#   Void yapılır. Sığmayan Tags dosya sonuna eklenir, eskisi Void yapılır; Segment boyutu ve SeekHead
+#   girdileri güncellenir. Info taşınmaz: başlık sığmazsa Tags'e TITLE olarak yazılır.
+# - Void'e çevirmek için yalnızca eleman başlığı yazılır; eski içerik Void'in içeriği olarak kalır.
+# - CRC-32 taşıyan elemanların CRC'si yeniden hesaplanır.
+# Yapılamıyorsa MkvEditError; bu durumda dosyaya hiçbir şey yazılmamış olur.
+
+_EBML = 0x1A45DFA3
+_SEGMENT = 0x18538067
+_SEEKHEAD = 0x114D9B74
+_SEEK = 0x4DBB
+_SEEK_ID = 0x53AB
+_SEEK_POSITION = 0x53AC
+_INFO = 0x1549A966
+_TITLE = 0x7BA9
+_TAGS = 0x1254C367
+_TAG = 0x7373
+_TARGETS = 0x63C0
+_TARGET_TYPE_VALUE = 0x68CA
+_TARGET_UIDS = {0x63C5, 0x63C9, 0x63C4, 0x63C6}
+_SIMPLE_TAG = 0x67C8
+_TAG_NAME = 0x45A3
+_TAG_STRING = 0x4487
+_CLUSTER = 0x1F43B675
+_VOID = 0xEC
+_CRC32 = 0xBF
+
+# Anahtar => Matroska SimpleTag adı (ffmpeg'in --embed-metadata ile yazdığı adlar)
+TAG_NAMES = {
+    "title": "TITLE",
+    "artist": "ARTIST",
+    "album": "ALBUM",
+    "album_artist": "ALBUM_ARTIST",
+    "date": "DATE",
+    "comment": "COMMENT",
+    "description": "DESCRIPTION",
+    "genre": "GENRE",
+    "composer": "COMPOSER",
+}
+
+
+class MkvEditError(RuntimeError):
+    """Dosya yerinde düzenlenemiyor (yapı tanınmadı ya da eleman yerleştirilemiyor)."""
+
+
+# ---------- EBML ----------
+
+def _read_vint(f: BinaryIO, *, keep_marker: bool) -> tuple[Optional[int], int]:
+    """(değer, uzunluk). Dosya sonunda (None, 0); 'bilinmeyen boyut' için değer -1."""
+    first = f.read(1)
+    if not first:
+        return None, 0
+    b0 = first[0]
+    length = 1
+    while length <= 8 and not (b0 & (0x80 >> (length - 1))):
+        length += 1
+    if length > 8:
+        raise MkvEditError("Geçersiz EBML vint.")
+    rest = f.read(length - 1)
+    if len(rest) != length - 1:
+        return None, 0
+    value = int.from_bytes(first + rest, "big")
+    if not keep_marker:
+        value &= (1 << (7 * length)) - 1
+        if value == (1 << (7 * length)) - 1:
+            return -1, length
+    return value, length
+
+
+def _children(data: bytes) -> list[tuple[int, bytes]]:
+    """Bellekteki kapsayıcının alt elemanları: (id, içerik)."""
+    out = []
+    pos = 0
+    n = len(data)
+    while pos < n:
+        b0 = data[pos]
+        ilen = 1
+        while ilen <= 4 and not (b0 & (0x80 >> (ilen - 1))):
+            ilen += 1
+        if ilen > 4 or pos + ilen >= n:
+            raise MkvEditError("Bozuk EBML elemanı.")
+        eid = int.from_bytes(data[pos:pos + ilen], "big")
+        pos += ilen
+        s0 = data[pos]
+        slen = 1
+        while slen <= 8 and not (s0 & (0x80 >> (slen - 1))):
+            slen += 1
+        if slen > 8:
+            raise MkvEditError("Bozuk EBML elemanı.")
+        size = int.from_bytes(data[pos:pos + slen], "big") & ((1 << (7 * slen)) - 1)
+        pos += slen
+        if pos + size > n:
+            raise MkvEditError("Bozuk EBML elemanı.")
+        out.append((eid, data[pos:pos + size]))
+        pos += size
+    return out
+
+
+def _id_bytes(eid: int) -> bytes:
+    return eid.to_bytes((eid.bit_length() + 7) // 8, "big")
+
+
+def _size_vint(n: int, length: Optional[int] = None) -> bytes:
+    if length is None:
+        length = 1
+        while n >= (1 << (7 * length)) - 1:
+            length += 1
+    if length > 8 or n >= (1 << (7 * length)) - 1:
+        raise MkvEditError("EBML boyutu alana sığmıyor.")
+    return ((1 << (7 * length)) | n).to_bytes(length, "big")
+
+
+def _element(eid: int, payload: bytes) -> bytes:
+    return _id_bytes(eid) + _size_vint(len(payload)) + payload
+
+
+def _uint_bytes(n: int) -> bytes:
+    return n.to_bytes(max(1, (n.bit_length() + 7) // 8), "big")
+
+
+def _void_header(total: int) -> bytes:
+    """total baytlık bir Void'in başlığı (içerik olduğu gibi bırakılır). total >= 2 olmalı."""
+    if total >= 9:
+        return bytes([_VOID]) + _size_vint(total - 9, 8)
+    return bytes([_VOID]) + _size_vint(total - 2, 1)
+
+
+def _fits(new: int, room: int) -> bool:
+    # Artan alan bir Void ile doldurulur; en küçük Void 2 bayttır.
+    return new == room or room - new >= 2
+
+
+def _rebuild(eid: int, old_children: list[tuple[int, bytes]], children: list[tuple[int, bytes]]) -> bytes:
+    """Elemanı yeniden kur; eskisinde CRC-32 varsa yenisi de (ilk alt eleman olarak) taşır."""
+    body = b"".join(_element(k, v) for k, v in children if k not in (_CRC32, _VOID))
+    if any(k == _CRC32 for k, _v in old_children):
+        body = _element(_CRC32, zlib.crc32(body).to_bytes(4, "little")) + body
+    return _element(eid, body)
+
+
+# ---------- Elemanlar ----------
+
+def _is_global_tag(tag_children: list[tuple[int, bytes]]) -> bool:
+    targets = next((v for k, v in tag_children if k == _TARGETS), None)
+    if targets is None:
+        return True
+    for k, v in _children(targets):
+        if k in _TARGET_UIDS:
+            return False
+        if k == _TARGET_TYPE_VALUE and int.from_bytes(v, "big") != 50:
+            return False
+    return True
+
+
+def _simple_tag_name(payload: bytes) -> str:
+    name = next((v for k, v in _children(payload) if k == _TAG_NAME), b"")
+    return name.decode("utf-8", "replace").upper()
+
+
+def _build_tags(old: Optional[bytes], tags: dict[str, str], *, drop: tuple[str, ...] = ()) -> bytes:
+    wanted = [(TAG_NAMES[k], str(v)) for k, v in tags.items() if k in TAG_NAMES and v]
+    names = {n for n, _v in wanted} | set(drop)
+    simple = [
+        (_SIMPLE_TAG, _element(_TAG_NAME, n.encode("utf-8")) + _element(_TAG_STRING, v.encode("utf-8")))
+        for n, v in wanted
+    ]
+    old_children = _children(old) if old is not None else []
+    children = []
+    placed = False
+    for k, v in old_children:
+        if k == _TAG and not placed:
+            tag_children = _children(v)
+            if _is_global_tag(tag_children):
+                kept = [(k2, v2) for k2, v2 in tag_children if not (k2 == _SIMPLE_TAG and _simple_tag_name(v2) in names)]
+                v = _children(_rebuild(_TAG, tag_children, kept + simple))[0][1]
+                placed = True
+        children.append((k, v))
+    if not placed:
+        children.insert(0, (_TAG, _element(_TARGETS, b"") + b"".join(_element(k, v) for k, v in simple)))
+    return _rebuild(_TAGS, old_children, children)
+
+
+def _build_info(old: bytes, title: str) -> bytes:
+    old_children = _children(old)
+    children = [(k, v) for k, v in old_children if k != _TITLE]
+    children.append((_TITLE, title.encode("utf-8")))
+    return _rebuild(_INFO, old_children, children)
+
+
+def _lists(seekhead: bytes, eid: int) -> bool:
+    for k, v in _children(seekhead):
+        if k == _SEEK and any(kk == _SEEK_ID and int.from_bytes(x, "big") == eid for kk, x in _children(v)):
+            return True
+    return False
+
+
+def _build_seekhead(old: bytes, positions: dict[int, int], add: list[int]) -> bytes:
+    """SeekHead'i yeni konumlarla kur (positions: eleman id => Segment içi konum)."""
+    old_children = _children(old)
+    children = []
+    for k, v in old_children:
+        if k == _SEEK:
+            seek = _children(v)
+            target = int.from_bytes(next((x for kk, x in seek if kk == _SEEK_ID), b""), "big")
+            if target in positions:
+                v = _element(_SEEK_ID, _id_bytes(target)) + _element(_SEEK_POSITION, _uint_bytes(positions[target]))
+        children.append((k, v))
+    for eid in add:
+        children.append((_SEEK, _element(_SEEK_ID, _id_bytes(eid)) + _element(_SEEK_POSITION, _uint_bytes(positions[eid]))))
+    return _rebuild(_SEEKHEAD, old_children, children)
+
+
+# ---------- Dosya ----------
+
+def _scan(f: BinaryIO, file_size: int) -> dict:
+    """EBML başlığını doğrula; Segment'in üst düzey elemanlarını (Cluster'ları atlayarak) listele."""
+    f.seek(0)
+    eid, _ = _read_vint(f, keep_marker=True)
+    size, _ = _read_vint(f, keep_marker=False)
+    if eid != _EBML or size is None or size < 0:
+        raise MkvEditError("EBML/Matroska dosyası değil.")
+    f.seek(size, os.SEEK_CUR)
+    eid, _ = _read_vint(f, keep_marker=True)
+    size_pos = f.tell()
+    seg_size, size_len = _read_vint(f, keep_marker=False)
+    if eid != _SEGMENT or seg_size is None:
+        raise MkvEditError("Matroska Segment bulunamadı.")
+    start = f.tell()
+    end = file_size if seg_size < 0 else start + seg_size
+    if end != file_size:
+        # Segment'ten sonra veri varsa (ya da dosya kesikse) sona ekleme güvenli değil.
+        raise MkvEditError("Segment dosyanın sonunda bitmiyor.")
+
+    elements = []  # (id, konum, toplam boy)
+    pos = start
+    while pos < end:
+        f.seek(pos)
+        eid, ilen = _read_vint(f, keep_marker=True)
+        size, slen = _read_vint(f, keep_marker=False)
+        if eid is None or size is None:
+            raise MkvEditError("Kesik Matroska elemanı.")
+        if size < 0:
+            raise MkvEditError("Boyutu bilinmeyen eleman (canlı kayıt).")
+        total = ilen + slen + size
+        if pos + total > end:
+            raise MkvEditError("Kesik Matroska elemanı.")
+        elements.append((eid, pos, total))
+        pos += total
+    return {"start": start, "size_pos": size_pos, "size_len": size_len, "known": seg_size >= 0, "elements": elements}
+
+
+def _payload(f: BinaryIO, pos: int) -> bytes:
+    f.seek(pos)
+    _read_vint(f, keep_marker=True)
+    size, _ = _read_vint(f, keep_marker=False)
+    return f.read(size)
+
+
+def write_tags(path: str, tags: dict[str, str]) -> int:
+    """
+    MKV'ye metin etiketlerini (TAG_NAMES anahtarları) yerinde yaz; başlık Info.Title'a yazılır.
+    Var olan diğer etiketler (iz etiketleri, DURATION vb.) korunur. Yazılan bayt sayısını döndürür.
+    Yapılamıyorsa MkvEditError; dosya değişmemiş olur.
+    """
+    file_size = os.path.getsize(path)
+    with open(path, "r+b") as f:
+        layout = _scan(f, file_size)
+        start = layout["start"]
+        elements = layout["elements"]
+        seekheads = [i for i, e in enumerate(elements) if e[0] == _SEEKHEAD]
+        if not seekheads:
+            raise MkvEditError("SeekHead yok; eklenen etiketler bulunamaz.")
+        if [e[0] for e in elements].count(_TAGS) > 1 or [e[0] for e in elements].count(_INFO) != 1:
+            raise MkvEditError("Birden çok Tags/Info elemanı.")
+
+        def room(i: int) -> tuple[int, bool]:
+            """Eleman + ardındaki Void'lerin toplam boyu; dosya sonuna kadar uzanıyor mu."""
+            total = elements[i][2]
+            j = i + 1
+            while j < len(elements) and elements[j][0] == _VOID:
+                total += elements[j][2]
+                j += 1
+            return total, j == len(elements)
+
+        writes: list[tuple[int, bytes]] = []  # (dosya ofseti, veri)
+        claimed: set[int] = set()  # yerinde yazımın kullandığı Void'ler (SeekHead büyüyemez)
+        moved: dict[int, int] = {}
+        new_end = file_size
+
+        def place_in_region(i: int, data: bytes) -> None:
+            region, _at_end = room(i)
+            writes.append((elements[i][1], data))
+            if region > len(data):
+                writes.append((elements[i][1] + len(data), _void_header(region - len(data))))
+            j = i + 1
+            while j < len(elements) and elements[j][0] == _VOID:
+                claimed.add(j)
+                j += 1
+
+        # Başlık: Info yerinde büyüyebiliyorsa Info.Title, değilse Tags'te TITLE
+        tag_values = dict(tags)
+        title = tag_values.get("title")
+        if title:
+            i_info = next(i for i, e in enumerate(elements) if e[0] == _INFO)
+            new_info = _build_info(_payload(f, elements[i_info][1]), title)
+            region, _at_end = room(i_info)
+            if _fits(len(new_info), region):
+                place_in_region(i_info, new_info)
+                tag_values.pop("title")
+
+        i_tags = next((i for i, e in enumerate(elements) if e[0] == _TAGS), None)
+        old_tags = _payload(f, elements[i_tags][1]) if i_tags is not None else None
+        new_tags = _build_tags(old_tags, tag_values, drop=("TITLE",) if title else ())
+        append: Optional[bytes] = None
+        if i_tags is not None and room(i_tags)[1]:
+            # Tags dosyanın sonunda: yerinde yaz, dosya gerektiği kadar uzar/kısalır.
+            writes.append((elements[i_tags][1], new_tags))
+            new_end = elements[i_tags][1] + len(new_tags)
+        elif i_tags is not None and _fits(len(new_tags), room(i_tags)[0]):
+            place_in_region(i_tags, new_tags)
+        else:
+            append = new_tags
+            moved[_TAGS] = file_size - start
+            new_end = file_size + len(new_tags)
+            if i_tags is not None:
+                writes.append((elements[i_tags][1], _void_header(elements[i_tags][2])))
+
+        # SeekHead'ler: taşınan Tags'i listeleyenler güncellenir; hiçbiri listelemiyorsa ilkine eklenir.
+        seek_writes: list[tuple[int, bytes]] = []
+        if moved:
+            heads = {i: _payload(f, elements[i][1]) for i in seekheads}
+            listed = [i for i in seekheads if _lists(heads[i], _TAGS)]
+            for i in listed or seekheads[:1]:
+                new_head = _build_seekhead(heads[i], moved, [] if listed else [_TAGS])
+                region = elements[i][2]
+                j = i + 1
+                while j < len(elements) and elements[j][0] == _VOID and j not in claimed:
+                    region += elements[j][2]
+                    j += 1
+                if not _fits(len(new_head), region):
+                    raise MkvEditError("SeekHead ayrılan alana sığmıyor.")
+                seek_writes.append((elements[i][1], new_head))
+                if region > len(new_head):
+                    seek_writes.append((elements[i][1] + len(new_head), _void_header(region - len(new_head))))
+
+        size_write: Optional[tuple[int, bytes]] = None
+        if layout["known"] and new_end != file_size:
+            size_write = (layout["size_pos"], _size_vint(new_end - start, layout["size_len"]))
+
+        # Sıra: önce sona ekleme ve Segment boyutu, sonra SeekHead, en son eski Tags'in Void'e çevrilmesi.
+        # Yarıda kalırsa dosya ya eski ya da yeni Tags'i gösterir.
+        written = 0
+        if append is not None:
+            f.seek(file_size)
+            f.write(append)
+            written += len(append)
+        for pos, data in ([size_write] if size_write else []) + seek_writes + writes:
+            f.seek(pos)
+            f.write(data)
+            written += len(data)
+        if new_end < file_size:
+            f.truncate(new_end)
+        f.flush()
+        os.fsync(f.fileno())
+    return written
+
+
+def read_tags(path: str) -> dict[str, str]:
+    """Genel (hedefsiz) etiketler ve Info.Title; doğrulama/teşhis için."""
+    out: dict[str, str] = {}
+    with open(path, "rb") as f:
+        layout = _scan(f, os.path.getsize(path))
+        for eid, pos, _total in layout["elements"]:
+            if eid == _INFO:
+                for k, v in _children(_payload(f, pos)):
+                    if k == _TITLE:
+                        out["TITLE"] = v.decode("utf-8", "replace")
+            elif eid == _TAGS:
+                for k, v in _children(_payload(f, pos)):
+                    if k != _TAG or not _is_global_tag(_children(v)):
+                        continue
+                    for k2, v2 in _children(v):
+                        if k2 == _SIMPLE_TAG:
+                            fields = dict(_children(v2))
+                            name = fields.get(_TAG_NAME, b"").decode("utf-8", "replace").upper()
+                            out[name] = fields.get(_TAG_STRING, b"").decode("utf-8", "replace")
+    return out
+
+
+def check_structure(path: str) -> None:
+    """Kesik birleştirme/remux tespiti: Segment dosya sonunda biter, üst düzey elemanlar tam, Cluster var."""
+    with open(path, "rb") as f:
+        layout = _scan(f, os.path.getsize(path))
+    if not any(eid == _CLUSTER for eid, _pos, _total in layout["elements"]):
+        raise MkvEditError("Matroska dosyasında Cluster yok.")
@@ -0,0 +1,288 @@
+import os
+import struct
+from typing import BinaryIO, Optional
+
+# MP4 (M4A) etiketlerini yerinde yazan küçük atom düzenleyici:
+# - Yalnızca moov/udta/meta/ilst yeniden kurulur; mdat (ses verisi) hiç okunmaz/yazılmaz.
+# - Yeni moov eskisinin (ve hemen ardındaki 'free' atomunun) yerine sığarsa yerinde yazılır, artan
+#   alan 'free' ile doldurulur.
+# - moov dosyanın sonundaysa eskisinin üzerine yazılmaz: yeni moov eskisinin ardındaki boşluğa (sığmazsa
+#   dosya sonuna) yazılıp fsync edilir, ancak ondan sonra eskisi 'free' yapılır. Yazım yarıda kalırsa
+#   (çökme, ENOSPC) eski moov ve ses verisi sağlam kalır.
+# - Sığmıyorsa (faststart düzeni) yeni moov dosya sonuna eklenir, eskisi 'free' yapılır; mdat yer
+#   değiştirmediği için stco/co64 ofsetleri geçerli kalır.
+# - Parçalı (fragmented, moof'lu) dosyada moov taşınamaz: sığmıyorsa Mp4EditError (çağıran ffmpeg'e düşer).
+# - Sonraki düzenlemeler için moov'un ardına _PADDING baytlık 'free' bırakılır.
+
+_PADDING = 4096
+_CONTAINERS = {b"moov", b"udta", b"ilst"}
+
+# Anahtar => ilst atom tipi (metin)
+TEXT_ATOMS = {
+    "title": b"\xa9nam",
+    "artist": b"\xa9ART",
+    "album": b"\xa9alb",
+    "album_artist": b"aART",
+    "date": b"\xa9day",
+    "comment": b"\xa9cmt",
+    "description": b"desc",
+    "genre": b"\xa9gen",
+    "composer": b"\xa9wrt",
+}
+# Serbest biçimli (freeform) öğeler: '----:<mean>:<name>' anahtarı => '----' atomu (mean + name + data).
+# ReplayGain okuyucuları (foobar2000, rockbox, mpv, ...) com.apple.iTunes:replaygain_* öğelerini okur.
+FREEFORM_PREFIX = "----:"
+ITUNES_MEAN = "com.apple.iTunes"
+_TYPE_UTF8 = 1
+_TYPE_JPEG = 13
+_TYPE_PNG = 14
+
+
+class Mp4EditError(RuntimeError):
+    """Dosya yerinde düzenlenemiyor (biçim tanınmadı ya da moov taşınamaz)."""
+
+
+def _read_boxes(f: BinaryIO, start: int, end: int) -> list[tuple[bytes, int, int, int]]:
+    """[start, end) aralığındaki atomlar: (tip, ofset, başlık boyu, toplam boy)."""
+    boxes = []
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        head = f.read(8)
+        size, kind = struct.unpack(">I4s", head)
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            raise Mp4EditError(f"Bozuk MP4 atomu: {kind!r} @ {pos}")
+        boxes.append((kind, pos, header, size))
+        pos += size
+    return boxes
+
+
+def _parse(data: bytes) -> list[tuple[bytes, bytes]]:
+    """Bellekteki atom dizisini (tip, içerik) listesine çevir."""
+    out = []
+    pos = 0
+    while pos + 8 <= len(data):
+        size, kind = struct.unpack_from(">I4s", data, pos)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", data, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = len(data) - pos
+        if size < header or pos + size > len(data):
+            raise Mp4EditError(f"Bozuk MP4 atomu: {kind!r}")
+        out.append((kind, data[pos + header:pos + size]))
+        pos += size
+    return out
+
+
+def _box(kind: bytes, payload: bytes) -> bytes:
+    if len(payload) + 8 > 0xFFFFFFFF:
+        return struct.pack(">I4sQ", 1, kind, len(payload) + 16) + payload
+    return struct.pack(">I4s", len(payload) + 8, kind) + payload
+
+
+def _free(size: int) -> bytes:
+    return struct.pack(">I4s", size, b"free") + b"\0" * (size - 8)
+
+
+def _data_atom(kind: bytes, type_code: int, value: bytes) -> bytes:
+    return _box(kind, _box(b"data", struct.pack(">II", type_code, 0) + value))
+
+
+def _freeform_key(payload: bytes) -> Optional[tuple[str, str]]:
+    """'----' öğesinin (mean, name) çifti; name'ler büyük/küçük harf duyarsız karşılaştırılır."""
+    fields = {}
+    for k, v in _parse(payload):
+        if k in (b"mean", b"name"):
+            fields[k] = v[4:].decode("utf-8", "replace")
+    if b"mean" not in fields or b"name" not in fields:
+        return None
+    return fields[b"mean"], fields[b"name"].lower()
+
+
+def _freeform_atom(mean: str, name: str, value: bytes) -> bytes:
+    return _box(
+        b"----",
+        _box(b"mean", b"\0\0\0\0" + mean.encode("utf-8"))
+        + _box(b"name", b"\0\0\0\0" + name.encode("utf-8"))
+        + _box(b"data", struct.pack(">II", _TYPE_UTF8, 0) + value),
+    )
+
+
+def _build_ilst(old: Optional[bytes], tags: dict[str, str], cover: Optional[bytes]) -> bytes:
+    replaced = {TEXT_ATOMS[k] for k in tags if k in TEXT_ATOMS}
+    if cover is not None:
+        replaced.add(b"covr")
+    freeform = {}
+    for key, value in tags.items():
+        if key.startswith(FREEFORM_PREFIX):
+            mean, _, name = key[len(FREEFORM_PREFIX):].partition(":")
+            if mean and name:
+                freeform[(mean, name.lower())] = (name, value)
+    items = [
+        (k, v) for k, v in (_parse(old) if old else [])
+        if k not in replaced and not (k == b"----" and _freeform_key(v) in freeform)
+    ]
+    out = b"".join(_box(k, v) for k, v in items)
+    for key, value in tags.items():
+        atom = TEXT_ATOMS.get(key)
+        if atom and value:
+            out += _data_atom(atom, _TYPE_UTF8, str(value).encode("utf-8"))
+    for (mean, _lower), (name, value) in freeform.items():
+        if value:
+            out += _freeform_atom(mean, name, str(value).encode("utf-8"))
+    if cover is not None:
+        type_code = _TYPE_PNG if cover[:8] == b"\x89PNG\r\n\x1a\n" else _TYPE_JPEG
+        out += _data_atom(b"covr", type_code, cover)
+    return out
+
+
+def _build_meta(old: Optional[bytes], tags: dict[str, str], cover: Optional[bytes]) -> bytes:
+    # ISO meta bir FullBox'tır (4 bayt sürüm/bayrak); QuickTime tarzında bu alan yoktur.
+    prefix = b"\0\0\0\0"
+    children: list[tuple[bytes, bytes]] = []
+    if old is not None:
+        if old[4:8] in (b"hdlr", b"ilst", b"keys"):
+            prefix = b""
+            children = _parse(old)
+        else:
+            prefix, children = old[:4], _parse(old[4:])
+    if not any(k == b"hdlr" for k, _v in children):
+        hdlr = struct.pack(">I4s4sIII", 0, b"\0\0\0\0", b"mdir", 0x6170706C, 0, 0) + b"\0"
+        children.insert(0, (b"hdlr", hdlr))
+    ilst_old = next((v for k, v in children if k == b"ilst"), None)
+    new_ilst = _build_ilst(ilst_old, tags, cover)
+    body = []
+    placed = False
+    for k, v in children:
+        if k == b"free":
+            continue
+        if k == b"ilst":
+            v, placed = new_ilst, True
+        body.append(_box(k, v))
+    if not placed:
+        body.append(_box(b"ilst", new_ilst))
+    return prefix + b"".join(body)
+
+
+def _build_moov(old: bytes, tags: dict[str, str], cover: Optional[bytes]) -> bytes:
+    children = _parse(old)
+    udta = next((v for k, v in children if k == b"udta"), None)
+    udta_children = _parse(udta) if udta is not None else []
+    meta_old = next((v for k, v in udta_children if k == b"meta"), None)
+    new_meta = _box(b"meta", _build_meta(meta_old, tags, cover))
+    udta_body = b"".join(new_meta if k == b"meta" else _box(k, v) for k, v in udta_children)
+    if meta_old is None:
+        udta_body += new_meta
+    new_udta = _box(b"udta", udta_body)
+    out = b"".join(new_udta if k == b"udta" else _box(k, v) for k, v in children)
+    if udta is None:
+        out += new_udta
+    return _box(b"moov", out)
+
+
+def write_tags(path: str, tags: dict[str, str], *, cover: Optional[bytes] = None) -> None:
+    """
+    M4A'ya metin etiketlerini (TEXT_ATOMS anahtarları, '----:<mean>:<name>' serbest öğeleri) ve kapağı
+    (covr) yerinde yaz. Var olan diğer ilst öğeleri korunur; boş değerli serbest öğe silinir.
+    Yapılamıyorsa Mp4EditError; dosya değişmemiş olur. Taşınan moov'da eskisi ancak yenisi diske
+    indikten sonra geçersizlenir.
+    """
+    size = os.path.getsize(path)
+    with open(path, "r+b") as f:
+        top = _read_boxes(f, 0, size)
+        kinds = [k for k, *_rest in top]
+        if b"moov" not in kinds or b"mdat" not in kinds or kinds.count(b"moov") != 1:
+            raise Mp4EditError("MP4 yapısı tanınmadı (moov/mdat yok).")
+        i = kinds.index(b"moov")
+        _kind, moov_pos, moov_header, moov_size = top[i]
+        f.seek(moov_pos + moov_header)
+        old_moov = f.read(moov_size - moov_header)
+        fragmented = b"moof" in kinds or any(k == b"mvex" for k, _v in _parse(old_moov))
+        new_moov = _build_moov(old_moov, tags, cover)
+
+        # Yerinde: eski moov + hemen ardındaki free atomları
+        room = moov_size
+        j = i + 1
+        while j < len(top) and top[j][0] == b"free":
+            room += top[j][3]
+            j += 1
+        at_end = j == len(top)
+
+        trail = room - moov_size
+        if at_end and (len(new_moov) == trail or len(new_moov) + 8 <= trail):
+            # Eskisiyle çakışmadan ardındaki boşluğa
+            _relocate_moov(f, moov_pos, moov_pos + moov_size, new_moov, trail - len(new_moov))
+        elif at_end:
+            _relocate_moov(f, moov_pos, size, new_moov, _PADDING)
+        elif len(new_moov) == room or len(new_moov) + 8 <= room:
+            f.seek(moov_pos)
+            f.write(new_moov)
+            if room > len(new_moov):
+                f.write(_free(room - len(new_moov)))
+        elif fragmented:
+            raise Mp4EditError("Parçalı MP4'te moov büyütülemiyor.")
+        else:
+            _relocate_moov(f, moov_pos, size, new_moov, _PADDING)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _relocate_moov(f: BinaryIO, old_pos: int, at: int, new_moov: bytes, pad: int) -> None:
+    """
+    Yeni moov'u (eskisiyle çakışmayan) at konumuna yaz, diske indir, sonra eskisini free yap.
+    Yarıda kalırsa dosya eski moov ile okunur kalır. pad: ardına bırakılacak free (0 ya da >= 8).
+    """
+    f.seek(at)
+    f.write(new_moov + (_free(pad) if pad else b""))
+    f.flush()
+    os.fsync(f.fileno())
+    f.seek(old_pos + 4)  # tip alanı (64 bit boyutlu başlıkta da) boyutun ilk 4 baytından sonra
+    f.write(b"free")
+
+
+def read_tags(path: str) -> dict[bytes, bytes]:
+    """ilst öğelerinin ham 'data' içerikleri (tip => değer; serbest öğelerde b'----:<mean>:<name>')."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        top = _read_boxes(f, 0, size)
+        moov = next(((pos, header, sz) for k, pos, header, sz in top if k == b"moov"), None)
+        if moov is None:
+            return {}
+        f.seek(moov[0] + moov[1])
+        data = f.read(moov[2] - moov[1])
+    out: dict[bytes, bytes] = {}
+    for k, v in _parse(data):
+        if k != b"udta":
+            continue
+        for k2, v2 in _parse(v):
+            if k2 != b"meta":
+                continue
+            body = v2 if v2[4:8] in (b"hdlr", b"ilst", b"keys") else v2[4:]
+            for k3, v3 in _parse(body):
+                if k3 == b"ilst":
+                    for item, payload in _parse(v3):
+                        if item == b"----":
+                            ff = _freeform_key(payload)
+                            if ff is not None:
+                                item = f"{FREEFORM_PREFIX}{ff[0]}:{ff[1]}".encode("utf-8")
+                        for dk, dv in _parse(payload):
+                            if dk == b"data":
+                                out[item] = dv[8:]
+    return out
+
+
+def check_structure(path: str) -> None:
+    """Kesik dosya tespiti: üst düzey atomlar dosya sonuna kadar tutarlı, moov ve mdat var."""
+    with open(path, "rb") as f:
+        kinds = {kind for kind, _pos, _header, _size in _read_boxes(f, 0, os.path.getsize(path))}
+    missing = [k.decode() for k in (b"moov", b"mdat") if k not in kinds]
+    if missing:
+        raise Mp4EditError(f"MP4 atomu eksik: {', '.join(missing)}")
@@ -0,0 +1,442 @@
+import base64
+import os
+import random
+import struct
+import zlib
+from typing import BinaryIO, Callable, Iterator, Optional
+
+# WebM (Matroska) içindeki Opus akışını süreç başlatmadan .opus (Ogg) dosyasına taşıyan remuxer:
+# - EBML tek geçişte okunur; yalnızca Info/Tracks ve Cluster blokları işlenir, diğer elemanlar atlanır.
+# - OpusHead (CodecPrivate) ve OpusTags (metadata + METADATA_BLOCK_PICTURE kapak) en başta yazılır;
+#   böylece ayrı remux ve opustags --set-cover geçişlerine gerek kalmaz.
+# - Paketler okundukça Ogg sayfalarına yazılır; bellekte en fazla bir sayfa (ve bir blok) tutulur.
+# - Granül konumu paketlerin TOC baytından hesaplanan örnek sayısıdır (48 kHz, pre-skip dahil);
+#   son bloktaki DiscardPadding son sayfanın granülünden düşülür (RFC 7845).
+# Desteklenmeyen bir yapıda WebmRemuxError fırlatılır; çağıran ffmpeg yoluna düşer.
+
+_EBML = 0x1A45DFA3
+_SEGMENT = 0x18538067
+_INFO = 0x1549A966
+_TRACKS = 0x1654AE6B
+_TRACK_ENTRY = 0xAE
+_TRACK_NUMBER = 0xD7
+_TRACK_TYPE = 0x83
+_CODEC_ID = 0x86
+_CODEC_PRIVATE = 0x63A2
+_CODEC_DELAY = 0x56AA
+_AUDIO = 0xE1
+_CHANNELS = 0x9F
+_CLUSTER = 0x1F43B675
+_SIMPLE_BLOCK = 0xA3
+_BLOCK_GROUP = 0xA0
+_BLOCK = 0xA1
+_DISCARD_PADDING = 0x75A2
+# Boyutu bilinmeyebilen ve içine girilen (atlanmayan) kapsayıcılar
+_ENTER = {_SEGMENT, _CLUSTER}
+
+_PAGE_TARGET = 4096  # sayfa başına hedef veri (arama ayrıntısı / ek yük dengesi)
+_VENDOR = b"youtube-downloader"
+
+
+class WebmRemuxError(RuntimeError):
+    """WebM/Opus yapısı bu remuxer ile taşınamıyor."""
+
+
+# ---------- Ogg CRC (polinom 0x04C11DB7, yansıtmasız) ----------
+# zlib.crc32 aynı polinomun yansıtılmış halini C'de hesaplar: baytların bitleri ters çevrilip
+# (bytes.translate) sonuç ters çevrilerek Ogg CRC'si saf Python döngüsü olmadan elde edilir.
+_BITREV = bytes(int(f"{i:08b}"[::-1], 2) for i in range(256))
+
+
+def _rev32(x: int) -> int:
+    return int(f"{x:032b}"[::-1], 2)
+
+
+def ogg_crc(data: bytes) -> int:
+    return _rev32(~zlib.crc32(data.translate(_BITREV), 0xFFFFFFFF) & 0xFFFFFFFF)
+
+
+# ---------- EBML ----------
+
+def _read_vint(f: BinaryIO, *, keep_marker: bool) -> tuple[Optional[int], int]:
+    """(değer, uzunluk). Dosya sonunda (None, 0); 'bilinmeyen boyut' için değer -1."""
+    first = f.read(1)
+    if not first:
+        return None, 0
+    b0 = first[0]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not (b0 & mask):
+        mask >>= 1
+        length += 1
+    if length > 8:
+        raise WebmRemuxError("Geçersiz EBML vint.")
+    rest = f.read(length - 1)
+    if len(rest) != length - 1:
+        return None, 0
+    value = b0 if keep_marker else (b0 & (mask - 1))
+    for b in rest:
+        value = (value << 8) | b
+    if not keep_marker and value == (1 << (7 * length)) - 1:
+        return -1, length
+    return value, length
+
+
+def _iter_children(data: bytes) -> Iterator[tuple[int, bytes]]:
+    """Bellekteki (küçük) kapsayıcının alt elemanları."""
+    pos = 0
+    n = len(data)
+    while pos < n:
+        b0 = data[pos]
+        ilen = 1
+        while ilen <= 4 and not (b0 & (0x80 >> (ilen - 1))):
+            ilen += 1
+        eid = int.from_bytes(data[pos:pos + ilen], "big")
+        pos += ilen
+        s0 = data[pos]
+        slen = 1
+        while slen <= 8 and not (s0 & (0x80 >> (slen - 1))):
+            slen += 1
+        size = int.from_bytes(data[pos:pos + slen], "big") & ((1 << (7 * slen)) - 1)
+        pos += slen
+        yield eid, data[pos:pos + size]
+        pos += size
+
+
+def _uint(b: bytes) -> int:
+    return int.from_bytes(b, "big") if b else 0
+
+
+def _sint(b: bytes) -> int:
+    return int.from_bytes(b, "big", signed=True) if b else 0
+
+
+def _parse_tracks(data: bytes) -> dict:
+    """İlk (ve tek olması gereken) Opus ses izinin bilgileri."""
+    found = []
+    for eid, entry in _iter_children(data):
+        if eid != _TRACK_ENTRY:
+            continue
+        info = {"number": None, "type": None, "codec": "", "private": b"", "delay_ns": 0, "channels": 2}
+        for cid, value in _iter_children(entry):
+            if cid == _TRACK_NUMBER:
+                info["number"] = _uint(value)
+            elif cid == _TRACK_TYPE:
+                info["type"] = _uint(value)
+            elif cid == _CODEC_ID:
+                info["codec"] = value.decode("ascii", "replace")
+            elif cid == _CODEC_PRIVATE:
+                info["private"] = value
+            elif cid == _CODEC_DELAY:
+                info["delay_ns"] = _uint(value)
+            elif cid == _AUDIO:
+                for aid, av in _iter_children(value):
+                    if aid == _CHANNELS:
+                        info["channels"] = _uint(av)
+        found.append(info)
+    audio = [t for t in found if t["type"] == 2]
+    if len(audio) != 1 or audio[0]["codec"] != "A_OPUS" or audio[0]["number"] is None:
+        raise WebmRemuxError("WebM tek bir Opus ses izi içermiyor.")
+    return audio[0]
+
+
+def _block_frames(payload: bytes, track: int) -> Optional[list[bytes]]:
+    """(Simple)Block içeriğinden bu izin çerçeveleri; başka izse None."""
+    tlen = 1
+    while tlen <= 8 and not (payload[0] & (0x80 >> (tlen - 1))):
+        tlen += 1
+    number = int.from_bytes(payload[:tlen], "big") & ((1 << (7 * tlen)) - 1)
+    if number != track:
+        return None
+    flags = payload[tlen + 2]
+    data = payload[tlen + 3:]
+    lacing = (flags >> 1) & 0x03
+    if lacing == 0:
+        return [data]
+    count = data[0] + 1
+    pos = 1
+    sizes: list[int] = []
+    if lacing == 1:  # Xiph
+        for _ in range(count - 1):
+            size = 0
+            while True:
+                b = data[pos]
+                pos += 1
+                size += b
+                if b != 255:
+                    break
+            sizes.append(size)
+    elif lacing == 3:  # EBML
+        for i in range(count - 1):
+            b0 = data[pos]
+            ln = 1
+            while not (b0 & (0x80 >> (ln - 1))):
+                ln += 1
+            raw = int.from_bytes(data[pos:pos + ln], "big") & ((1 << (7 * ln)) - 1)
+            pos += ln
+            if i == 0:
+                sizes.append(raw)
+            else:
+                sizes.append(sizes[-1] + raw - ((1 << (7 * ln - 1)) - 1))
+    else:  # sabit boyut
+        each = len(data[pos:]) // count
+        sizes = [each] * (count - 1)
+    frames = []
+    for size in sizes:
+        frames.append(data[pos:pos + size])
+        pos += size
+    frames.append(data[pos:])
+    return frames
+
+
+def _iter_packets(f: BinaryIO, track: int) -> Iterator[tuple[bytes, int]]:
+    """Opus paketleri ve (varsa) DiscardPadding (ns) değeri, dosya sırasıyla."""
+    while True:
+        eid, ilen = _read_vint(f, keep_marker=True)
+        if eid is None:
+            return
+        size, _slen = _read_vint(f, keep_marker=False)
+        if size is None:
+            return
+        if eid in _ENTER:
+            continue
+        if size < 0:
+            raise WebmRemuxError("Boyutu bilinmeyen EBML elemanı.")
+        if eid == _SIMPLE_BLOCK:
+            for frame in _block_frames(f.read(size), track) or []:
+                yield frame, 0
+        elif eid == _BLOCK_GROUP:
+            group = f.read(size)
+            frames = None
+            discard = 0
+            for cid, value in _iter_children(group):
+                if cid == _BLOCK:
+                    frames = _block_frames(value, track)
+                elif cid == _DISCARD_PADDING:
+                    discard = _sint(value)
+            for i, frame in enumerate(frames or []):
+                yield frame, (discard if i == len(frames) - 1 else 0)
+        else:
+            f.seek(size, os.SEEK_CUR)
+
+
+def _read_header(f: BinaryIO) -> dict:
+    """EBML başlığını doğrula; Segment içindeki ilk Cluster'a kadar Tracks'i bul."""
+    eid, _ = _read_vint(f, keep_marker=True)
+    size, _ = _read_vint(f, keep_marker=False)
+    if eid != _EBML or size is None or size < 0:
+        raise WebmRemuxError("EBML/WebM dosyası değil.")
+    f.seek(size, os.SEEK_CUR)
+    while True:
+        pos = f.tell()
+        eid, _ = _read_vint(f, keep_marker=True)
+        size, _ = _read_vint(f, keep_marker=False)
+        if eid is None or size is None:
+            raise WebmRemuxError("WebM'de Tracks bulunamadı.")
+        if eid == _SEGMENT:
+            continue
+        if eid == _CLUSTER:
+            raise WebmRemuxError("WebM'de Tracks Cluster'dan önce gelmiyor.")
+        if size < 0:
+            raise WebmRemuxError("Boyutu bilinmeyen EBML elemanı.")
+        if eid == _TRACKS:
+            track = _parse_tracks(f.read(size))
+            track["after_tracks"] = f.tell()
+            return track
+        f.seek(size, os.SEEK_CUR)
+        if f.tell() <= pos:
+            raise WebmRemuxError("WebM ayrıştırılamadı.")
+
+
+# ---------- Opus / Ogg ----------
+
+def opus_packet_samples(packet: bytes) -> int:
+    """TOC baytından paketin 48 kHz örnek sayısı (RFC 6716 §3.1)."""
+    if not packet:
+        return 0
+    toc = packet[0]
+    config = toc >> 3
+    if config < 12:
+        frame = (480, 960, 1920, 2880)[config & 3]
+    elif config < 16:
+        frame = (480, 960)[config & 1]
+    else:
+        frame = (120, 240, 480, 960)[config & 3]
+    code = toc & 3
+    if code == 0:
+        count = 1
+    elif code in (1, 2):
+        count = 2
+    else:
+        count = (packet[1] & 0x3F) if len(packet) > 1 else 0
+    return frame * count
+
+
+def _opus_head(track: dict) -> bytes:
+    private = track.get("private") or b""
+    if private[:8] == b"OpusHead":
+        return private
+    channels = int(track.get("channels") or 2)
+    if channels > 2:
+        raise WebmRemuxError("CodecPrivate olmadan çok kanallı Opus taşınamaz.")
+    pre_skip = int(round(int(track.get("delay_ns") or 0) * 48000 / 1e9))
+    return b"OpusHead" + struct.pack("<BBHIhB", 1, channels, pre_skip, 48000, 0, 0)
+
+
+def _picture_block(image: bytes, mime: str, width: int = 0, height: int = 0) -> bytes:
+    """FLAC PICTURE bloğu (tip 3: ön kapak); METADATA_BLOCK_PICTURE için base64'lenir."""
+    m = mime.encode("ascii")
+    return (
+        struct.pack(">II", 3, len(m)) + m
+        + struct.pack(">I", 0)
+        + struct.pack(">IIIII", width, height, 24, 0, len(image))
+        + image
+    )
+
+
+def opus_tags(tags: dict[str, str], cover: Optional[tuple[bytes, str]] = None, *, dims: tuple[int, int] = (0, 0)) -> bytes:
+    """OpusTags paketi. tags: Vorbis yorum anahtarları (TITLE, ARTIST, ...); cover: (bayt, mime)."""
+    comments = [f"{k}={v}".encode("utf-8") for k, v in tags.items() if v not in (None, "")]
+    if cover is not None:
+        block = _picture_block(cover[0], cover[1], *dims)
+        comments.append(b"METADATA_BLOCK_PICTURE=" + base64.b64encode(block))
+    out = b"OpusTags" + struct.pack("<I", len(_VENDOR)) + _VENDOR + struct.pack("<I", len(comments))
+    for c in comments:
+        out += struct.pack("<I", len(c)) + c
+    return out
+
+
+class _OggWriter:
+    def __init__(self, out: BinaryIO, serial: int):
+        self._out = out
+        self._serial = serial
+        self._seq = 0
+        self._segments: list[int] = []
+        self._data: list[bytes] = []
+        self._size = 0
+        self._granule = -1
+        self._continued = False
+        self._bos = True
+
+    def _flush(self, *, eos: bool = False) -> None:
+        if not self._segments:
+            return
+        flags = (0x01 if self._continued else 0) | (0x02 if self._bos else 0) | (0x04 if eos else 0)
+        header = struct.pack("<4sBBqIIIB", b"OggS", 0, flags, self._granule, self._serial, self._seq, 0, len(self._segments))
+        page = header + bytes(self._segments) + b"".join(self._data)
+        crc = ogg_crc(page)
+        self._out.write(page[:22] + struct.pack("<I", crc) + page[26:])
+        self._seq += 1
+        self._bos = False
+        self._continued = False
+        self._segments = []
+        self._data = []
+        self._size = 0
+        self._granule = -1
+
+    def packet(self, data: bytes, granule: int, *, flush: bool = False, eos: bool = False) -> None:
+        """
+        Paketi ekle. Lacing tablosu (255 değer) dolarsa paket sonraki sayfaya devam eder; o sayfada
+        biten paket olmadığı için granül -1 yazılır. eos=True: paket son sayfayı kapatır.
+        """
+        pos = 0
+        n = len(data)
+        while True:
+            take = min(255, n - pos)
+            self._segments.append(take)
+            self._data.append(data[pos:pos + take])
+            self._size += take
+            pos += take
+            if take < 255:
+                self._granule = granule
+                break
+            if len(self._segments) == 255:
+                self._flush()
+                self._continued = True
+        if eos:
+            self._flush(eos=True)
+        elif flush or self._size >= _PAGE_TARGET or len(self._segments) == 255:
+            self._flush()
+
+
+def remux(
+    src: str,
+    dst: str,
+    *,
+    tags: Optional[dict[str, str]] = None,
+    cover: Optional[tuple[bytes, str]] = None,
+    cover_dims: tuple[int, int] = (0, 0),
+    checkpoint: Optional[Callable[[], None]] = None,
+) -> None:
+    """
+    src (.webm, Opus) => dst (.opus) tek sıralı geçişte. Metadata ve kapak OpusTags'e yazılır.
+    checkpoint: ara ara çağrılır (duraklat/iptal için; iptalde istisna fırlatmalı).
+    Hata durumunda dst silinir.
+    """
+    try:
+        with open(src, "rb") as f, open(dst, "wb") as out:
+            track = _read_header(f)
+            f.seek(track["after_tracks"])
+            head = _opus_head(track)
+            pre_skip = struct.unpack_from("<H", head, 10)[0]
+            w = _OggWriter(out, random.getrandbits(32))
+            w.packet(head, 0, flush=True)
+            w.packet(opus_tags(tags or {}, cover, dims=cover_dims), 0, flush=True)
+
+            granule = 0
+            pending: Optional[tuple[bytes, int]] = None
+            count = 0
+            for packet, discard_ns in _iter_packets(f, int(track["number"])):
+                if pending is not None:
+                    granule += opus_packet_samples(pending[0])
+                    w.packet(pending[0], granule)
+                pending = (packet, discard_ns)
+                count += 1
+                if checkpoint is not None and count % 256 == 0:
+                    checkpoint()
+            if pending is None:
+                raise WebmRemuxError("WebM'de Opus paketi yok.")
+            # Son paket EOS sayfasında; DiscardPadding kadar örnek sondan kırpılır.
+            last, discard_ns = pending
+            granule += opus_packet_samples(last)
+            end = granule - max(0, int(round(discard_ns * 48000 / 1e9)))
+            w.packet(last, max(end, pre_skip), eos=True)
+    except Exception:
+        try:
+            os.remove(dst)
+        except OSError:
+            pass
+        raise
+
+
+
+def _serve(inp, out) -> None:
+    """
+    Süreç girişi (python oggopus.py): stdin'den satır başına bir JSON istek
+    {"src", "dst", "tags", "cover", "cover_dims"} okur, her biri için {"ok": true} ya da {"error": "..."} yazar.
+    Remux saf Python ve GIL'i tutar; kalıcı ayrı süreçlerde çalışınca paralel işçiler çekirdeklere yayılır.
+    Modül göreli import kullanmaz, dosya doğrudan betik olarak çalıştırılabilir.
+    """
+    import json
+
+    for line in inp:
+        try:
+            req = json.loads(line)
+            cover = None
+            if req.get("cover"):
+                with open(req["cover"], "rb") as f:
+                    image = f.read()
+                cover = (image, "image/png" if image[:8] == b"\x89PNG\r\n\x1a\n" else "image/jpeg")
+            remux(req["src"], req["dst"], tags=req.get("tags") or {}, cover=cover,
+                  cover_dims=tuple(req.get("cover_dims") or (0, 0)))
+            reply = {"ok": True}
+        except Exception as e:
+            reply = {"error": f"{type(e).__name__}: {e}"}
+        out.write(json.dumps(reply) + "\n")
+        out.flush()
+
+
+if __name__ == "__main__":
+    import sys
+
+    _serve(sys.stdin, sys.stdout)
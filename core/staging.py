@@ -0,0 +1,182 @@
+import errno
+import hashlib
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Optional
+
+# Ara dizin (staging):
+# - İşin tüm ara dosyaları (.part, parçalar, birleştirme, kapak/etiket geçicileri) hızlı bir yerel
+#   dizinde (SSD/tmpfs) üretilir; yavaş hedefe (NAS/USB) çıktı başına tek sıralı yazma gider.
+# - Aynı dosya sisteminde os.replace; farklıysa reflink (FICLONE), olmazsa copy_file_range (çekirdek
+#   içi kopya), o da yoksa sendfile. Kopya hedefte gizli bir geçici ada yazılıp rename edilir.
+# - İşin ara dizini (url, hedef, format) anahtarından türetilir: ağ kopmasından sonra sürdürülen iş
+#   aynı dizini ve .part dosyalarını bulur.
+
+_FICLONE = 0x40049409
+_COPY_CHUNK = 64 * 1024 * 1024
+_HASH_CHUNK = 4 * 1024 * 1024
+
+try:
+    import fcntl
+except ImportError:  # fcntl yoksa reflink denenmez
+    fcntl = None
+
+
+def _reflink(src_fd: int, dst_fd: int) -> bool:
+    if fcntl is None:
+        return False
+    try:
+        fcntl.ioctl(dst_fd, _FICLONE, src_fd)
+        return True
+    except OSError:
+        return False
+
+
+def _kernel_copy(src_fd: int, dst_fd: int, size: int) -> None:
+    """copy_file_range, desteklenmezse sendfile; ikisi de yoksa düz okuma/yazma."""
+    copied = 0
+    use_range = hasattr(os, "copy_file_range")
+    while copied < size:
+        n = min(_COPY_CHUNK, size - copied)
+        try:
+            if use_range:
+                sent = os.copy_file_range(src_fd, dst_fd, n)
+            else:
+                sent = os.sendfile(dst_fd, src_fd, None, n)
+        except OSError as e:
+            if use_range and e.errno in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+                use_range = False
+                continue
+            if e.errno in (errno.ENOSYS, errno.EINVAL):
+                os.lseek(src_fd, copied, os.SEEK_SET)
+                os.lseek(dst_fd, copied, os.SEEK_SET)
+                with open(src_fd, "rb", closefd=False) as s, open(dst_fd, "wb", closefd=False) as d:
+                    shutil.copyfileobj(s, d, _COPY_CHUNK)
+                return
+            raise
+        if sent == 0:
+            break
+        copied += sent
+
+
+def _hashing_copy(s, t, hasher) -> None:
+    buf = bytearray(_HASH_CHUNK)
+    view = memoryview(buf)
+    while True:
+        n = s.readinto(buf)
+        if not n:
+            break
+        hasher.update(view[:n])
+        t.write(view[:n])
+
+
+def copy_file(src: str, dst: str, *, hasher=None) -> None:
+    """
+    src'yi dst'ye kopyala (reflink, olmazsa çekirdek içi kopya); dst gizli geçici addan rename edilir.
+    hasher (hashlib nesnesi) verilirse baytlar kullanıcı alanından geçer ve özet kopyayla aynı geçişte
+    alınır (dosya sonradan yeniden okunmaz).
+    """
+    d = Path(dst)
+    tmp = d.with_name(f".{d.name}.__publish_tmp__")
+    try:
+        with open(src, "rb") as s, open(tmp, "wb") as t:
+            if hasher is not None:
+                _hashing_copy(s, t, hasher)
+            elif not _reflink(s.fileno(), t.fileno()):
+                _kernel_copy(s.fileno(), t.fileno(), os.fstat(s.fileno()).st_size)
+        shutil.copystat(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        try:
+            tmp.unlink(missing_ok=True)
+        except Exception:
+            pass
+        raise
+
+
+def move_file(src: str, dst: str, *, hasher=None) -> bool:
+    """
+    src'yi dst'ye taşı: aynı dosya sisteminde rename, değilse tek sıralı kopya + src silme.
+    Baytlar kopyalandıysa (hasher beslendiyse) True döner; rename'de False.
+    """
+    try:
+        os.replace(src, dst)
+        return False
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    copy_file(src, dst, hasher=hasher)
+    os.remove(src)
+    return True
+
+
+def job_key(output_dir: str, url: str, format_key: str, label: Optional[str] = None) -> str:
+    """Bir çıktının ara dizin anahtarı (sürdürmede aynı dizin bulunur)."""
+    out_dir = Path(output_dir).expanduser().resolve()
+    return "\0".join((str(out_dir), url, format_key, str(label or "")))
+
+
+def stage_dir(root: str, key: str) -> Path:
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    return Path(root).expanduser().resolve() / f"ytdl-stage-{digest}"
+
+
+class Stage:
+    """Bir işin ara dizini ve hedef klasörü; üretilen dosyalar publish ile hedefe taşınır."""
+
+    def __init__(self, root: str, target: str, key: str):
+        self.dir = stage_dir(root, key)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.target = Path(target).expanduser().resolve()
+        self._lock = threading.Lock()
+        # Depoya yerleştirilen çıktıların özetleri (hedef yol -> sha256); yansılar yeniden okumaz.
+        self.digests: dict[str, str] = {}
+
+    def final(self, path: Optional[str]) -> Optional[str]:
+        """Ara dizindeki yolun hedefteki karşılığı (ara dizin dışındaki yol olduğu gibi döner)."""
+        if not path:
+            return path
+        try:
+            rel = Path(path).resolve().relative_to(self.dir)
+        except ValueError:
+            return path
+        return str(self.target / rel)
+
+    def publish(self, path: str, *, store=None) -> str:
+        """
+        Tek bir dosyayı hedefe taşı; yeni yolu döndür. Taşımalar sıralıdır (hedefe tek yazma akışı).
+        store (contentstore.ContentStore) verilirse özet hedefe kopyalanırken alınır ve self.digests'e
+        yazılır; içerik depoda zaten varsa yeni kopya mevcut nesnenin hardlink'iyle değiştirilir.
+        """
+        dst = Path(self.final(path))
+        with self._lock:
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            if store is not None:
+                self.digests[str(dst)] = store.place(path, str(dst), move=True)
+            else:
+                move_file(path, str(dst))
+        return str(dst)
+
+    def discard(self) -> None:
+        """Ara dizini içindekilerle (yarım indirmeler, parçalar, kapak/etiket geçicileri) birlikte sil."""
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def publish_all(self, *, store=None) -> list[str]:
+        """Ara dizindeki her şeyi (alt klasörler dahil) hedefe taşı ve ara dizini kaldır; hedef yolları döner."""
+        published: list[str] = []
+        for root, _dirs, files in os.walk(self.dir, topdown=False):
+            for name in files:
+                published.append(self.publish(os.path.join(root, name), store=store))
+            try:
+                os.rmdir(root)
+            except OSError:
+                pass
+        return published
+
+
+def default_root() -> Optional[str]:
+    """Kullanıcının belirtmediği durumda önerilen ara dizin: XDG runtime (tmpfs) varsa orası."""
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    return runtime if runtime and os.path.isdir(runtime) else None
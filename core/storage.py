@@ -0,0 +1,226 @@
+import ctypes
+import os
+import shutil
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional
+
+from .formats import UnsupportedSelector, select_format
+from .utils import get_data_dir
+
+# Disk alanı ön kontrolü:
+# - Format taramasındaki filesize/filesize_approx değerlerinden işin kaç bayt tutacağı tahmin edilir.
+# - Geçici kopyalar da hesaba katılır: video+ses birleştirmede parçalar + birleşik çıktı, remux'ta
+#   kaynak + hedef, kapak gömmede .m4a + geçici kopya aynı anda diskte durur.
+# - Boş alan yetmiyorsa iş başlamadan InsufficientSpace fırlatılır (UI işi kuyruğa alır).
+# - Ön ayırma: indirilen .part dosyasına boyutu değiştirmeden (FALLOC_FL_KEEP_SIZE) yer ayrılır; yazıcı
+#   ekledikçe ayrılmış bloklara yazar (dönen diskte/NAS'ta parçalanma azalır), sürdürme mantığı
+#   (.part boyutu) etkilenmez.
+
+_RESERVE_BYTES = 256 * 1024 * 1024  # dosya sistemi ve diğer uygulamalar için pay
+_MARGIN = 1.05  # tahmin hatası payı
+
+# kind => aynı anda diskte duran kopya sayısı (final + geçici)
+_PEAK_COPIES: Dict[str, float] = {
+    "video_av": 2.0,  # .fVIDEO + .fAUDIO parçaları + birleşik .mkv
+    "video_only_remux": 2.0,  # indirilen .webm + remux edilmiş .mkv
+    "video_only_mp4": 1.0,
+    "audio_opus": 2.0,  # .webm + remux edilmiş .opus
+    "audio_m4a": 1.0,  # etiket/kapak mp4tags ile yerinde yazılır
+    "audio_transcode": 1.0,  # kaynak; dönüştürülmüş çıktı output_kbps ile ayrıca hesaplanır
+}
+
+
+class InsufficientSpace(RuntimeError):
+    """İş için tahmini disk alanı yetersiz (needed/free bayt)."""
+
+    def __init__(self, needed: int, free: int, path: str):
+        self.needed = int(needed)
+        self.free = int(free)
+        self.path = path
+        super().__init__(
+            f"Yetersiz disk alanı: yaklaşık {format_bytes(needed)} gerekli, {format_bytes(free)} boş ({path})"
+        )
+
+
+def format_bytes(n: Optional[float]) -> str:
+    if n is None:
+        return "?"
+    n = float(n)
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if abs(n) < 1024 or unit == "TB":
+            return f"{n:.0f} {unit}" if unit in ("B", "KB") else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TB"
+
+
+def free_bytes(path: str) -> int:
+    """path'in (veya var olan en yakın üst dizinin) bulunduğu dosya sistemindeki boş alan."""
+    p = os.path.abspath(os.path.expanduser(path))
+    while not os.path.exists(p):
+        parent = os.path.dirname(p)
+        if parent == p:
+            break
+        p = parent
+    return int(shutil.disk_usage(p).free)
+
+
+def _format_size(f: Dict[str, Any], duration: Optional[float] = None) -> Optional[int]:
+    for k in ("filesize", "filesize_approx"):
+        v = f.get(k)
+        if isinstance(v, (int, float)) and v > 0:
+            return int(v)
+    tbr = f.get("tbr")
+    if isinstance(tbr, (int, float)) and tbr > 0 and duration:
+        return int(float(tbr) * 1000 / 8 * float(duration))
+    return None
+
+
+def _duration_hint(formats: List[Dict[str, Any]]) -> Optional[float]:
+    """Süre bilinmiyorsa boyut ve bitrate'i bilinen bir formattan türet (boyut*8/tbr)."""
+    for f in formats:
+        size = f.get("filesize")
+        tbr = f.get("tbr")
+        if isinstance(size, (int, float)) and size > 0 and isinstance(tbr, (int, float)) and tbr > 0:
+            return float(size) * 8 / (float(tbr) * 1000)
+    return None
+
+
+def estimate_format_bytes(f: Dict[str, Any], formats: List[Dict[str, Any]]) -> Optional[int]:
+    """Tek formatın bayt tahmini: boyut bilinmiyorsa tbr x (listeden türetilen) süre; yoksa None."""
+    return _format_size(f, _duration_hint(formats))
+
+
+def estimate_job_bytes(
+    formats: List[Dict[str, Any]],
+    selector: str,
+    kind: str,
+    *,
+    items: int = 1,
+    duration: Optional[float] = None,
+    clip_seconds: Optional[float] = None,
+    output_kbps: Optional[float] = None,
+) -> Optional[int]:
+    """
+    Seçilen format için işin diskte kaplayacağı en yüksek alanı (bayt) tahmin et.
+    selector: yt-dlp -f ifadesi ('a+b' ya da format_id kombinasyonu); ilk alternatif ('/' öncesi) kullanılır.
+    items: playlist'te seçili öğe sayısı (taranan öğe temsilî kabul edilir).
+    clip_seconds: klip indirmede aralık uzunluğu; tahmin süreyle orantılı küçültülür (süre bilinmiyorsa tam boyut).
+    output_kbps: dönüştürmeli çıktılarda (MP3/FLAC) hedef bitrate; çıktı boyutu süreden hesaplanır
+        (kodlama sırasında kaynak + parçalar + birleşik çıktı aynı anda diskte durur).
+    Boyut bilinmiyorsa None (ön kontrol yapılmaz).
+    """
+    if not formats or not selector:
+        return None
+    first = selector.split("/", 1)[0]
+    media = 0
+    for part in first.split("+"):
+        try:
+            f = select_format([f for f in formats if isinstance(f, dict)], part)
+        except UnsupportedSelector:
+            return None
+        size = _format_size(f, duration) if f else None
+        if size is None:
+            return None
+        media += size
+
+    if clip_seconds:
+        total_s = duration or _duration_hint(formats)
+        if total_s:
+            media = int(media * min(1.0, float(clip_seconds) / total_s))
+
+    n = max(1, int(items))
+    if output_kbps:
+        secs = clip_seconds or duration or _duration_hint(formats)
+        if not secs:
+            return None
+        out = float(output_kbps) * 1000 / 8 * float(secs)
+        # Bitenler yalnızca çıktı olarak kalır; işlenenlerde kaynak + parçalar da durur.
+        return int((out * n + (media + out) * min(n, 2)) * _MARGIN)
+    copies = _PEAK_COPIES.get(kind, 2.0)
+    # Geçici kopyalar yalnızca işlenen öğe(ler) için diskte durur; tamamlananlar tek kopyadır.
+    temp = media * (copies - 1.0) * min(n, 2)
+    return int((media * n + temp) * _MARGIN)
+
+
+def check_free_space(path: str, needed: Optional[int]) -> None:
+    """Tahmini ihtiyaç + güvenlik payı boş alana sığmıyorsa InsufficientSpace fırlat."""
+    if not needed or needed <= 0:
+        return
+    try:
+        free = free_bytes(path)
+    except Exception:
+        return
+    if free < needed + _RESERVE_BYTES:
+        raise InsufficientSpace(needed, free, path)
+
+
+_FALLOC_KEEP_SIZE = 0x01
+_FALLOC_PROBE_BYTES = 4096
+_FALLOC_CACHE: Dict[int, bool] = {}  # st_dev => destekleniyor mu
+_FALLOC_LOCK = threading.Lock()
+_fallocate_fn = None
+
+
+def _fallocate_keep_size(fd: int, size: int) -> None:
+    """Linux fallocate(2), FALLOC_FL_KEEP_SIZE: dosya boyu değişmeden blok ayır. Desteklenmiyorsa OSError."""
+    global _fallocate_fn
+    if _fallocate_fn is None:
+        try:
+            fn = ctypes.CDLL(None, use_errno=True).fallocate
+        except (OSError, AttributeError) as e:
+            raise OSError("fallocate yok") from e
+        fn.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_longlong, ctypes.c_longlong]
+        fn.restype = ctypes.c_int
+        _fallocate_fn = fn
+    if _fallocate_fn(fd, _FALLOC_KEEP_SIZE, 0, int(size)) != 0:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err))
+
+
+def supports_fallocate(path: str) -> bool:
+    """
+    Dizinin dosya sistemi ön ayırmayı destekliyor mu? Sonuç aygıt (st_dev) başına önbelleğe alınır.
+    Deneme dosyası aynı aygıttaysa veri dizinine, değilse (aygıt başına bir kez) dizinin kendisine yazılır.
+    """
+    try:
+        dev = os.stat(os.path.expanduser(path)).st_dev
+    except OSError:
+        return False
+    with _FALLOC_LOCK:
+        if dev in _FALLOC_CACHE:
+            return _FALLOC_CACHE[dev]
+    probe_dir = os.path.expanduser(path)
+    try:
+        data_dir = get_data_dir()
+        if os.stat(data_dir).st_dev == dev:
+            probe_dir = data_dir
+    except OSError:
+        pass
+    ok = False
+    try:
+        with tempfile.NamedTemporaryFile(dir=probe_dir, prefix=".falloc-probe-") as tmp:
+            _fallocate_keep_size(tmp.fileno(), _FALLOC_PROBE_BYTES)
+            ok = True
+    except Exception:
+        ok = False
+    with _FALLOC_LOCK:
+        _FALLOC_CACHE[dev] = ok
+    return ok
+
+
+def preallocate(path: str, size: int) -> bool:
+    """Var olan dosyaya (yazılmakta olan .part) boyutunu değiştirmeden size bayt ayır. Başarılıysa True."""
+    if size <= 0:
+        return False
+    try:
+        fd = os.open(path, os.O_WRONLY)
+    except OSError:
+        return False
+    try:
+        _fallocate_keep_size(fd, size)
+        return True
+    except OSError:
+        return False
+    finally:
+        os.close(fd)
@@ -0,0 +1,191 @@
+import os
+import re
+import json
+import threading
+import time
+from typing import Optional
+
+from . import staging
+from .utils import get_data_dir
+
+# Akış önbelleği:
+# - İndirilmiş ham akışlar (ör. Opus ses 251, VP9 video 248) (video id, format_id) anahtarıyla saklanır.
+# - Aynı videonun başka bir formatı istendiğinde gereken akış önbellekten yt-dlp'nin beklediği
+#   dosya adına bağlanır (hardlink > reflink > kopya); yt-dlp dosyayı "zaten indirilmiş" görüp atlar.
+# - Toplam boyut _MAX_BYTES ile sınırlıdır; en uzun süredir kullanılmayan girdiler silinir (LRU).
+# - Çıktılara yazan adımlar (metadata, kapak, remux) her zaman yeni dosya yazıp rename ettiği için
+#   hardlink'li önbellek girdisi sonradan değişmez.
+
+_MAX_BYTES = 4 * 1024 * 1024 * 1024
+_LOCK = threading.Lock()
+# Çok çıktılı işler sürerken bu videoların akışları boyut sınırı yüzünden silinmez.
+_PINNED: set[str] = set()
+_SAFE_RE = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def get_cache_dir() -> str:
+    d = os.path.join(get_data_dir(), "stream_cache")
+    os.makedirs(d, exist_ok=True)
+    return d
+
+
+def _index_path() -> str:
+    return os.path.join(get_cache_dir(), "index.json")
+
+
+def _read_index() -> dict:
+    try:
+        with open(_index_path(), "r", encoding="utf-8") as f:
+            data = json.load(f) or {}
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+
+def _write_index(data: dict) -> None:
+    try:
+        path = _index_path()
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+    except Exception:
+        pass
+
+
+def _key(video_id: str, format_id: str) -> str:
+    return f"{video_id}:{format_id}"
+
+
+def _entry_path(entry: dict) -> str:
+    return os.path.join(get_cache_dir(), str(entry.get("name") or ""))
+
+
+def _clone_file(src: str, dst: str) -> None:
+    """dst'yi src'nin kopyası yap: hardlink, olmazsa reflink (btrfs/xfs), olmazsa çekirdek içi kopya."""
+    try:
+        os.link(src, dst)
+        return
+    except OSError:
+        pass
+    staging.copy_file(src, dst)
+
+
+def pin(video_id: str) -> None:
+    with _LOCK:
+        _PINNED.add(video_id)
+
+
+def unpin_all(video_ids) -> None:
+    """Sabitlemeyi kaldır ve boyut sınırını yeniden uygula."""
+    with _LOCK:
+        for vid in video_ids:
+            _PINNED.discard(vid)
+        data = _read_index()
+        _evict(data)
+        _write_index(data)
+
+
+def has_video(video_id: Optional[str]) -> bool:
+    """Bu videoya ait en az bir akış önbellekte mi?"""
+    if not video_id:
+        return False
+    prefix = f"{video_id}:"
+    with _LOCK:
+        return any(k.startswith(prefix) for k in _read_index())
+
+
+def materialize(video_id: str, format_id: str, dst: str) -> bool:
+    """Önbellekteki akışı dst'ye bağla. Yoksa (veya dst zaten varsa) False."""
+    with _LOCK:
+        data = _read_index()
+        entry = data.get(_key(video_id, format_id))
+        if not isinstance(entry, dict):
+            return False
+        src = _entry_path(entry)
+        if not os.path.isfile(src):
+            data.pop(_key(video_id, format_id), None)
+            _write_index(data)
+            return False
+        if os.path.exists(dst):
+            return False
+        try:
+            _clone_file(src, dst)
+        except Exception:
+            return False
+        entry["last_used"] = time.time()
+        _write_index(data)
+    return True
+
+
+def forget(video_id: str) -> None:
+    """Videonun tüm akışlarını önbellekten sil (bozuk çıktı yeniden indirilecekse kaynak da tazelenir)."""
+    prefix = f"{video_id}:"
+    with _LOCK:
+        data = _read_index()
+        for k in [k for k in data if k.startswith(prefix)]:
+            try:
+                os.remove(_entry_path(data[k]))
+            except Exception:
+                pass
+            data.pop(k, None)
+        _write_index(data)
+
+
+def store(path: str, video_id: str, format_id: str, *, move: bool = False) -> bool:
+    """
+    Tamamlanmış ham akışı önbelleğe al.
+    move=True: kaynak dosya önbelleğe taşınır (ara dosyalar); False: kaynak yerinde kalır (bağlanır).
+    Aynı anahtar zaten varsa yalnızca kullanım zamanı güncellenir.
+    """
+    if not (path and video_id and format_id) or not os.path.isfile(path):
+        return False
+    ext = os.path.splitext(path)[1]
+    name = _SAFE_RE.sub("_", f"{video_id}.f{format_id}") + ext
+    dst = os.path.join(get_cache_dir(), name)
+    with _LOCK:
+        data = _read_index()
+        key = _key(video_id, format_id)
+        entry = data.get(key)
+        if isinstance(entry, dict) and os.path.isfile(_entry_path(entry)):
+            entry["last_used"] = time.time()
+            if move:
+                # Aynı akış zaten önbellekte: ara dosya fazlalık.
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except Exception:
+                    return False
+        else:
+            try:
+                if os.path.exists(dst):
+                    os.remove(dst)
+                if move:
+                    staging.move_file(path, dst)
+                else:
+                    _clone_file(path, dst)
+            except Exception:
+                return False
+            data[key] = {"name": name, "size": os.path.getsize(dst), "last_used": time.time()}
+        _evict(data, keep=key)
+        _write_index(data)
+    return True
+
+
+def _evict(data: dict, *, keep: Optional[str] = None) -> None:
+    """Toplam boyut sınırı aşılıyorsa en eski kullanılan girdileri sil (çağıran _LOCK'u tutar)."""
+    for k in [k for k, e in data.items() if not isinstance(e, dict) or not os.path.isfile(_entry_path(e))]:
+        data.pop(k, None)
+    total = sum(int(e.get("size") or 0) for e in data.values())
+    for k, e in sorted(data.items(), key=lambda kv: float(kv[1].get("last_used") or 0)):
+        if total <= _MAX_BYTES:
+            break
+        if k == keep or k.split(":", 1)[0] in _PINNED:
+            continue
+        try:
+            os.remove(_entry_path(e))
+        except Exception:
+            pass
+        total -= int(e.get("size") or 0)
+        data.pop(k, None)
@@ -0,0 +1,235 @@
+import os
+import json
+import shutil
+import statistics
+import threading
+import time
+from typing import Optional
+
+from .utils import get_data_dir
+
+# Adaptif aktarım modu:
+# - yt-dlp varsayılanında DASH/HLS parçaları tek tek indirilir (--concurrent-fragments 1).
+# - İş başında seviye kalıcı EWMA'dan (önceki işlerin ölçümü) seçilir.
+# - İşin ilk saniyelerinde ölçülen hız (Mb/sn) EWMA'ya işlenir ve aynı işe de uygulanır: öğe başına
+#   ayrı yt-dlp ile inen playlist'te sonraki öğeler ölçülen hıza göre seçilen seviyeyle başlar
+#   (adapt_transfer_settings / swap_transfer_args). Tek süreçli indirme (tek video) çalışırken
+#   değiştirilemez; ölçüm sonraki işe yarar.
+# - Opsiyonel: aria2c varsa çok bağlantılı harici indirici kullanılabilir.
+# - Boyut biliniyorsa ve dosya sistemi destekliyorsa hedef dosyaya baştan yer ayrılır; dönen disklerde
+#   ve NAS'ta parçalanmayı azaltır. aria2c bunu --file-allocation=falloc ile yapar; yt-dlp'nin kendi
+#   indiricisinde ayar olmadığından indirici .part'a ilk ilerleme satırındaki boyutla yer ayırır
+#   (storage.preallocate).
+
+# (min_mbps, concurrent_fragments, http_chunk_size)
+_LEVELS: tuple[tuple[float, int, str], ...] = (
+    (0.0, 1, "1M"),
+    (4.0, 2, "2M"),
+    (15.0, 4, "5M"),
+    (50.0, 8, "10M"),
+    (150.0, 16, "20M"),
+)
+_DEFAULT_LEVEL = 2  # ölçüm yokken: 4 parça, 5M chunk
+
+_EWMA_ALPHA = 0.5
+_PROBE_WINDOW_S = 8.0
+_PROBE_MIN_SAMPLES = 4
+
+_STATE_LOCK = threading.Lock()
+
+
+def _state_path() -> str:
+    return os.path.join(get_data_dir(), "transfer_state.json")
+
+
+def _read_state() -> dict:
+    try:
+        with open(_state_path(), "r", encoding="utf-8") as f:
+            return json.load(f) or {}
+    except Exception:
+        return {}
+
+
+def _write_state(state: dict) -> None:
+    try:
+        path = _state_path()
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+    except Exception:
+        pass
+
+
+def _level_for_mbps(mbps: Optional[float]) -> int:
+    if mbps is None or mbps <= 0:
+        return _DEFAULT_LEVEL
+    level = 0
+    for i, (min_mbps, _n, _chunk) in enumerate(_LEVELS):
+        if mbps >= min_mbps:
+            level = i
+    return level
+
+
+def _find_external_downloader(name: Optional[str]) -> Optional[str]:
+    """'auto' => aria2c (varsa); açık isim verildiyse PATH'te olmalı."""
+    if not name:
+        return None
+    if name == "auto":
+        return "aria2c" if shutil.which("aria2c") else None
+    return name if shutil.which(name) else None
+
+
+def choose_transfer_settings(
+    mode: str = "adaptive",
+    *,
+    external_downloader: Optional[str] = None,
+    preallocate: bool = False,
+) -> dict:
+    """
+    İş başlangıcında kullanılacak aktarım ayarlarını seç.
+    mode: "adaptive" (ölçüm geçmişine göre) | "default" (yt-dlp varsayılanları, ek bayrak yok)
+    preallocate: hedef dosyaya baştan yer ayrılsın (aria2c: falloc; yt-dlp indiricisinde çağıran ayırır).
+    Dönen sözlük: level, concurrent_fragments, http_chunk_size, downloader, estimate_mbps, file_allocation
+    """
+    file_allocation = "falloc" if preallocate else "none"
+    if mode != "adaptive":
+        return {
+            "level": None,
+            "concurrent_fragments": None,
+            "http_chunk_size": None,
+            "downloader": None,
+            "estimate_mbps": None,
+            "file_allocation": file_allocation,
+        }
+
+    with _STATE_LOCK:
+        state = _read_state()
+    est = state.get("ewma_mbps")
+    try:
+        est = float(est) if est is not None else None
+    except Exception:
+        est = None
+
+    level = _level_for_mbps(est)
+    _min, n, chunk = _LEVELS[level]
+    return {
+        "level": level,
+        "concurrent_fragments": n,
+        "http_chunk_size": chunk,
+        "downloader": _find_external_downloader(external_downloader),
+        "estimate_mbps": est,
+        "file_allocation": file_allocation,
+    }
+
+
+def transfer_args(settings: dict) -> list[str]:
+    """Seçilen ayarları yt-dlp argümanlarına çevir."""
+    args: list[str] = []
+    n = settings.get("concurrent_fragments")
+    chunk = settings.get("http_chunk_size")
+    if n:
+        args += ["--concurrent-fragments", str(int(n))]
+    if chunk:
+        args += ["--http-chunk-size", str(chunk)]
+
+    dl = settings.get("downloader")
+    if dl == "aria2c":
+        conns = max(1, min(16, int(n or 1)))
+        split = str(chunk or "1M")
+        alloc = settings.get("file_allocation") or "none"
+        args += [
+            "--downloader", "aria2c",
+            "--downloader-args",
+            f"aria2c:-x {conns} -s {conns} -k {split} --file-allocation={alloc} --summary-interval=1 --console-log-level=warn",
+        ]
+    elif dl:
+        args += ["--downloader", str(dl)]
+    return args
+
+
+def adapt_transfer_settings(settings: dict, measured_mbps: Optional[float]) -> dict:
+    """Ölçülen hıza göre seviyesi yeniden seçilmiş ayarlar (adaptif değilse ya da ölçüm yoksa aynısı)."""
+    if settings.get("level") is None or measured_mbps is None or measured_mbps <= 0:
+        return settings
+    level = _level_for_mbps(measured_mbps)
+    _min, n, chunk = _LEVELS[level]
+    return {**settings, "level": level, "concurrent_fragments": n, "http_chunk_size": chunk, "estimate_mbps": measured_mbps}
+
+
+def swap_transfer_args(cmd: list[str], old: dict, new: dict) -> list[str]:
+    """cmd içindeki transfer_args(old) dilimini transfer_args(new) ile değiştir (bulunamazsa cmd aynen)."""
+    old_args, new_args = transfer_args(old), transfer_args(new)
+    if old_args == new_args or not old_args:
+        return cmd
+    n = len(old_args)
+    for i in range(len(cmd) - n + 1):
+        if cmd[i:i + n] == old_args:
+            return cmd[:i] + new_args + cmd[i + n:]
+    return cmd
+
+
+def describe_transfer(settings: dict, measured_mbps: Optional[float] = None) -> str:
+    """UI için kısa özet: '4 parça • 5M chunk • aria2c • ölçülen 42.0 Mb/sn'"""
+    if settings.get("level") is None:
+        parts = ["yt-dlp varsayılanı"]
+    else:
+        parts = [f"{settings.get('concurrent_fragments')} parça", f"{settings.get('http_chunk_size')} chunk"]
+    parts.append(str(settings.get("downloader") or "yt-dlp"))
+    if settings.get("file_allocation") == "falloc":
+        parts.append("ön ayırma")
+    if measured_mbps is not None and measured_mbps > 0:
+        parts.append(f"ölçülen {measured_mbps:.1f} Mb/sn")
+    return " • ".join(parts)
+
+
+def record_throughput(mbps: float) -> None:
+    """Ölçülen hızı kalıcı EWMA'ya işle (sonraki işlerin seviyesi buna göre seçilir)."""
+    if mbps is None or mbps <= 0:
+        return
+    with _STATE_LOCK:
+        state = _read_state()
+        prev = state.get("ewma_mbps")
+        try:
+            prev = float(prev) if prev is not None else None
+        except Exception:
+            prev = None
+        state["ewma_mbps"] = mbps if prev is None else (_EWMA_ALPHA * mbps + (1.0 - _EWMA_ALPHA) * prev)
+        state["last_mbps"] = mbps
+        state["last_ts"] = time.time()
+        _write_state(state)
+
+
+class ThroughputProbe:
+    """İşin ilk saniyelerindeki hız örneklerini toplar (ilk örnekten itibaren window_s).
+
+    feed() pencere dolduğunda ölçülen medyan hızı (Mb/sn) bir kez döndürür; aksi halde None.
+    """
+
+    def __init__(self, window_s: float = _PROBE_WINDOW_S, min_samples: int = _PROBE_MIN_SAMPLES):
+        self.window_s = float(window_s)
+        self.min_samples = int(min_samples)
+        self._samples: list[float] = []
+        self._t0: Optional[float] = None
+        self._lock = threading.Lock()
+        self.result_mbps: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.result_mbps is not None
+
+    def feed(self, speed_mbps: Optional[float]) -> Optional[float]:
+        if speed_mbps is None or speed_mbps <= 0:
+            return None
+        with self._lock:
+            if self.result_mbps is not None:
+                return None
+            now = time.monotonic()
+            if self._t0 is None:
+                self._t0 = now
+            self._samples.append(float(speed_mbps))
+            if (now - self._t0) < self.window_s or len(self._samples) < self.min_samples:
+                return None
+            self.result_mbps = float(statistics.median(self._samples))
+            self._samples = []
+            return self.result_mbps
@@ -1,9 +1,23 @@
+import os
 import re
 from typing import Optional
 
 _ANSI_RE = re.compile(r"\x1b\[[0-9;]*m")
 # [download]  12.3%  veya [download] 12,3% gibi varyasyonları yakala
 _PROGRESS_RE = re.compile(r"\[download\]\s+(\d{1,3}(?:[.,]\d+)?)%")
+# Harici indirici (aria2c) özet satırı: [#2089b0 400.0KiB/33.2MiB(1%) CN:4 DL:1.2MiB ETA:4m51s]
+_ARIA2_PROGRESS_RE = re.compile(r"\[#\w+\s+\S+/\S+\((\d{1,3})%\)")
+
+
+def get_data_dir() -> str:
+    """Kullanıcı veri alanı (Flatpak'te ~/.var/app/.../data) altındaki uygulama dizini."""
+    data_home = os.environ.get("XDG_DATA_HOME")
+    if not data_home:
+        data_home = os.path.join(os.path.expanduser("~"), ".local", "share")
+    d = os.path.join(data_home, "youtube-downloader")
+    os.makedirs(d, exist_ok=True)
+    return d
+
 
 def parse_progress(line: str) -> Optional[float]:
     if not line:
@@ -12,7 +26,7 @@ def parse_progress(line: str) -> Optional[float]:
     # Olası ANSI renk kodlarını temizle
     line = _ANSI_RE.sub("", line)
 
-    m = _PROGRESS_RE.search(line)
+    m = _PROGRESS_RE.search(line) or _ARIA2_PROGRESS_RE.search(line)
     if not m:
         return None
 
@@ -23,3 +37,46 @@ def parse_progress(line: str) -> Optional[float]:
         return pct / 100.0
     except Exception:
         return None
+
+
+_TIMESTAMP_RE = re.compile(r"^(?:(\d+):)?(?:(\d+):)?(\d+(?:[.,]\d+)?)$")
+
+
+def parse_timestamp(text: str) -> Optional[float]:
+    """'1:02:03.5', '2:30' veya '90' => saniye; geçersizse None."""
+    m = _TIMESTAMP_RE.match((text or "").strip())
+    if not m:
+        return None
+    a, b, sec = m.groups()
+    hours, minutes = (a, b) if b is not None else (None, a)
+    total = float(sec.replace(",", "."))
+    if minutes is not None:
+        total += int(minutes) * 60
+    if hours is not None:
+        total += int(hours) * 3600
+    return total
+
+
+def parse_clip_range(text: str) -> Optional[tuple[float, float]]:
+    """'1:02:03-1:02:33' => (başlangıç, bitiş) saniye. Boşsa None; geçersizse ValueError."""
+    text = (text or "").strip()
+    if not text:
+        return None
+    start_s, sep, end_s = text.partition("-")
+    start = parse_timestamp(start_s)
+    end = parse_timestamp(end_s) if sep else None
+    if start is None or end is None or end <= start:
+        raise ValueError(f"Geçersiz zaman aralığı: {text}")
+    return start, end
+
+
+def format_timestamp(seconds: float) -> str:
+    """Saniye => '1h02m03s' / '2m30s' / '45s' (dosya adında güvenli)."""
+    s = int(seconds)
+    h, rem = divmod(s, 3600)
+    m, sec = divmod(rem, 60)
+    if h:
+        return f"{h}h{m:02d}m{sec:02d}s"
+    if m:
+        return f"{m}m{sec:02d}s"
+    return f"{sec}s"
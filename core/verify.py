@@ -0,0 +1,273 @@
+import json
+import os
+import shutil
+import struct
+import subprocess
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional
+
+from . import mkvtags, mp4tags, streamcache
+from .oggopus import ogg_crc
+from .utils import get_data_dir
+
+# Bitmiş çıktıların bütünlük doğrulaması (yt-dlp'nin 0 ile çıkması kesik birleştirmeyi/bozuk remux'u
+# yakalamaz):
+# - Yapı: MKV/WebM Segment'i ve üst düzey elemanları tam (mkvtags), MP4/M4A atomları dosya sonuna
+#   kadar tutarlı ve moov+mdat var (mp4tags), Ogg son sayfası EOS işaretli ve CRC'si doğru.
+# - Akışlar (ffprobe): biçimin vaat ettiği video/ses akışları var, codec'leri seçilen akışlarınkiyle
+#   (yt-dlp vcodec/acodec; dönüştürmede hedef codec) aynı. Kapak (attached_pic) sayılmaz.
+# - Süre: yt-dlp'nin bildirdiği süreye (klipte aralık uzunluğuna) tolerans içinde.
+# Doğrulamalar küçük, sınırlı bir arka plan havuzunda çalışır; sonraki indirme beklemez. Sonuçlar
+# verify.json'a yazılır; bozuk çıktılar (deneme sınırına kadar) yeniden kuyruğa alınmak üzere listelenir.
+
+OK = "ok"
+BAD = "bad"
+QUEUED = "queued"
+
+_WORKERS = 2
+_MAX_RECORDS = 1000
+REQUEUE_LIMIT = 2
+_DURATION_TOL_S = 2.0
+_DURATION_TOL_FRAC = 0.01
+_CLIP_TOL_S = 5.0  # klip kesimi anahtar karelere hizalanır
+_OGG_MAX_PAGE = 27 + 255 + 255 * 255
+
+_LOG_LOCK = threading.Lock()
+_POOL_LOCK = threading.Lock()
+_POOL: Optional[ThreadPoolExecutor] = None
+
+_VIDEO_KINDS = ("video_av", "video_only_remux", "video_only_mp4")
+_AUDIO_KINDS = ("video_av", "audio_m4a", "audio_opus", "audio_transcode")
+_CODEC_PREFIXES = (
+    ("vp09", "vp9"), ("vp9", "vp9"), ("av01", "av1"), ("avc", "h264"), ("h264", "h264"),
+    ("hev1", "hevc"), ("hvc1", "hevc"), ("mp4a", "aac"), ("aac", "aac"),
+)
+
+
+class VerifyError(RuntimeError):
+    """Dosya yapısı ya da içeriği beklenenle uyuşmuyor."""
+
+
+def _codec(name: Optional[str]) -> Optional[str]:
+    name = str(name or "").strip().lower()
+    if not name or name in ("none", "na"):
+        return None
+    for prefix, codec in _CODEC_PREFIXES:
+        if name.startswith(prefix):
+            return codec
+    return name.split(".", 1)[0]
+
+
+def _check_ogg(path: str) -> None:
+    """Ogg: ilk sayfa başı ve dosyayı tam bitiren, EOS işaretli, CRC'si doğru son sayfa."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        if f.read(4) != b"OggS":
+            raise VerifyError("Ogg başlığı yok.")
+        start = max(0, size - _OGG_MAX_PAGE)
+        f.seek(start)
+        tail = f.read()
+    pos = tail.rfind(b"OggS")
+    while pos >= 0:
+        page = tail[pos:]
+        if len(page) >= 27 and len(page) >= 27 + page[26]:
+            lacing = page[27:27 + page[26]]
+            if 27 + len(lacing) + sum(lacing) == len(page):
+                crc = struct.unpack_from("<I", page, 22)[0]
+                if ogg_crc(page[:22] + b"\0\0\0\0" + page[26:]) != crc:
+                    raise VerifyError("Son Ogg sayfasının CRC'si hatalı.")
+                if not page[5] & 0x04:
+                    raise VerifyError("Ogg akışı bitmemiş (EOS yok).")
+                return
+        pos = tail.rfind(b"OggS", 0, pos)
+    raise VerifyError("Ogg dosyası kesik (son sayfa tamamlanmamış).")
+
+
+def _probe(path: str) -> Optional[dict]:
+    """ffprobe akış/süre bilgisi; ffprobe yoksa None."""
+    ffprobe = shutil.which("ffprobe")
+    if not ffprobe:
+        return None
+    try:
+        proc = subprocess.run(
+            [
+                ffprobe, "-v", "error",
+                "-show_entries", "format=duration:stream=codec_type,codec_name:stream_disposition=attached_pic",
+                "-of", "json", path,
+            ],
+            check=False,
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+    except Exception as e:
+        raise VerifyError(f"ffprobe çalıştırılamadı: {e}") from e
+    if proc.returncode != 0:
+        raise VerifyError(f"ffprobe dosyayı açamadı: {(proc.stderr or '').strip()[-200:]}")
+    try:
+        data = json.loads(proc.stdout or "{}")
+    except ValueError as e:
+        raise VerifyError("ffprobe çıktısı okunamadı.") from e
+    return data if isinstance(data, dict) else {}
+
+
+def check(path: str, expect: dict) -> Optional[str]:
+    """
+    Dosya beklentiye uyuyorsa None, uymuyorsa nedeni.
+    expect: kind (FORMAT_OPTIONS kind), codec (dönüştürme hedefi), vcodec/acodec (yt-dlp), duration (sn),
+        clip (klip mi).
+    """
+    p = Path(path)
+    try:
+        if p.stat().st_size == 0:
+            return "Dosya boş."
+        ext = p.suffix.lower()
+        if ext in (".mkv", ".mka", ".webm"):
+            mkvtags.check_structure(path)
+        elif ext in (".mp4", ".m4a"):
+            mp4tags.check_structure(path)
+        elif ext in (".opus", ".ogg"):
+            _check_ogg(path)
+        info = _probe(path)
+    except (RuntimeError, OSError) as e:
+        return f"Konteyner bozuk: {e}"
+    if info is None:
+        return None  # ffprobe yok: yalnızca yapı denetlendi
+
+    kind = str(expect.get("kind") or "")
+    videos, audios = [], []
+    for s in info.get("streams") or []:
+        if (s.get("disposition") or {}).get("attached_pic"):
+            continue
+        if s.get("codec_type") == "video":
+            videos.append(str(s.get("codec_name") or ""))
+        elif s.get("codec_type") == "audio":
+            audios.append(str(s.get("codec_name") or ""))
+    for label, want, found, codec in (
+        ("Video", kind in _VIDEO_KINDS, videos, _codec(expect.get("vcodec"))),
+        ("Ses", kind in _AUDIO_KINDS, audios, _codec(expect.get("codec") if kind == "audio_transcode" else expect.get("acodec"))),
+    ):
+        if want and not found:
+            return f"{label} akışı yok."
+        if found and not want:
+            return f"Beklenmeyen {label.lower()} akışı: {', '.join(found)}"
+        if want and codec and codec not in found:
+            return f"{label} codec'i {', '.join(found)} (beklenen {codec})."
+
+    try:
+        expected = float(expect.get("duration") or 0)
+        actual = float((info.get("format") or {}).get("duration") or 0)
+    except (TypeError, ValueError):
+        return None
+    if expected > 0 and actual > 0:
+        tol = _CLIP_TOL_S if expect.get("clip") else max(_DURATION_TOL_S, expected * _DURATION_TOL_FRAC)
+        if abs(actual - expected) > tol:
+            return f"Süre {actual:.1f} sn (beklenen {expected:.1f} sn)."
+    return None
+
+
+# ---------- Kayıt ----------
+
+def _log_path() -> str:
+    return os.path.join(get_data_dir(), "verify.json")
+
+
+def _read_log() -> dict:
+    try:
+        with open(_log_path(), "r", encoding="utf-8") as f:
+            data = json.load(f) or {}
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+
+def _write_log(data: dict) -> None:
+    try:
+        if len(data) > _MAX_RECORDS:
+            newest = sorted(data.items(), key=lambda kv: float(kv[1].get("ts") or 0), reverse=True)
+            data = dict(newest[:_MAX_RECORDS])
+        path = _log_path()
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+    except Exception:
+        pass
+
+
+def record(result: dict) -> dict:
+    """Sonucu dosya yoluna göre yaz; aynı dosya art arda bozuk çıkarsa deneme sayısı artar."""
+    entry = dict(result)
+    entry["ts"] = time.time()
+    with _LOG_LOCK:
+        data = _read_log()
+        prev = data.get(entry["path"])
+        attempts = int(prev.get("attempts") or 0) if isinstance(prev, dict) and prev.get("state") in (BAD, QUEUED) else 0
+        entry["attempts"] = attempts + 1 if entry.get("state") == BAD else 0
+        data[entry["path"]] = entry
+        _write_log(data)
+    return entry
+
+
+def mark_queued(path: str) -> None:
+    with _LOG_LOCK:
+        data = _read_log()
+        entry = data.get(path)
+        if isinstance(entry, dict):
+            entry["state"] = QUEUED
+            _write_log(data)
+
+
+def pending_requeue() -> list[dict]:
+    """Yeniden indirilmesi gereken (bozuk ya da kuyruğa alınıp bitmemiş) çıktılar, deneme sınırı içinde."""
+    with _LOG_LOCK:
+        data = _read_log()
+    return [
+        dict(e) for e in data.values()
+        if isinstance(e, dict) and e.get("state") in (BAD, QUEUED) and int(e.get("attempts") or 0) <= REQUEUE_LIMIT
+    ]
+
+
+def discard(entry: dict) -> None:
+    """Bozuk çıktıyı ve (kaynağı olabilecek) önbellekteki akışlarını sil; yt-dlp 'zaten indirilmiş' saymasın."""
+    try:
+        os.remove(str(entry.get("path") or ""))
+    except OSError:
+        pass
+    if entry.get("video_id"):
+        streamcache.forget(str(entry["video_id"]))
+
+
+# ---------- Arka plan havuzu ----------
+
+def _pool() -> ThreadPoolExecutor:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ThreadPoolExecutor(max_workers=_WORKERS, thread_name_prefix="verify")
+        return _POOL
+
+
+def submit(path: str, expect: dict, on_result: Optional[Callable[[dict], None]] = None) -> Future:
+    """
+    Doğrulamayı arka planda başlat (en fazla _WORKERS eşzamanlı). Sonuç kaydedilir ve on_result ile
+    bildirilir: path, state (OK/BAD), reason, attempts ve expect'teki alanlar.
+    """
+    def job() -> dict:
+        note = None
+        try:
+            reason = check(path, expect)
+        except Exception as e:  # denetimin kendi hatası çıktıyı bozuk saymaz
+            reason, note = None, f"Doğrulanamadı: {e}"
+        entry = record({**expect, "path": path, "state": BAD if reason else OK, "reason": reason or note})
+        if on_result is not None:
+            try:
+                on_result(entry)
+            except Exception:
+                pass
+        return entry
+
+    return _pool().submit(job)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Testler depo kökünden 'core' paketini içe aktarır (pytest hangi dizinden çalıştırılırsa çalıştırılsın).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
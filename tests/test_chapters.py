@@ -0,0 +1,31 @@
+import json
+
+from core.downloader import _parse_chapters
+
+CHAPTERS = json.dumps([
+    {"start_time": 60.0, "end_time": 180.0, "title": "İkinci"},
+    {"start_time": 0.0, "end_time": 60.0, "title": "Giriş"},
+    {"start_time": 180.0, "end_time": 300.0, "title": ""},
+])
+
+
+def test_parse_chapters_sorted_with_default_titles():
+    assert _parse_chapters(CHAPTERS) == [
+        (0.0, 60.0, "Giriş"),
+        (60.0, 180.0, "İkinci"),
+        (180.0, 300.0, "Bölüm 3"),
+    ]
+
+
+def test_parse_chapters_shifted_to_clip():
+    assert _parse_chapters(CHAPTERS, clip=(30.0, 200.0)) == [
+        (0.0, 30.0, "Giriş"),
+        (30.0, 150.0, "İkinci"),
+        (150.0, 170.0, "Bölüm 3"),
+    ]
+
+
+def test_parse_chapters_needs_two():
+    assert _parse_chapters(CHAPTERS, clip=(70.0, 170.0)) == []
+    assert _parse_chapters("NA") == []
+    assert _parse_chapters("null") == []
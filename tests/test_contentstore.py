@@ -0,0 +1,71 @@
+import errno
+import hashlib
+import os
+
+import pytest
+
+from core import contentstore, staging
+from core.downloader import _ArtifactManifest
+
+
+def _cross_device(monkeypatch, stage):
+    """Ara dizin başka dosya sisteminde: oradan rename EXDEV verir, taşıma kopyaya düşer."""
+    real = os.replace
+
+    def replace(src, dst):
+        if os.path.dirname(src) == str(stage):
+            raise OSError(errno.EXDEV, "cross-device")
+        real(src, dst)
+
+    monkeypatch.setattr(staging.os, "replace", replace)
+
+
+def test_place_hashes_during_copy(tmp_path, monkeypatch):
+    root = tmp_path / "hedef"
+    root.mkdir()
+    store = contentstore.ContentStore(str(root))
+    data = os.urandom(10 * 1024 * 1024 + 7)
+    src = tmp_path / "a.opus"
+    src.write_bytes(data)
+    monkeypatch.setattr(contentstore, "file_digest", lambda path: (_ for _ in ()).throw(AssertionError(path)))
+    _cross_device(monkeypatch, tmp_path)
+
+    digest = store.place(str(src), str(root / "a.opus"), move=True)
+    assert digest == hashlib.sha256(data).hexdigest()
+    assert not src.exists()
+    assert os.path.samefile(store.object_path(digest), root / "a.opus")
+
+    # Aynı içerik: yeni kopya nesnenin hardlink'i olur
+    src.write_bytes(data)
+    assert store.place(str(src), str(root / "b.opus"), move=True) == digest
+    assert os.path.samefile(root / "a.opus", root / "b.opus")
+
+
+def test_manifest_outputs_reported_once(tmp_path):
+    seen = []
+    manifest = _ArtifactManifest(tmp_path, seen.append)
+    manifest.destination(str(tmp_path / "a.webm"))
+    for p in (str(tmp_path / "a.opus"), None, str(tmp_path / "a.opus"), str(tmp_path / "a" / "01 - x.opus")):
+        manifest.output(p)
+    assert seen == manifest.outputs == [str(tmp_path / "a.opus"), str(tmp_path / "a" / "01 - x.opus")]
+
+
+def test_failed_staged_job_publishes_only_finished_outputs(tmp_path, monkeypatch):
+    from core import downloader
+
+    def fake(url, output_dir, *args, on_output=None, **kwargs):
+        d = tmp_path / "ara" / os.listdir(tmp_path / "ara")[0]
+        assert str(d) == output_dir
+        (d / "01 - a.opus").write_bytes(b"bitti")
+        on_output(str(d / "01 - a.opus"))
+        (d / "02 - b.webm.part").write_bytes(b"yarim")
+        (d / "02 - b.jpg").write_bytes(b"kapak")
+        raise RuntimeError("ffmpeg hatası")
+
+    monkeypatch.setattr(downloader, "_download_video", fake)
+    out = tmp_path / "hedef"
+    with pytest.raises(RuntimeError):
+        downloader.download_video("u", str(out), "audio_opus", lambda *a: None, lambda m: None,
+                                  staging_dir=str(tmp_path / "ara"))
+    assert sorted(os.listdir(out)) == ["01 - a.opus"]
+    assert os.listdir(tmp_path / "ara") == []
@@ -0,0 +1,40 @@
+import pytest
+
+from core.formats import UnsupportedSelector, match_selector
+
+FORMATS = [
+    {"format_id": "251", "vcodec": "none", "acodec": "opus", "ext": "webm", "filesize": 4_000_000},
+    {"format_id": "140", "vcodec": "none", "acodec": "mp4a.40.2", "ext": "m4a", "filesize": 3_000_000},
+    {"format_id": "137", "vcodec": "avc1.640028", "acodec": "none", "ext": "mp4", "height": 1080, "filesize": 90_000_000},
+    {"format_id": "248", "vcodec": "vp9", "acodec": "none", "ext": "webm", "height": 1080, "filesize": 80_000_000},
+    {"format_id": "136", "vcodec": "avc1.4d401f", "acodec": "none", "ext": "mp4", "height": 720, "filesize_approx": 40_000_000},
+]
+
+
+def ids(chosen):
+    return [f["format_id"] for f in chosen] if chosen is not None else None
+
+
+def test_best_picks_largest_match():
+    assert ids(match_selector(FORMATS, "bestaudio")) == ["251"]
+    assert ids(match_selector(FORMATS, "bestvideo[height<=720]")) == ["136"]
+
+
+def test_merge_and_filters():
+    sel = "bestvideo[height=1080][vcodec^=avc1]+bestaudio[ext=m4a]"
+    assert ids(match_selector(FORMATS, sel)) == ["137", "140"]
+
+
+def test_alternatives_fall_through():
+    assert ids(match_selector(FORMATS, "bestvideo[height=2160]+bestaudio/bestvideo[vcodec!^=avc1]")) == ["248"]
+    assert ids(match_selector(FORMATS, "bestvideo[height=2160]/999")) is None
+
+
+def test_bare_format_id():
+    assert ids(match_selector(FORMATS, "140")) == ["140"]
+
+
+@pytest.mark.parametrize("selector", ["best[height=1080]", "bestvideo[height=1080", "140[ext=m4a]"])
+def test_unsupported_selector(selector):
+    with pytest.raises(UnsupportedSelector):
+        match_selector(FORMATS, selector)
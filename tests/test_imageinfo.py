@@ -0,0 +1,59 @@
+import struct
+
+import pytest
+
+from core.imageinfo import dimensions
+
+
+def _png(w: int, h: int) -> bytes:
+    ihdr = struct.pack(">II", w, h) + b"\x08\x02\0\0\0"
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + ihdr + b"\0\0\0\0"
+
+
+def _jpeg(w: int, h: int, *, sof: int = 0xC0) -> bytes:
+    exif = b"\xff\xe1" + struct.pack(">H", 2 + 60000) + b"Exif\0\0" + b"\0" * 59994
+    dqt = b"\xff\xdb" + struct.pack(">H", 67) + b"\0" * 65
+    frame = bytes([0xFF, sof]) + struct.pack(">HBHHB", 17, 8, h, w, 3) + b"\0" * 9
+    return b"\xff\xd8" + exif + b"\xff\xff" + dqt + frame + b"\xff\xda" + b"\0" * 16 + b"\xff\xd9"
+
+
+def _webp(chunk: bytes, payload: bytes) -> bytes:
+    body = b"WEBP" + chunk + struct.pack("<I", len(payload)) + payload
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+@pytest.mark.parametrize(
+    "data, expected",
+    [
+        (_png(1280, 720), (1280, 720)),
+        (_jpeg(640, 360), (640, 360)),
+        (_jpeg(1920, 1080, sof=0xC2), (1920, 1080)),  # progressive
+        (_webp(b"VP8 ", b"\0\0\0\x9d\x01\x2a" + struct.pack("<HH", 480, 270) + b"\0" * 8), (480, 270)),
+        (_webp(b"VP8L", b"\x2f" + struct.pack("<I", (300 - 1) | (200 - 1) << 14) + b"\0" * 8), (300, 200)),
+        (_webp(b"VP8X", b"\0" * 4 + (1023).to_bytes(3, "little") + (575).to_bytes(3, "little")), (1024, 576)),
+    ],
+)
+def test_dimensions(tmp_path, data, expected):
+    p = tmp_path / "img"
+    p.write_bytes(data)
+    assert dimensions(str(p)) == expected
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"",
+        b"GIF89a" + b"\0" * 40,
+        _jpeg(640, 360)[:1000],  # SOF'tan önce kesik
+        b"\xff\xd8\xff\xda" + b"\0" * 40,  # SOF'suz görüntü verisi
+        _jpeg(0, 360),
+    ],
+)
+def test_dimensions_unknown(tmp_path, data):
+    p = tmp_path / "img"
+    p.write_bytes(data)
+    assert dimensions(str(p)) is None
+
+
+def test_dimensions_missing_file(tmp_path):
+    assert dimensions(str(tmp_path / "yok.png")) is None
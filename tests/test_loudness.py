@@ -0,0 +1,69 @@
+import math
+import shutil
+import wave
+from typing import Optional
+
+import pytest
+
+from core import loudness
+
+np = pytest.importorskip("numpy")
+
+
+def energy(lufs: float) -> float:
+    """Verilen LUFS'a karşılık gelen 100 ms dilim enerjisi."""
+    return 10 ** ((lufs + 0.691) / 10)
+
+
+def track(*runs: tuple[Optional[float], int]) -> loudness.TrackLoudness:
+    """(LUFS ya da None=sessizlik, dilim sayısı) parçalarından sentetik parça."""
+    segs = [np.full(n, 0.0 if lufs is None else energy(lufs)) for lufs, n in runs]
+    return loudness.TrackLoudness(np.concatenate(segs), 0.5)
+
+
+def test_constant_level():
+    assert loudness.TrackLoudness(np.full(50, energy(-20.0)), 0.1).loudness == pytest.approx(-20.0)
+
+
+def test_absolute_gate_drops_silence():
+    # sessizliğe taşan geçiş blokları kapıdan geçer; sonuç yalnızca biraz düşer
+    assert track((-20.0, 50), (None, 200)).loudness == pytest.approx(-20.0, abs=0.2)
+    assert track((None, 50)).loudness is None
+    assert track((-20.0, 3)).loudness is None  # 400 ms bloğa yetmez
+
+
+def test_relative_gate_drops_quiet_parts():
+    # -40 LUFS kısım göreli kapının (yaklaşık -30 LU) altında kalır
+    assert track((-20.0, 100), (-40.0, 100)).loudness == pytest.approx(-20.0, abs=0.1)
+
+
+def test_album_gates_tracks_together():
+    loud, quiet = track((-14.0, 100)), track((-18.0, 100))
+    album = loudness.gated_loudness([loud, quiet])
+    assert quiet.loudness < album < loud.loudness
+    assert album == pytest.approx(10 * math.log10((10 ** -1.4 + 10 ** -1.8) / 2), abs=0.05)
+
+
+def test_gain_values():
+    assert loudness.replaygain(-23.0) == pytest.approx(5.0)
+    assert loudness.replaygain(None) is None
+    assert loudness.r128_gain(-20.0) == -768
+    assert loudness.r128_gain(-500.0) == 32767
+
+
+@pytest.mark.skipif(not (shutil.which("ffmpeg") and shutil.which("ffprobe")), reason="ffmpeg yok")
+def test_analyze_sine(tmp_path):
+    # BS.1770: tek kanalda 0 dBFS 997 Hz sinüs -3.01 LKFS ölçülür
+    path = tmp_path / "sine.wav"
+    rate, amp = 48000, 0.1
+    t = np.arange(rate * 5) / rate
+    pcm = (amp * np.sin(2 * np.pi * 997 * t) * 32767).astype("<i2")
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(pcm.tobytes())
+    result = loudness.analyze(str(path))
+    assert result is not None
+    assert result.loudness == pytest.approx(-3.01 + 20 * math.log10(amp), abs=0.2)
+    assert result.peak == pytest.approx(amp, abs=0.01)
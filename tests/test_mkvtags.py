@@ -0,0 +1,107 @@
+import zlib
+
+import pytest
+
+from core import mkvtags
+from core.mkvtags import _children, _element, _size_vint, _void_header
+
+CLUSTER = _element(mkvtags._CLUSTER, _element(0xE7, b"\0") + _element(0xA3, b"\x81\0\0\x80" + bytes(range(256)) * 16))
+TRACKS = _element(0x1654AE6B, _element(0xAE, _element(0xD7, b"\x01") + _element(0x83, b"\x01")))
+
+
+def _void(total: int) -> bytes:
+    return _void_header(total) + b"\0" * (total - len(_void_header(total)))
+
+
+def _seek(eid: int, pos: int) -> bytes:
+    return _element(mkvtags._SEEK, _element(mkvtags._SEEK_ID, mkvtags._id_bytes(eid))
+                    + _element(mkvtags._SEEK_POSITION, pos.to_bytes(4, "big")))
+
+
+def _mkv(path, elements: list[bytes], *, seek_ids: list[int]) -> str:
+    """SeekHead'li dosya; SeekHead en başta ve konumları sabit (4 bayt) genişlikte."""
+    head_size = len(_element(mkvtags._SEEKHEAD, b"".join(_seek(e, 0) for e in seek_ids)))
+    positions, pos = {}, head_size
+    for el in elements:
+        eid = int.from_bytes(el[:4], "big")
+        positions.setdefault(eid, pos)
+        pos += len(el)
+    seekhead = _element(mkvtags._SEEKHEAD, b"".join(_seek(e, positions[e]) for e in seek_ids))
+    body = seekhead + b"".join(elements)
+    with open(path, "wb") as f:
+        f.write(_element(mkvtags._EBML, _element(0x4282, b"matroska")))
+        f.write(mkvtags._id_bytes(mkvtags._SEGMENT) + _size_vint(len(body), 8) + body)
+    return str(path)
+
+
+def _seek_target(path: str, eid: int) -> bytes:
+    """SeekHead'in eid için gösterdiği konumdaki elemanın ilk baytları."""
+    with open(path, "rb") as f:
+        layout = mkvtags._scan(f, f.seek(0, 2))
+        head = mkvtags._payload(f, next(p for e, p, _t in layout["elements"] if e == mkvtags._SEEKHEAD))
+        for k, v in _children(head):
+            seek = dict(_children(v))
+            if int.from_bytes(seek[mkvtags._SEEK_ID], "big") == eid:
+                f.seek(layout["start"] + int.from_bytes(seek[mkvtags._SEEK_POSITION], "big"))
+                return f.read(4)
+    raise AssertionError("SeekHead'de yok")
+
+
+def test_tags_appended_and_seekhead_updated(tmp_path):
+    info = _element(mkvtags._INFO, _element(0x2AD7B1, b"\x0f\x42\x40"))
+    p = _mkv(tmp_path / "a.mkv", [_void(64), info, TRACKS, CLUSTER], seek_ids=[mkvtags._INFO, 0x1654AE6B])
+    mkvtags.write_tags(p, {"title": "Başlık", "artist": "Sanatçı"})
+    # Info'nun ardında boşluk yok: başlık Tags'e TITLE olarak yazılır
+    assert mkvtags.read_tags(p) == {"TITLE": "Başlık", "ARTIST": "Sanatçı"}
+    assert _seek_target(p, mkvtags._TAGS) == mkvtags._id_bytes(mkvtags._TAGS)
+    assert _seek_target(p, mkvtags._INFO) == mkvtags._id_bytes(mkvtags._INFO)
+    assert CLUSTER in open(p, "rb").read()
+    mkvtags.check_structure(p)
+
+
+def test_in_place_rewrite_keeps_other_tags(tmp_path):
+    crc = _element(mkvtags._CRC32, b"\0\0\0\0")
+    info = _element(mkvtags._INFO, crc + _element(mkvtags._TITLE, b"eski"))
+    track_tag = _element(mkvtags._TAG, _element(mkvtags._TARGETS, _element(0x63C5, b"\x01"))
+                         + _element(mkvtags._SIMPLE_TAG, _element(mkvtags._TAG_NAME, b"DURATION") + _element(mkvtags._TAG_STRING, b"00:01")))
+    global_tag = _element(mkvtags._TAG, _element(mkvtags._TARGETS, b"")
+                          + _element(mkvtags._SIMPLE_TAG, _element(mkvtags._TAG_NAME, b"ENCODER") + _element(mkvtags._TAG_STRING, b"Lavf"))
+                          + _element(mkvtags._SIMPLE_TAG, _element(mkvtags._TAG_NAME, b"ARTIST") + _element(mkvtags._TAG_STRING, b"eski")))
+    tags = _element(mkvtags._TAGS, track_tag + global_tag)
+    p = _mkv(tmp_path / "a.mkv", [_void(32), info, _void(64), TRACKS, CLUSTER, tags],
+             seek_ids=[mkvtags._INFO, mkvtags._TAGS])
+    mkvtags.write_tags(p, {"title": "Yeni başlık", "artist": "Yeni"})
+
+    assert mkvtags.read_tags(p) == {"TITLE": "Yeni başlık", "ENCODER": "Lavf", "ARTIST": "Yeni"}
+    with open(p, "rb") as f:
+        layout = mkvtags._scan(f, f.seek(0, 2))
+        payloads = {e: mkvtags._payload(f, pos) for e, pos, _t in layout["elements"] if e != mkvtags._VOID}
+    assert b"DURATION" in payloads[mkvtags._TAGS]
+    assert b"TITLE" not in payloads[mkvtags._TAGS]  # Info ardındaki Void'e sığdı
+    info_children = _children(payloads[mkvtags._INFO])
+    assert info_children[0][0] == mkvtags._CRC32
+    assert info_children[0][1] == zlib.crc32(payloads[mkvtags._INFO][6:]).to_bytes(4, "little")
+    assert _seek_target(p, mkvtags._TAGS) == mkvtags._id_bytes(mkvtags._TAGS)
+    mkvtags.check_structure(p)
+
+
+def test_without_seekhead_left_untouched(tmp_path):
+    p = tmp_path / "a.mkv"
+    body = _element(mkvtags._INFO, b"") + CLUSTER
+    p.write_bytes(_element(mkvtags._EBML, b"") + mkvtags._id_bytes(mkvtags._SEGMENT) + _size_vint(len(body), 8) + body)
+    before = p.read_bytes()
+    with pytest.raises(mkvtags.MkvEditError):
+        mkvtags.write_tags(str(p), {"artist": "x"})
+    assert p.read_bytes() == before
+
+
+def test_check_structure_detects_truncation(tmp_path):
+    p = _mkv(tmp_path / "a.mkv", [_element(mkvtags._INFO, b""), CLUSTER], seek_ids=[mkvtags._INFO])
+    mkvtags.check_structure(p)
+    data = open(p, "rb").read()
+    (tmp_path / "b.mkv").write_bytes(data[:-100])
+    with pytest.raises(mkvtags.MkvEditError):
+        mkvtags.check_structure(str(tmp_path / "b.mkv"))
+    q = _mkv(tmp_path / "c.mkv", [_element(mkvtags._INFO, b"")], seek_ids=[mkvtags._INFO])
+    with pytest.raises(mkvtags.MkvEditError):
+        mkvtags.check_structure(q)
@@ -0,0 +1,142 @@
+import os
+
+import pytest
+
+from core import mp4tags
+from core.mp4tags import _box
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\0" * 32
+MDAT = _box(b"mdat", bytes(range(256)) * 64)
+MOOV = _box(b"moov", _box(b"mvhd", b"\0" * 100) + _box(b"trak", b"\0" * 64))
+FTYP = _box(b"ftyp", b"M4A \0\0\0\0M4A isom")
+
+
+def write(path, *boxes) -> str:
+    with open(path, "wb") as f:
+        f.write(b"".join(boxes))
+    return str(path)
+
+
+def mdat_bytes(path: str) -> bytes:
+    data = open(path, "rb").read()
+    pos = data.find(MDAT)
+    assert pos >= 0, "mdat değişti"
+    return data[pos:pos + len(MDAT)]
+
+
+def test_moov_at_end_extended(tmp_path):
+    p = write(tmp_path / "a.m4a", FTYP, MDAT, MOOV)
+    mp4tags.write_tags(p, {"title": "Başlık", "artist": "Sanatçı"}, cover=PNG)
+    tags = mp4tags.read_tags(p)
+    assert tags[b"\xa9nam"] == "Başlık".encode()
+    assert tags[b"\xa9ART"] == "Sanatçı".encode()
+    assert tags[b"covr"] == PNG
+    assert mdat_bytes(p) == MDAT
+    mp4tags.check_structure(p)
+
+
+def test_faststart_moov_moved_without_touching_mdat(tmp_path):
+    p = write(tmp_path / "a.m4a", FTYP, MOOV, MDAT)
+    mdat_pos = open(p, "rb").read().find(MDAT)
+    mp4tags.write_tags(p, {"title": "x" * 500})
+    data = open(p, "rb").read()
+    assert data.find(MDAT) == mdat_pos  # stco ofsetleri geçerli kalır
+    assert data[len(FTYP) + 4:len(FTYP) + 8] == b"free"
+    assert mp4tags.read_tags(p)[b"\xa9nam"] == b"x" * 500
+    mp4tags.check_structure(p)
+
+
+def test_rewrite_reuses_padding_and_keeps_other_items(tmp_path):
+    p = write(tmp_path / "a.m4a", FTYP, MOOV, mp4tags._free(mp4tags._PADDING), MDAT)
+    size = os.path.getsize(p)
+    mp4tags.write_tags(p, {"title": "Bir", "genre": "Caz"}, cover=PNG)
+    mp4tags.write_tags(p, {"title": "İki"})
+    assert os.path.getsize(p) == size  # ikisi de moov + free alanına sığar
+    assert mdat_bytes(p) == MDAT
+    tags = mp4tags.read_tags(p)
+    assert tags[b"\xa9nam"] == "İki".encode()
+    assert tags[b"\xa9gen"] == b"Caz"
+    assert tags[b"covr"] == PNG
+
+
+def test_fragmented_without_room_left_untouched(tmp_path):
+    moov = _box(b"moov", _box(b"mvhd", b"\0" * 100) + _box(b"mvex", b"\0" * 32))
+    p = write(tmp_path / "a.m4a", FTYP, moov, _box(b"moof", b"\0" * 16), MDAT)
+    before = open(p, "rb").read()
+    with pytest.raises(mp4tags.Mp4EditError):
+        mp4tags.write_tags(p, {"title": "uzun" * 100})
+    assert open(p, "rb").read() == before
+
+
+def test_check_structure_detects_truncation(tmp_path):
+    p = write(tmp_path / "a.m4a", FTYP, MOOV, MDAT[:-10])
+    with pytest.raises(mp4tags.Mp4EditError):
+        mp4tags.check_structure(p)
+    p = write(tmp_path / "b.m4a", FTYP, MDAT)
+    with pytest.raises(mp4tags.Mp4EditError):
+        mp4tags.check_structure(p)
+
+
+def test_freeform_items_round_trip(tmp_path):
+    p = write(tmp_path / "a.m4a", FTYP, MOOV, MDAT)
+    gain = f"{mp4tags.FREEFORM_PREFIX}{mp4tags.ITUNES_MEAN}:replaygain_track_gain"
+    mp4tags.write_tags(p, {gain: "-3.10 dB", "title": "Başlık"})
+    mp4tags.write_tags(p, {gain.replace("replaygain", "REPLAYGAIN"): "-2.00 dB"})
+    tags = mp4tags.read_tags(p)
+    assert tags[gain.encode()] == b"-2.00 dB"  # aynı öğe (büyük/küçük harf duyarsız) değiştirildi
+    assert tags[b"\xa9nam"] == "Başlık".encode()
+    assert [k for k in tags if k.startswith(b"----")] == [gain.encode()]
+
+
+def test_replaygain_written_in_place(tmp_path):
+    from core.downloader import _write_tags
+
+    p = write(tmp_path / "a.m4a", FTYP, MOOV, mp4tags._free(mp4tags._PADDING), MDAT)
+    size = os.path.getsize(p)
+    _write_tags(p, {"REPLAYGAIN_TRACK_GAIN": "-4.25 dB", "REPLAYGAIN_TRACK_PEAK": "0.912000"})
+    assert os.path.getsize(p) == size and mdat_bytes(p) == MDAT
+    tags = mp4tags.read_tags(p)
+    assert tags[b"----:com.apple.iTunes:replaygain_track_gain"] == b"-4.25 dB"
+    assert tags[b"----:com.apple.iTunes:replaygain_track_peak"] == b"0.912000"
+
+
+def _moov_and_mdat(path: str) -> tuple[bytes, bytes]:
+    with open(path, "rb") as f:
+        top = mp4tags._read_boxes(f, 0, os.path.getsize(path))
+        out = []
+        for kind in (b"moov", b"mdat"):
+            _k, pos, _h, size = next(b for b in top if b[0] == kind)
+            f.seek(pos)
+            out.append(f.read(size))
+    return out[0], out[1]
+
+
+def test_moov_at_end_never_overwritten_before_new_one_is_durable(tmp_path, monkeypatch):
+    p = write(tmp_path / "a.m4a", FTYP, MDAT, MOOV)
+    mp4tags.write_tags(p, {"title": "Eski"})
+    before = open(p, "rb").read()
+    old_moov, _mdat = _moov_and_mdat(p)
+
+    def crash(_fd):
+        raise OSError(28, "No space left on device")
+
+    # Yeni moov yazıldı ama diske inmeden yazım kesildi: eski moov hâlâ geçerli olmalı
+    monkeypatch.setattr(mp4tags.os, "fsync", crash)
+    with pytest.raises(OSError):
+        mp4tags.write_tags(p, {"title": "Yeni" * 2000}, cover=PNG * 100)
+    monkeypatch.undo()
+    after = open(p, "rb").read()
+    assert after.startswith(before)  # yalnızca sona eklendi; yarım kalan kuyruk eski moov'a dokunmaz
+    assert _moov_and_mdat(p) == (old_moov, MDAT)
+    assert mp4tags.read_tags(p)[b"\xa9nam"] == b"Eski"
+
+
+def test_moov_at_end_reuses_trailing_padding(tmp_path):
+    p = write(tmp_path / "a.m4a", FTYP, MDAT, MOOV)
+    mp4tags.write_tags(p, {"title": "Bir"})
+    size = os.path.getsize(p)
+    mp4tags.write_tags(p, {"title": "İki"})
+    assert os.path.getsize(p) == size  # yeni moov eskisinin ardındaki free'ye yazıldı
+    assert mp4tags.read_tags(p)[b"\xa9nam"] == "İki".encode()
+    assert _moov_and_mdat(p)[1] == MDAT
+    mp4tags.check_structure(p)
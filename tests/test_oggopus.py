@@ -0,0 +1,134 @@
+import base64
+import struct
+import threading
+
+import pytest
+
+from core import oggopus
+from core.mkvtags import _element
+
+OPUS_HEAD = b"OpusHead" + struct.pack("<BBHIhB", 1, 2, 312, 48000, 0, 0)
+PNG = b"\x89PNG\r\n\x1a\n" + b"\1" * 40
+
+
+def _packet(n: int, size: int) -> bytes:
+    # TOC 0xF8: CELT tam bant 20 ms, tek çerçeve => 960 örnek
+    return bytes([0xF8]) + bytes((n + i) & 0xFF for i in range(size - 1))
+
+
+def _simple_block(track: int, frames: list[bytes]) -> bytes:
+    head = bytes([0x80 | track]) + b"\0\0"
+    if len(frames) == 1:
+        return _element(oggopus._SIMPLE_BLOCK, head + b"\x80" + frames[0])
+    lacing = b""
+    for fr in frames[:-1]:
+        lacing += b"\xff" * (len(fr) // 255) + bytes([len(fr) % 255])
+    return _element(oggopus._SIMPLE_BLOCK, head + b"\x82" + bytes([len(frames) - 1]) + lacing + b"".join(frames))
+
+
+def _webm(path, packets: list[bytes], *, discard_ns: int = 0) -> str:
+    track = _element(oggopus._TRACK_ENTRY, b"".join([
+        _element(oggopus._TRACK_NUMBER, b"\x01"),
+        _element(oggopus._TRACK_TYPE, b"\x02"),
+        _element(oggopus._CODEC_ID, b"A_OPUS"),
+        _element(oggopus._CODEC_PRIVATE, OPUS_HEAD),
+    ]))
+    video = _element(oggopus._TRACK_ENTRY, b"".join([
+        _element(oggopus._TRACK_NUMBER, b"\x02"),
+        _element(oggopus._TRACK_TYPE, b"\x01"),
+        _element(oggopus._CODEC_ID, b"V_VP9"),
+    ]))
+    blocks = [_simple_block(1, packets[:1]), _simple_block(2, [b"video"]), _simple_block(1, packets[1:4])]
+    blocks += [_simple_block(1, [p]) for p in packets[4:-1]]
+    last = _element(oggopus._BLOCK, bytes([0x81]) + b"\0\0\0" + packets[-1])
+    last += _element(oggopus._DISCARD_PADDING, discard_ns.to_bytes(4, "big"))
+    blocks.append(_element(oggopus._BLOCK_GROUP, last))
+    cluster = _element(oggopus._CLUSTER, _element(0xE7, b"\0") + b"".join(blocks))
+    segment = _element(oggopus._INFO, b"") + _element(oggopus._TRACKS, track + video) + cluster
+    with open(path, "wb") as f:
+        f.write(_element(oggopus._EBML, _element(0x4282, b"webm")) + _element(oggopus._SEGMENT, segment))
+    return str(path)
+
+
+def _read_ogg(path: str) -> tuple[list[dict], list[bytes]]:
+    """Sayfalar (CRC doğrulanarak) ve birleştirilmiş paketler."""
+    data = open(path, "rb").read()
+    pages, packets, partial, pos = [], [], b"", 0
+    while pos < len(data):
+        assert data[pos:pos + 4] == b"OggS"
+        flags, granule, _serial, seq, crc, nseg = struct.unpack_from("<xBqIIIB", data, pos + 4)
+        lacing = data[pos + 27:pos + 27 + nseg]
+        end = pos + 27 + nseg + sum(lacing)
+        page = data[pos:end]
+        assert oggopus.ogg_crc(page[:22] + b"\0\0\0\0" + page[26:]) == crc
+        body = page[27 + nseg:]
+        for size in lacing:
+            partial += body[:size]
+            body = body[size:]
+            if size < 255:
+                packets.append(partial)
+                partial = b""
+        pages.append({"flags": flags, "granule": granule, "seq": seq})
+        pos = end
+    assert partial == b""
+    return pages, packets
+
+
+def test_opus_packet_samples():
+    assert oggopus.opus_packet_samples(b"\xf8") == 960
+    assert oggopus.opus_packet_samples(b"\xf9") == 1920  # kod 1: iki çerçeve
+    assert oggopus.opus_packet_samples(b"\x1b\x02") == 2 * 2880  # SILK 60 ms, kod 3: 2 çerçeve
+    assert oggopus.opus_packet_samples(b"") == 0
+
+
+def test_remux_round_trip(tmp_path):
+    packets = [_packet(i, size) for i, size in enumerate([40, 255, 300, 80, 70000, 120, 510, 60])]
+    src = _webm(tmp_path / "a.webm", packets, discard_ns=10_000_000)
+    dst = str(tmp_path / "a.opus")
+    oggopus.remux(src, dst, tags={"TITLE": "Şarkı", "ARTIST": ""}, cover=(PNG, "image/png"), cover_dims=(8, 8))
+
+    pages, out = _read_ogg(dst)
+    assert out[0] == OPUS_HEAD
+    assert out[2:] == packets
+    assert [p["seq"] for p in pages] == list(range(len(pages)))
+    assert pages[0]["flags"] == 0x02 and pages[-1]["flags"] & 0x04
+    assert not any(p["flags"] & 0x04 for p in pages[:-1])
+    assert pages[-1]["granule"] == 960 * len(packets) - 480  # 10 ms DiscardPadding
+
+    tags = out[1]
+    assert tags.startswith(b"OpusTags")
+    assert "TITLE=Şarkı".encode() in tags and b"ARTIST=" not in tags
+    b64 = tags.split(b"METADATA_BLOCK_PICTURE=", 1)[1]
+    picture = base64.b64decode(b64)
+    assert picture.endswith(PNG)
+    assert struct.unpack_from(">II", picture, 4 + 4 + len(b"image/png") + 4) == (8, 8)
+
+
+def test_remux_failure_removes_output(tmp_path):
+    src = tmp_path / "a.webm"
+    src.write_bytes(b"not webm at all")
+    dst = tmp_path / "a.opus"
+    with pytest.raises(oggopus.WebmRemuxError):
+        oggopus.remux(str(src), str(dst))
+    assert not dst.exists()
+
+
+def test_remux_in_subprocess(tmp_path):
+    from core.downloader import _PostprocessCancelEvent, _remux_opus_process
+
+    packets = [_packet(i, 100) for i in range(5)]
+    src = _webm(tmp_path / "a.webm", packets)
+    cover = tmp_path / "c.png"
+    cover.write_bytes(PNG)
+    dst = str(tmp_path / "a.opus")
+    ev = _PostprocessCancelEvent(threading.Event())
+    _remux_opus_process(src, dst, tags={"TITLE": "Şarkı"}, cover=str(cover), cancel_event=ev)
+    _, out = _read_ogg(dst)
+    assert out[2:] == packets
+    assert "TITLE=Şarkı".encode() in out[1] and b"METADATA_BLOCK_PICTURE=" in out[1]
+
+    bad = tmp_path / "b.webm"
+    bad.write_bytes(b"\x00" * 64)
+    with pytest.raises(oggopus.WebmRemuxError):
+        _remux_opus_process(str(bad), str(tmp_path / "b.opus"), tags={}, cover=None, cancel_event=ev)
+    assert not (tmp_path / "b.opus").exists()
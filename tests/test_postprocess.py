@@ -0,0 +1,18 @@
+from core import downloader
+from core.downloader import ffmpeg_threads, with_ffmpeg_threads
+
+
+def test_ffmpeg_threads_split_cores(monkeypatch):
+    monkeypatch.setattr(downloader, "default_pp_workers", lambda: 8)
+    assert ffmpeg_threads(1) == 8
+    assert ffmpeg_threads(3) == 2
+    assert ffmpeg_threads(16) == 1
+
+
+def test_with_ffmpeg_threads_places_options():
+    cmd = ["ffmpeg", "-v", "error", "-i", "in.webm", "-c:a", "flac", "out.flac"]
+    assert with_ffmpeg_threads(cmd, 2) == [
+        "ffmpeg", "-filter_threads", "2", "-v", "error", "-i", "in.webm", "-c:a", "flac", "-threads", "2", "out.flac",
+    ]
+    pinned = ["ffmpeg", "-threads", "1", "-i", "a", "b"]
+    assert with_ffmpeg_threads(pinned, 4) == pinned
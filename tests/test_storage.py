@@ -0,0 +1,35 @@
+import os
+
+import pytest
+
+from core import storage
+
+FORMATS = [{"format_id": "140", "vcodec": "none", "acodec": "mp4a.40.2", "filesize": 10_000_000}]
+
+
+def test_m4a_peak_is_single_copy():
+    # Etiket/kapak yerinde yazılır: geçici kopya yok
+    assert storage.estimate_job_bytes(FORMATS, "140", "audio_m4a") == int(10_000_000 * storage._MARGIN)
+
+
+def test_preallocate_keeps_size(tmp_path):
+    if not storage.supports_fallocate(str(tmp_path)):
+        pytest.skip("dosya sistemi fallocate desteklemiyor")
+    part = tmp_path / "a.m4a.part"
+    part.write_bytes(b"x" * 100)
+    assert storage.preallocate(str(part), 4 * 1024 * 1024)
+    assert part.stat().st_size == 100  # sürdürme .part boyutuna bakar
+    assert part.stat().st_blocks * 512 >= 4 * 1024 * 1024
+    assert not storage.preallocate(str(tmp_path / "yok.part"), 4096)
+
+
+def test_fallocate_probe_cached_per_device(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(storage, "_FALLOC_CACHE", {})
+    monkeypatch.setattr(storage, "_fallocate_keep_size", lambda fd, size: calls.append(size))
+    sub = tmp_path / "alt"
+    sub.mkdir()
+    assert storage.supports_fallocate(str(tmp_path))
+    assert storage.supports_fallocate(str(sub))
+    assert calls == [storage._FALLOC_PROBE_BYTES]
+    assert not [n for n in os.listdir(tmp_path) if n.startswith(".falloc-probe-")]
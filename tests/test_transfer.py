@@ -0,0 +1,20 @@
+from core.transfer import adapt_transfer_settings, choose_transfer_settings, swap_transfer_args, transfer_args
+
+
+def test_adapt_picks_level_from_measurement():
+    base = choose_transfer_settings("adaptive")
+    fast = adapt_transfer_settings(base, 200.0)
+    assert fast["concurrent_fragments"] == 16 and fast["http_chunk_size"] == "20M"
+    assert adapt_transfer_settings(base, None) is base
+    plain = choose_transfer_settings("default")
+    assert adapt_transfer_settings(plain, 200.0) is plain
+
+
+def test_swap_replaces_only_transfer_slice():
+    base = {**choose_transfer_settings("adaptive"), "downloader": "aria2c", "file_allocation": "falloc"}
+    slow = adapt_transfer_settings(base, 1.0)
+    cmd = ["yt-dlp", "--newline", *transfer_args(base), "-f", "bestaudio", "URL"]
+    out = swap_transfer_args(cmd, base, slow)
+    assert out == ["yt-dlp", "--newline", *transfer_args(slow), "-f", "bestaudio", "URL"]
+    assert "--file-allocation=falloc" in out[out.index("--downloader-args") + 1]
+    assert swap_transfer_args(["yt-dlp", "URL"], base, slow) == ["yt-dlp", "URL"]
@@ -0,0 +1,27 @@
+import pytest
+
+from core.utils import parse_clip_range
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("90-120", (90.0, 120.0)),
+        ("1:30-2:00", (90.0, 120.0)),
+        ("1:02:03-1:02:33.5", (3723.0, 3753.5)),
+        (" 0:05,5 - 0:10 ", (5.5, 10.0)),
+    ],
+)
+def test_parse_clip_range(text, expected):
+    assert parse_clip_range(text) == expected
+
+
+def test_parse_clip_range_empty():
+    assert parse_clip_range("") is None
+    assert parse_clip_range("   ") is None
+
+
+@pytest.mark.parametrize("text", ["10", "10-", "20-10", "5-5", "a-b", "1:2:3:4-5"])
+def test_parse_clip_range_invalid(text):
+    with pytest.raises(ValueError):
+        parse_clip_range(text)